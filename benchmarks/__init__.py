@@ -0,0 +1 @@
+# JARVIS Benchmarks
@@ -0,0 +1,207 @@
+"""
+Agent loop benchmark
+Measures Agent.process_message's own overhead against the mock Ollama server.
+
+Runs headless: desktop backends are stubbed (benchmarks.stubs) and the model
+is benchmarks.mock_ollama, replying instantly unless --first-token-delay /
+--token-delay are given. Reports p50/p95/p99 of:
+- request: wall time of one process_message call
+- overhead/iter: request time minus time spent in model calls, per LLM iteration
+- serialize: building + JSON-encoding one /api/chat payload
+- dispatch: registry.execute latency around a no-op tool (executor hop, locks, caching)
+
+Usage:
+    python -m benchmarks.agent_loop --runs 200
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+
+from benchmarks import stubs
+stubs.install()
+
+import config
+from benchmarks.mock_ollama import MockOllama, Reply, call
+from core.ollama_client import OllamaClient
+
+
+SCENARIOS = ("chat", "tools")
+ANSWER = "Pronto! Aqui está o resultado que você pediu, com todos os detalhes organizados. ✅ " * 3
+
+# Handler start/end times of the tool call being timed (one list per call,
+# so concurrent calls don't mix)
+_marks: ContextVar[list] = ContextVar("_marks")
+
+
+def responder(scenario: str, delays: dict):
+    """
+    Deterministic replies based on the conversation so far.
+
+    "chat" answers directly. "tools" makes one side-effect call, then three
+    independent lookups in parallel, then answers (3 LLM iterations).
+    """
+    def respond(body: dict) -> Reply:
+        messages = body.get("messages", [])
+        last_user = max(i for i, m in enumerate(messages) if m.get("role") == "user")
+        step = sum(1 for m in messages[last_user:] if m.get("role") == "tool")
+
+        if scenario == "tools" and step == 0:
+            return Reply("Vou fazer isso.", [call("bench_action", target="janela")], **delays)
+        if scenario == "tools" and step == 1:
+            lookups = [call("bench_lookup", key=f"item{i}") for i in range(3)]
+            return Reply("", lookups, **delays)
+        return Reply(ANSWER, **delays)
+    return respond
+
+
+class TimedOllamaClient(OllamaClient):
+    """OllamaClient recording model-call and payload serialization times."""
+
+    def __init__(self, timings: dict):
+        super().__init__()
+        self.timings = timings
+
+    def _build_payload(self, *args, **kwargs) -> dict:
+        start = time.perf_counter()
+        payload = super()._build_payload(*args, **kwargs)
+        json.dumps(payload)  # What the HTTP client does with it next
+        self.timings["serialize"].append(time.perf_counter() - start)
+        return payload
+
+    async def chat(self, *args, **kwargs) -> dict:
+        start = time.perf_counter()
+        try:
+            return await super().chat(*args, **kwargs)
+        finally:
+            self.timings["llm_current"] += time.perf_counter() - start
+            self.timings["iterations_current"] += 1
+
+    async def chat_stream(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            async for chunk in super().chat_stream(*args, **kwargs):
+                yield chunk
+        finally:
+            self.timings["llm_current"] += time.perf_counter() - start
+            self.timings["iterations_current"] += 1
+
+
+def register_bench_tools() -> None:
+    """No-op tools whose handlers record when they start and end."""
+    from core.tools import tool
+
+    @tool("bench_action", "Benchmark: ação sem efeito", {"type": "object", "properties": {"target": {"type": "string"}}})
+    def bench_action(target: str = "") -> dict:
+        _marks.get().append(time.perf_counter())
+        result = {"success": True, "target": target}
+        _marks.get().append(time.perf_counter())
+        return result
+
+    @tool("bench_lookup", "Benchmark: consulta sem efeito", {"type": "object", "properties": {"key": {"type": "string"}}},
+          independent=True)
+    def bench_lookup(key: str = "") -> dict:
+        _marks.get().append(time.perf_counter())
+        result = {"success": True, "key": key, "value": key.upper()}
+        _marks.get().append(time.perf_counter())
+        return result
+
+
+def instrument_dispatch(registry, timings: dict) -> None:
+    """Wrap registry.execute to time everything around the handler itself."""
+    execute = registry.execute
+
+    async def timed_execute(name: str, arguments: dict):
+        marks = []
+        _marks.set(marks)
+        start = time.perf_counter()
+        result = await execute(name, arguments)
+        end = time.perf_counter()
+        if len(marks) == 2:
+            timings["dispatch"].append((marks[0] - start) + (end - marks[1]))
+        return result
+
+    registry.execute = timed_execute
+
+
+def percentiles(values: list[float]) -> tuple[float, float, float]:
+    """p50, p95, p99 in milliseconds."""
+    if len(values) < 2:
+        value = values[0] * 1000 if values else 0.0
+        return value, value, value
+    cuts = statistics.quantiles(values, n=100, method="inclusive")
+    return cuts[49] * 1000, cuts[94] * 1000, cuts[98] * 1000
+
+
+async def run_scenario(scenario: str, runs: int, delays: dict) -> dict:
+    """Play one scenario `runs` times and collect the timings."""
+    from core.agent import Agent
+    from core.tools import registry
+
+    timings = defaultdict(list)
+    timings["llm_current"] = 0.0
+    timings["iterations_current"] = 0
+
+    with MockOllama(responder=responder(scenario, delays)) as mock:
+        config.OLLAMA_BASE_URL = mock.base_url
+        register_bench_tools()
+        instrument_dispatch(registry, timings)
+        client = TimedOllamaClient(timings)
+        agent = Agent(ollama=client)
+        try:
+            for i in range(runs + 1):
+                agent.clear_history()
+                timings["llm_current"] = 0.0
+                timings["iterations_current"] = 0
+
+                start = time.perf_counter()
+                async for _ in agent.process_message(f"benchmark {scenario} #{i}"):
+                    pass
+                elapsed = time.perf_counter() - start
+
+                if i == 0:
+                    # Warm-up run (imports, thread pools, connection setup)
+                    timings["serialize"].clear()
+                    timings["dispatch"].clear()
+                    continue
+                iterations = max(1, timings["iterations_current"])
+                timings["request"].append(elapsed)
+                timings["overhead/iter"].append((elapsed - timings["llm_current"]) / iterations)
+        finally:
+            registry.execute = type(registry).execute.__get__(registry)
+            await client.close()
+    return timings
+
+
+def report(scenario: str, timings: dict) -> None:
+    print(f"\n=== {scenario} ===")
+    print(f"{'metric':<14} {'samples':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for metric in ("request", "overhead/iter", "serialize", "dispatch"):
+        values = timings.get(metric, [])
+        if not values:
+            continue
+        p50, p95, p99 = percentiles(values)
+        print(f"{metric:<14} {len(values):>8} {p50:>9.3f} {p95:>9.3f} {p99:>9.3f}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=100, help="requests per scenario")
+    parser.add_argument("--scenario", choices=SCENARIOS + ("all",), default="all")
+    parser.add_argument("--first-token-delay", type=float, default=0.0, help="mock prompt-eval latency (s)")
+    parser.add_argument("--token-delay", type=float, default=0.0, help="mock latency between chunks (s)")
+    args = parser.parse_args()
+
+    delays = {"first_token_delay": args.first_token_delay, "token_delay": args.token_delay}
+    scenarios = SCENARIOS if args.scenario == "all" else (args.scenario,)
+    print(f"Runs: {args.runs} | stream: {config.STREAM_RESPONSES} | tool calls: {config.TOOL_CALL_MODE}")
+    for scenario in scenarios:
+        report(scenario, await run_scenario(scenario, args.runs, delays))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,129 @@
+"""
+Context sizing benchmark
+Compares a fixed num_ctx with adaptive sizing on short, tool and long-document requests.
+
+For each request it records the num_ctx sent, Ollama's load/prompt-eval/total
+times and the model's memory from /api/ps afterwards. With a fixed context
+every request pays for the 8K KV cache; with adaptive sizing small requests
+run in a small one (the reload on bucket changes shows up as load time).
+
+Usage (Ollama running with config.OLLAMA_MODEL pulled):
+    python -m benchmarks.context_size --rounds 3
+
+Offline (mock server - num_ctx choices only, no memory or latency effect):
+    python -m benchmarks.context_size --mock
+"""
+
+import argparse
+import asyncio
+import statistics
+
+import config
+from core.context_size import sizer
+from core.ollama_client import OllamaClient
+from core.tools import registry
+
+
+LONG_TEXT = (
+    "O relatório trimestral mostra crescimento de 12% na receita, puxado pelas vendas online. "
+    "Os custos logísticos subiram por causa do frete, e a margem operacional caiu meio ponto. "
+) * 120  # ~5K tokens, like a few PDF pages
+
+
+class RecordingClient(OllamaClient):
+    """OllamaClient remembering the options of the last request it built."""
+
+    last_options: dict = {}
+
+    def _build_payload(self, *args, **kwargs) -> dict:
+        payload = super()._build_payload(*args, **kwargs)
+        self.last_options = payload["options"]
+        return payload
+
+
+def scenarios() -> list[tuple[str, str, list[dict], list[dict]]]:
+    """(name, request class, messages, tools) for each request kind."""
+    import core.agent  # Registers every tool
+    system = {"role": "system", "content": f"Você é o {config.AGENT_NAME}. Responda em Português Brasileiro."}
+    return [
+        ("chat", "chat", [system, {"role": "user", "content": "oi, tudo bem?"}], []),
+        ("tools", "simple_tool", [system, {"role": "user", "content": "qual a cotação do dólar hoje?"}],
+         registry.get_ollama_format()),
+        ("document", "simple_tool", [system, {"role": "user", "content": f"Resuma este documento:\n{LONG_TEXT}"}], []),
+    ]
+
+
+async def model_memory(client: OllamaClient) -> int:
+    """Bytes the model takes in memory (VRAM + RAM) per /api/ps."""
+    for entry in await client.running_models():
+        if entry.get("name", "").startswith(client.model) or entry.get("model", "") == client.model:
+            return entry.get("size", 0)
+    return 0
+
+
+async def run_mode(adaptive: bool, rounds: int) -> list[dict]:
+    """
+    Play each scenario `rounds` times in a row with adaptive sizing on or off
+    (like a stretch of small talk, then tool use, then document work).
+    """
+    config.ADAPTIVE_CONTEXT = adaptive
+    client = RecordingClient()
+    rows = []
+    try:
+        for name, request_class, messages, tools in scenarios():
+            for _ in range(rounds):
+                response = await client.chat(list(messages), tools=tools or None, request_class=request_class)
+                if "error" in response:
+                    raise SystemExit(f"Ollama error: {response['error']}")
+                rows.append({
+                    "scenario": name,
+                    "num_ctx": client.last_options["num_ctx"],
+                    "load_ms": response.get("load_duration", 0) / 1e6,
+                    "prompt_ms": response.get("prompt_eval_duration", 0) / 1e6,
+                    "total_ms": response.get("total_duration", 0) / 1e6,
+                    "memory_mb": await model_memory(client) / 1024 ** 2,
+                })
+    finally:
+        await client.close()
+    return rows
+
+
+def report(label: str, rows: list[dict]) -> None:
+    print(f"\n=== {label} ===")
+    print(f"{'scenario':<10} {'num_ctx':>8} {'load ms':>9} {'prompt ms':>10} {'total ms':>9} {'memory MB':>10}")
+    for name in dict.fromkeys(row["scenario"] for row in rows):
+        group = [row for row in rows if row["scenario"] == name]
+        print(f"{name:<10} {group[-1]['num_ctx']:>8} "
+              f"{statistics.median(r['load_ms'] for r in group):>9.0f} "
+              f"{statistics.median(r['prompt_ms'] for r in group):>10.0f} "
+              f"{statistics.median(r['total_ms'] for r in group):>9.0f} "
+              f"{max(r['memory_mb'] for r in group):>10.0f}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=3, help="passes over the scenarios per mode")
+    parser.add_argument("--mock", action="store_true", help="run against the mock server")
+    args = parser.parse_args()
+
+    mock = None
+    if args.mock:
+        from benchmarks import stubs
+        stubs.install()
+        from benchmarks.mock_ollama import MockOllama
+        mock = MockOllama().start()
+        config.OLLAMA_BASE_URL = mock.base_url
+
+    try:
+        print(f"Model: {config.OLLAMA_MODEL} | fixed num_ctx: {config.OLLAMA_NUM_CTX} "
+              f"| buckets: {config.NUM_CTX_BUCKETS}")
+        report("fixed", await run_mode(False, args.rounds))
+        report("adaptive", await run_mode(True, args.rounds))
+        print(f"\nBucket switches (model reloads): {sizer.switches}")
+    finally:
+        if mock:
+            mock.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,244 @@
+"""
+Mock Ollama server
+Replays scripted /api/chat replies over real HTTP, with configurable latency.
+
+Replies come from a script (a list consumed in order) or a responder
+function that looks at the request body. Streaming and non-streaming
+requests are both served, and requests with a `format` schema get the
+reply rendered as structured JSON ({"reply", "tool_calls"}).
+
+Usage in code:
+    with MockOllama(script=[Reply(tool_calls=[call("calculate", expression="2+2")]),
+                            Reply("Deu 4!")]) as mock:
+        config.OLLAMA_BASE_URL = mock.base_url
+        ...
+
+Standalone (replies echo the last user message):
+    python -m benchmarks.mock_ollama --port 11435 --token-delay 0.02
+"""
+
+import argparse
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional
+
+
+@dataclass
+class Reply:
+    """One scripted model reply."""
+    content: str = ""
+    tool_calls: list[dict] = field(default_factory=list)
+    chunk_size: int = 4  # Characters per streamed chunk
+    first_token_delay: float = 0.0  # Seconds before the first chunk (prompt eval)
+    token_delay: float = 0.0  # Seconds between chunks (generation)
+    prompt_eval_count: int = 0  # Reported as-is in the final chunk
+    load_duration: float = 0.0  # Seconds reported as model load time (a cold start)
+
+
+def call(name: str, **arguments) -> dict:
+    """A tool call in Ollama's format."""
+    return {"function": {"name": name, "arguments": arguments}}
+
+
+def echo_responder(body: dict) -> Reply:
+    """Default responder: answer with the last user message."""
+    users = [m for m in body.get("messages", []) if m.get("role") == "user"]
+    text = users[-1].get("content", "") if users else ""
+    return Reply(f"Você disse: {text}")
+
+
+class MockOllama:
+    """
+    Fake Ollama HTTP server running in a background thread.
+
+    Every /api/chat body is kept in `requests` for assertions. Model load
+    calls (/api/generate) are answered immediately and kept in `loads`.
+    """
+
+    def __init__(
+        self,
+        script: Optional[list[Reply]] = None,
+        responder: Optional[Callable[[dict], Reply]] = None,
+        models: tuple[str, ...] = ("gemma3:12b",),
+        host: str = "127.0.0.1",
+        port: int = 0
+    ):
+        self.script = list(script or [])
+        self.responder = responder or echo_responder
+        self.models = models
+        self.requests: list[dict] = []
+        self.loads: list[dict] = []
+        self.connections: set[tuple] = set()  # Client (host, port) pairs seen, to check connection reuse
+        self.aborted = 0  # Streams the client hung up on mid-reply (e.g. a cancelled request)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def next_reply(self, body: dict) -> Reply:
+        """The scripted reply for a request (script first, then the responder)."""
+        with self._lock:
+            self.requests.append(body)
+            if self.script:
+                return self.script.pop(0)
+        return self.responder(body)
+
+    def start(self) -> "MockOllama":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "MockOllama":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _make_handler(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True  # Small NDJSON chunks go out immediately
+
+            def log_message(self, *args):
+                pass
+
+            def _send_json(self, data: dict, status: int = 200):
+                payload = json.dumps(data).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self):
+                if self.path == "/api/tags":
+                    self._send_json({"models": [{"name": name} for name in mock.models]})
+                elif self.path == "/api/ps":
+                    self._send_json({"models": []})
+                else:
+                    self._send_json({"error": "not found"}, 404)
+
+            def do_POST(self):
+                mock.connections.add(self.client_address)
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+
+                if self.path == "/api/generate":
+                    mock.loads.append(body)
+                    self._send_json({"model": body.get("model"), "response": "", "done": True,
+                                     "done_reason": "load"})
+                    return
+                if self.path != "/api/chat":
+                    self._send_json({"error": "not found"}, 404)
+                    return
+
+                reply = mock.next_reply(body)
+                content, tool_calls = reply.content, reply.tool_calls
+                if body.get("format"):
+                    content = json.dumps({
+                        "reply": content,
+                        "tool_calls": [
+                            {"name": c["function"]["name"], "arguments": c["function"]["arguments"]}
+                            for c in tool_calls
+                        ]
+                    }, ensure_ascii=False)
+                    tool_calls = []
+
+                start = time.perf_counter()
+                time.sleep(reply.first_token_delay)
+                if body.get("stream", True):
+                    self._stream(body, reply, content, tool_calls, start)
+                else:
+                    time.sleep(reply.token_delay * max(1, len(content) // reply.chunk_size))
+                    message = {"role": "assistant", "content": content}
+                    if tool_calls:
+                        message["tool_calls"] = tool_calls
+                    self._send_json({**self._final_stats(body, reply, content, start), "message": message})
+
+            def _final_stats(self, body: dict, reply: Reply, content: str, start: float) -> dict:
+                return {
+                    "model": body.get("model"),
+                    "done": True,
+                    "done_reason": "stop",
+                    "total_duration": int((time.perf_counter() - start) * 1e9),
+                    "load_duration": int(reply.load_duration * 1e9),
+                    "prompt_eval_count": reply.prompt_eval_count,
+                    "prompt_eval_duration": int(reply.first_token_delay * 1e9),
+                    "eval_count": max(1, len(content) // 4),
+                    "eval_duration": 0
+                }
+
+            def _stream(self, body: dict, reply: Reply, content: str, tool_calls: list, start: float):
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+
+                def write(data: dict):
+                    line = (json.dumps(data, ensure_ascii=False) + "\n").encode()
+                    self.wfile.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+                    self.wfile.flush()
+
+                size = max(1, reply.chunk_size)
+                try:
+                    for i in range(0, len(content), size):
+                        if i:
+                            time.sleep(reply.token_delay)
+                        write({"model": body.get("model"), "done": False,
+                               "message": {"role": "assistant", "content": content[i:i + size]}})
+                    if tool_calls:
+                        write({"model": body.get("model"), "done": False,
+                               "message": {"role": "assistant", "content": "", "tool_calls": tool_calls}})
+                    write({**self._final_stats(body, reply, content, start),
+                           "message": {"role": "assistant", "content": ""}})
+                    self.wfile.write(b"0\r\n\r\n")
+                    self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    # Like Ollama, stop generating once the client is gone
+                    with mock._lock:
+                        mock.aborted += 1
+                    self.close_connection = True
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--first-token-delay", type=float, default=0.2, help="seconds before the first chunk")
+    parser.add_argument("--token-delay", type=float, default=0.02, help="seconds between chunks")
+    args = parser.parse_args()
+
+    def responder(body: dict) -> Reply:
+        reply = echo_responder(body)
+        reply.first_token_delay = args.first_token_delay
+        reply.token_delay = args.token_delay
+        return reply
+
+    mock = MockOllama(responder=responder, host=args.host, port=args.port)
+    print(f"Mock Ollama listening on {mock.base_url} (Ctrl+C to stop)")
+    try:
+        mock._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        mock._server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Prompt cache benchmark
+Compares Ollama prompt-eval work on warm turns for both prompt layouts.
+
+Ollama only reports the prompt tokens it actually evaluated, so tokens
+served from the KV cache show up as a lower prompt_eval_count/duration.
+
+Usage (Ollama running with config.OLLAMA_MODEL pulled):
+    python -m benchmarks.prompt_cache --turns 6
+"""
+
+import argparse
+import asyncio
+import statistics
+
+import config
+from core.agent import Agent
+from core.tools import registry
+
+
+CONVERSATION = [
+    "oi, tudo bem?",
+    "qual é a capital da França?",
+    "e da Alemanha?",
+    "me conta uma curiosidade sobre Berlim",
+    "quem é o maior time do Brasil?",
+    "valeu, e qual o melhor jogador da história do Corinthians?",
+    "me recomenda um filme de ficção científica",
+    "por quê esse?",
+]
+
+
+async def run_layout(layout: str, turns: int) -> list[dict]:
+    """Play the scripted conversation with one layout and collect Ollama's stats."""
+    config.PROMPT_LAYOUT = layout
+    agent = Agent()
+    tools = registry.get_ollama_format()
+    rows = []
+    
+    try:
+        for text in CONVERSATION[:turns]:
+            agent.history.append({"role": "user", "content": text})
+            response = await agent.ollama.chat(agent._get_messages(), tools=tools)
+            if "error" in response:
+                raise SystemExit(f"Ollama error: {response['error']}")
+            
+            agent.history.append({
+                "role": "assistant",
+                "content": response.get("message", {}).get("content", "")
+            })
+            rows.append({
+                "prompt_tokens": response.get("prompt_eval_count", 0),
+                "prompt_ms": response.get("prompt_eval_duration", 0) / 1e6,
+                "total_ms": response.get("total_duration", 0) / 1e6,
+            })
+    finally:
+        await agent.close()
+    
+    return rows
+
+
+def report(layout: str, rows: list[dict]) -> float:
+    """Print per-turn stats and return the mean warm prompt-eval time."""
+    print(f"\n=== {layout} ===")
+    print(f"{'turn':>4} {'prompt tok':>11} {'prompt ms':>10} {'total ms':>9}")
+    for i, row in enumerate(rows, 1):
+        print(f"{i:>4} {row['prompt_tokens']:>11} {row['prompt_ms']:>10.0f} {row['total_ms']:>9.0f}")
+    
+    # Turn 1 is cold for both layouts; compare warm turns only
+    warm = [row["prompt_ms"] for row in rows[1:]] or [0]
+    mean = statistics.mean(warm)
+    print(f"warm prompt-eval mean: {mean:.0f} ms")
+    return mean
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=6, help="conversation turns per layout")
+    args = parser.parse_args()
+    
+    print(f"Model: {config.OLLAMA_MODEL} | tools: {len(registry.get_all())}")
+    
+    legacy = report("legacy", await run_layout("legacy", args.turns))
+    cached = report("cache_friendly", await run_layout("cache_friendly", args.turns))
+    
+    if legacy:
+        print(f"\nPrompt-eval time saved on warm turns: {legacy - cached:.0f} ms "
+              f"({100 * (legacy - cached) / legacy:.0f}%)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
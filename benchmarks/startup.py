@@ -0,0 +1,68 @@
+"""
+Startup benchmark
+Cold import time of the server (`import main`) with lazy tool loading on and off.
+
+Each run is a fresh interpreter, so module caches don't carry over (the
+OS file cache does - the first run of each mode is dropped as warm-up).
+The profile lists the tool modules imported at startup and their cost.
+
+Usage:
+    python -m benchmarks.startup --runs 5
+
+On a host without the desktop dependencies (pyautogui, winreg...), add
+--stubs so the eager mode can import every tool module.
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+PROBE = """
+import json, sys, time
+if {stubs}:
+    from benchmarks import stubs
+    stubs.install()
+start = time.perf_counter()
+import config
+config.TOOL_LAZY_LOADING = {lazy}
+import main
+elapsed = time.perf_counter() - start
+from core import tool_manifest
+# Real modules only (the --stubs fakes have no file)
+heavy = [m for m in ("pyautogui", "PIL", "bs4", "pytesseract", "pyperclip") if getattr(sys.modules.get(m), "__file__", None)]
+print(json.dumps({{"ms": elapsed * 1000, "modules": len(sys.modules), "heavy": heavy,
+                  "profile": tool_manifest.profile()}}))
+"""
+
+
+def measure(lazy: bool, stubs: bool) -> dict:
+    """Import the server once in a fresh interpreter."""
+    code = PROBE.format(lazy=lazy, stubs=stubs)
+    output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="measured imports per mode")
+    parser.add_argument("--stubs", action="store_true", help="fake the desktop-only dependencies")
+    args = parser.parse_args()
+
+    print(f"{'mode':<6} {'median ms':>10} {'min ms':>8} {'modules':>8}  heavy imports")
+    for lazy in (False, True):
+        runs = [measure(lazy, args.stubs) for _ in range(args.runs + 1)][1:]
+        times = [run["ms"] for run in runs]
+        print(f"{'lazy' if lazy else 'eager':<6} {statistics.median(times):>10.0f} {min(times):>8.0f} "
+              f"{runs[-1]['modules']:>8}  {', '.join(runs[-1]['heavy']) or '-'}")
+        imports = runs[-1]["profile"]["imports"]
+        for module, entry in sorted(imports.items(), key=lambda item: -item[1].get("ms", 0)):
+            print(f"         {module:<22} {entry.get('ms', entry.get('error'))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Stub desktop backends for headless runs
+Fake pyautogui and psutil (plus winreg/pytesseract) so the tools import and run on a Linux box.
+
+Usage (before importing core.agent or any tool module):
+    from benchmarks import stubs
+    stubs.install()
+"""
+
+import sys
+import types
+from collections import namedtuple
+
+
+# Smallest valid PNG (1x1 transparent pixel), returned by fake screenshots
+PNG_1X1 = bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+    "1f15c4890000000b49444154789c6360000200000500017a5eab3f0000000049454e44ae426082"
+)
+
+# Every call made to the fake pyautogui, as (function, args, kwargs)
+gui_calls: list[tuple] = []
+
+
+class FakeImage:
+    """Stand-in for the PIL image pyautogui.screenshot() returns."""
+
+    def __init__(self, size=(1920, 1080)):
+        self.size = size
+        self.width, self.height = size
+
+    def save(self, fp, format=None, **kwargs):
+        if isinstance(fp, (str, bytes)) or hasattr(fp, "__fspath__"):
+            with open(fp, "wb") as f:
+                f.write(PNG_1X1)
+        else:
+            fp.write(PNG_1X1)
+
+    def getpixel(self, xy):
+        return (0, 0, 0)
+
+    def resize(self, size, *args, **kwargs):
+        return FakeImage(size)
+
+    def convert(self, mode):
+        return self
+
+
+def _make_pyautogui() -> types.ModuleType:
+    """Fake pyautogui: records calls, never touches a display."""
+    module = types.ModuleType("pyautogui")
+    module.FAILSAFE = True
+    module.PAUSE = 0.0
+    module.easeOutQuad = lambda x: x
+
+    def recorder(name, result=None):
+        def call(*args, **kwargs):
+            gui_calls.append((name, args, kwargs))
+            return result() if callable(result) else result
+        return call
+
+    for name in ("moveTo", "click", "doubleClick", "rightClick", "drag", "scroll",
+                 "write", "typewrite", "press", "hotkey", "keyDown", "keyUp", "mouseDown", "mouseUp"):
+        setattr(module, name, recorder(name))
+    module.position = recorder("position", (960, 540))
+    module.size = recorder("size", (1920, 1080))
+    module.screenshot = recorder("screenshot", FakeImage)
+    module.locateOnScreen = recorder("locateOnScreen", None)
+    module.center = lambda box: (box[0] + box[2] // 2, box[1] + box[3] // 2)
+    return module
+
+
+def _make_psutil() -> types.ModuleType:
+    """Fake psutil with fixed, deterministic figures."""
+    module = types.ModuleType("psutil")
+
+    class Error(Exception):
+        pass
+
+    class NoSuchProcess(Error):
+        pass
+
+    class AccessDenied(Error):
+        pass
+
+    class Process:
+        def __init__(self, pid, name, cpu=0.0, memory=0.0):
+            self.pid = pid
+            self.info = {"pid": pid, "name": name, "cpu_percent": cpu, "memory_percent": memory}
+
+        def name(self):
+            return self.info["name"]
+
+        def kill(self):
+            pass
+
+        def terminate(self):
+            pass
+
+    processes = [
+        Process(4, "System", 0.5, 0.1),
+        Process(1200, "explorer.exe", 1.2, 2.5),
+        Process(2300, "chrome.exe", 8.0, 12.0),
+        Process(3400, "Code.exe", 3.5, 6.0),
+        Process(4500, "ollama.exe", 20.0, 30.0),
+    ]
+
+    gb = 1024 ** 3
+    VirtualMemory = namedtuple("svmem", "total available percent used free")
+    DiskUsage = namedtuple("sdiskusage", "total used free percent")
+    CpuFreq = namedtuple("scpufreq", "current min max")
+
+    module.Error = Error
+    module.NoSuchProcess = NoSuchProcess
+    module.AccessDenied = AccessDenied
+    module.Process = Process
+    module.process_iter = lambda attrs=None: iter(processes)
+    module.pids = lambda: [proc.pid for proc in processes]
+    module.cpu_percent = lambda interval=None, percpu=False: 12.5
+    module.cpu_count = lambda logical=True: 16 if logical else 8
+    module.cpu_freq = lambda: CpuFreq(3600.0, 800.0, 4800.0)
+    module.virtual_memory = lambda: VirtualMemory(32 * gb, 20 * gb, 37.5, 12 * gb, 20 * gb)
+    module.disk_usage = lambda path: DiskUsage(1000 * gb, 400 * gb, 600 * gb, 40.0)
+    return module
+
+
+def _make_winreg() -> types.ModuleType:
+    """Fake winreg: every key is missing, so callers take their fallbacks."""
+    module = types.ModuleType("winreg")
+    module.HKEY_LOCAL_MACHINE = 0x80000002
+    module.HKEY_CURRENT_USER = 0x80000001
+    module.KEY_READ = 0x20019
+
+    def missing(*args, **kwargs):
+        raise OSError("winreg não disponível (stub)")
+
+    module.OpenKey = missing
+    module.QueryValueEx = missing
+    module.QueryInfoKey = missing
+    module.EnumKey = missing
+    module.CloseKey = lambda key: None
+    return module
+
+
+def _make_pytesseract() -> types.ModuleType:
+    """Fake pytesseract: OCR always returns an empty string."""
+    module = types.ModuleType("pytesseract")
+    module.pytesseract = types.SimpleNamespace(tesseract_cmd=None)
+    module.image_to_string = lambda image, *args, **kwargs: ""
+    return module
+
+
+def install(psutil: bool = True) -> None:
+    """
+    Register the stub modules in sys.modules.
+
+    pyautogui is always replaced (it needs a display); winreg and pytesseract
+    only when they can't be imported.
+
+    Args:
+        psutil: Also replace psutil, for deterministic system figures
+    """
+    sys.modules["pyautogui"] = _make_pyautogui()
+    if psutil:
+        sys.modules["psutil"] = _make_psutil()
+    for name, factory in (("winreg", _make_winreg), ("pytesseract", _make_pytesseract)):
+        try:
+            __import__(name)
+        except ImportError:
+            sys.modules[name] = factory()
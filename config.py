@@ -3,6 +3,25 @@
 # Ollama settings
 OLLAMA_BASE_URL = "http://localhost:11434"
 OLLAMA_MODEL = "gemma3:12b"  # Switched from llama3.1:8b - better function calling
+OLLAMA_NUM_CTX = 8192  # Context window when ADAPTIVE_CONTEXT is off
+OLLAMA_VISION_MODEL = "moondream"  # Used by analyze_screen
+OLLAMA_KEEP_ALIVE = "30m"  # How long Ollama keeps a model loaded after a request (-1 = forever)
+# HTTP connection to Ollama (one pooled client per process, see core.ollama_client.clients)
+OLLAMA_CONNECT_TIMEOUT = 5.0  # Seconds to open a connection (Ollama is local - fail fast)
+OLLAMA_FIRST_BYTE_TIMEOUT = 120.0  # Seconds until the reply starts (model load + prompt eval; whole reply if not streamed)
+OLLAMA_READ_TIMEOUT = 30.0  # Max seconds between streamed chunks once the reply started
+OLLAMA_POOL_TIMEOUT = 10.0  # Seconds to wait for a free pooled connection
+OLLAMA_MAX_CONNECTIONS = 16  # Concurrent requests (sessions, vision, warm-up)
+OLLAMA_MAX_KEEPALIVE = 8  # Idle connections kept open for reuse
+OLLAMA_KEEPALIVE_EXPIRY = 60.0  # Seconds an idle connection stays open
+# Failed calls (connection refused/reset, 502/503/504) are retried with jittered
+# exponential backoff; consecutive failures open a circuit breaker that fails
+# requests immediately until a probe gets through.
+OLLAMA_RETRIES = 2  # Extra attempts per call (never after a reply started streaming)
+OLLAMA_BACKOFF_BASE = 0.25  # Seconds; retry n waits random(0, base * 2**n)
+OLLAMA_BACKOFF_MAX = 2.0  # Cap on a single backoff wait
+CIRCUIT_FAILURE_THRESHOLD = 3  # Consecutive failures that open the circuit
+CIRCUIT_RESET_TIMEOUT = 10.0  # Seconds the circuit stays open before a probe
 
 # Server settings
 HOST = "0.0.0.0"  # Allow access from any device on network
@@ -12,3 +31,155 @@ PORT = 8000
 AGENT_NAME = "JARVIS"
 AGENT_LANGUAGE = "pt-BR"
 MAX_TOOL_ITERATIONS = 15  # Max tool calls per request
+STREAM_RESPONSES = True  # Stream tokens to the web client as they are generated
+# "cache_friendly": stable system prompt + trailing context message (Ollama reuses the prompt KV cache)
+# "legacy": real-time context appended to the system prompt (full prompt re-evaluated every request)
+PROMPT_LAYOUT = "cache_friendly"
+# "native": tools go in Ollama's `tools` field and leaked JSON in the text is
+# repaired with regexes. "structured": the output is constrained to a JSON
+# schema built from the tools (Ollama's `format` field) and parsed incrementally.
+TOOL_CALL_MODE = "native"
+
+# Tool loading
+# Tool schemas are listed from tools/manifest.json (rebuild: python -m core.tool_manifest)
+# and each tool module is imported on the first call of one of its tools.
+TOOL_LAZY_LOADING = True  # False: import every tool module at startup
+
+# Tool execution
+# Sync tool handlers run in bounded thread pools, one per executor class.
+# "gui" must stay at 1 so mouse/keyboard actions never interleave.
+TOOL_EXECUTOR_WORKERS = {
+    "io": 8,
+    "cpu": 2,
+    "gui": 1,
+}
+PARALLEL_TOOL_CALLS = True  # Run independent (read-only) tool calls of one turn concurrently
+TOOL_CACHE = True  # Serve repeated calls of cached tools (@tool(cache=...)) from memory
+TOOL_CACHE_MAX_ENTRIES = 64  # Cached results kept per tool unless its policy says otherwise
+
+# Tool loop detection
+# Small models often repeat the same calls until MAX_TOOL_ITERATIONS runs out.
+# Within a request, exact repeats of read-only tools reuse the first result, and
+# iterations repeating the previous ones (A→A, A→B→A→B) get a corrective hint,
+# then the model is made to answer without tools.
+LOOP_DETECTION = True
+LOOP_MEMOIZE = True  # Serve exact repeats of read-only tool calls from the request's memo
+LOOP_MAX_PERIOD = 3  # Longest repeated block of iterations detected as a cycle
+LOOP_MAX_HINTS = 1  # Cycles hinted before the request is cut off from tools
+
+# Tool result budgets
+# Results bigger than their budget are summarized (list head/tail, cut strings)
+# and kept whole in a per-session store the model can page with fetch_more.
+RESULT_TOKEN_BUDGET = 1200  # Estimated tokens per tool result
+TURN_RESULT_TOKEN_BUDGET = 4000  # Estimated tokens of all tool results in one request
+RESULT_MIN_TOKENS = 200  # Floor per result once the request budget is spent
+RESULT_STORE_SIZE = 16  # Full results kept per session for fetch_more
+FETCH_MORE_CHARS = 3000  # Characters returned per fetch_more page
+
+# Tool selection
+# Only the tools most relevant to the request (BM25 over names/descriptions)
+# plus a small core set are sent to the model, instead of all ~50 schemas.
+TOOL_SELECTION = True
+TOOL_TOP_K = 8  # Ranked tools offered per request
+TOOL_CORE_SET = [  # Always offered
+    "open_and_type",
+    "web_search",
+    "calculate",
+    "screenshot",
+    "analyze_screen",
+    "remember_fact",
+    "recall_memory",
+]
+
+# Fast path
+# Simple requests (math, time/date, currency, crypto, weather) matched by
+# fixed patterns are answered directly from the tool result, without the LLM.
+FAST_PATH = True
+
+# Learned macros
+# Tool sequences that solved a request are kept in user_macros.json, with the
+# parts of the message that became tool arguments as slots. Once the same kind
+# of request succeeded MACRO_MIN_RUNS times with the same steps, matching
+# requests replay them without the LLM; a failed step hands over to the LLM.
+# Read-only tools and @tool(destructive=True) ones are never learned.
+MACROS = True
+MACRO_MIN_RUNS = 2  # Successful runs with the same steps before a macro is replayed
+MACRO_MAX = 100  # Macros kept (the least recently used are dropped)
+MACRO_MAX_VALUES = 20  # Values remembered per slot
+
+# Model routing
+# Each turn is classified (chat, simple_tool, multi_step) and starts on a rung
+# of the model ladder. A reply with no valid tool call when one was needed (or
+# a model error) is retried one rung up for the rest of the request. Rungs
+# Ollama doesn't list (not pulled) are skipped until they are pulled.
+MODEL_ROUTING = True
+MODEL_LADDER = ["gemma3:4b", OLLAMA_MODEL]  # Smallest first
+ROUTE_START_RUNG = {"chat": 0, "simple_tool": 0, "multi_step": 1}  # Ladder index per turn class
+ROUTER_CLASSIFIER = "heuristic"  # "heuristic" (keywords + tool ranking) or "model" (asks MODEL_LADDER[0])
+ROUTER_TOOL_SCORE = 5.0  # Tool-ranking score above which a turn needs a tool
+# Chat turns get a short conversational prompt and no tool schemas; the model
+# replies with a marker when it needs an action, and the step is redone with tools
+CHAT_ONLY_MODE = True
+
+# Sessions
+# Each WebSocket connection gets its own conversation (Agent)
+MAX_SESSIONS = 32  # Least recently used idle session is evicted beyond this
+SESSION_IDLE_TTL = 30 * 60  # Seconds without messages before a session is dropped
+
+# Request scheduling
+# Requests from all sessions share the Ollama backend through a queue:
+# interactive before background, round-robin between sessions, one running
+# request per session. A full queue rejects new requests with a retry-after.
+SCHEDULER_SLOTS = 2  # Requests processed at once (match OLLAMA_NUM_PARALLEL)
+SCHEDULER_BACKGROUND_SLOTS = 1  # Slots background requests may take (the rest stay free for interactive ones)
+SCHEDULER_MAX_QUEUE = 16  # Waiting requests beyond this are rejected
+SCHEDULER_AGING = 60  # Seconds after which a waiting background request counts as interactive
+SCHEDULER_DEFAULT_SERVICE_TIME = 5.0  # Seconds per request assumed for retry-after before any has finished
+
+# Conversation history
+HISTORY_TOKEN_BUDGET = 3000  # Estimated tokens of past turns resent to the model
+HISTORY_KEEP_RATIO = 0.5  # When over budget, fold old turns until this fraction remains
+SUMMARY_MODEL = OLLAMA_MODEL  # Model used for background summaries of old turns
+
+# Model warm-up
+# Models are loaded at startup and pinged during active hours so the first
+# message after idle doesn't pay Ollama's load time. Outside active hours
+# they unload after OLLAMA_KEEP_ALIVE as usual.
+WARMUP_ON_START = True
+WARMUP_MODELS = list(dict.fromkeys(MODEL_LADDER + [OLLAMA_MODEL, OLLAMA_VISION_MODEL]))
+KEEP_WARM_INTERVAL = 10 * 60  # Seconds between pings (keep below OLLAMA_KEEP_ALIVE)
+ACTIVE_HOURS = (8, 23)  # Local [start, end) hours to keep models resident; None = always
+
+# Context sizing
+# num_ctx is sized per request from the estimated prompt plus room for the
+# reply, rounded up to a bucket. Ollama reloads the model when num_ctx
+# changes, so a model only shrinks back to a smaller bucket after a while.
+ADAPTIVE_CONTEXT = True
+NUM_CTX_BUCKETS = [2048, 4096, 8192, 16384]
+NUM_CTX_MIN = 2048  # Smallest context ever requested
+NUM_CTX_MAX = 16384  # Largest context ever requested (longer prompts are truncated by Ollama)
+NUM_CTX_REPLY_RESERVE = 1024  # Reply room for requests without a num_predict cap
+NUM_CTX_SHRINK_AFTER = 5 * 60  # Seconds a larger bucket is kept after it was last needed
+# Bucket models are warmed with before their first request (warm-up and keep-warm
+# pings send the loaded num_ctx, or Ollama would reload on the next chat). A tool
+# prompt (system prompt, selected schemas, reply reserve) needs ~4.5k tokens.
+NUM_CTX_WARMUP = 8192
+NUM_CTX_WARMUP_PER_MODEL = {OLLAMA_VISION_MODEL: 2048}  # One image plus a question
+NUM_PREDICT = {  # Max reply tokens per request class (missing = no cap)
+    "chat": 768,
+    "simple_tool": 768,
+    "multi_step": 1024,
+    "summary": 400,
+    "vision": 300,
+    "classifier": 20,
+}
+
+# Tracing
+# Each request is traced as a span tree (iterations, LLM calls, tool calls);
+# aggregated histograms are served at /metrics, recent traces at /traces.
+TRACE_HISTORY = 20  # Finished request traces kept in memory
+TRACE_TO_CLIENT = True  # Send each request's trace to the web UI as a "trace" frame
+
+# System monitor
+SYSTEM_SAMPLE_INTERVAL = 5.0  # Seconds between background CPU/RAM/process samples
+SYSTEM_SNAPSHOT_MAX_AGE = 30.0  # Resample on demand if the snapshot is older (sampler not running)
@@ -3,16 +3,31 @@ JARVIS Agent - Main orchestration logic
 Handles conversation flow, tool execution, and response generation
 """
 
+import asyncio
 import json
-from typing import Optional
+from contextlib import aclosing
+from typing import Optional, AsyncGenerator
 from core.ollama_client import OllamaClient
-from core.tools import registry
+from core.history import ConversationHistory, estimate_tokens
+from core.system_monitor import sampler
+from core.warmup import warmer
+from core.tools import registry, succeeded
+from core.tool_selector import selector
+from core.fast_path import fast_path
+from core.router import router, CHAT, SIMPLE_TOOL
+from core.context_size import sizer
+from core.cancellation import CancelScope, current_scope
+from core.results import ResultStore, current_store, current_page_budget
+from core.loop_guard import LoopGuard, HINT, STOP, LOOP_HINT, LOOP_STOP
+from core.macros import MacroPlan, macros, fallback_note
+from core import cancellation, loop_guard, structured, tool_manifest, tracing
 import config
 
-from tools import mouse_keyboard, screen, processes, filesystem, commands, web, calculator, apps, apis, vision, documents, coding, memory
+# Tool schemas come from the prebuilt manifest; handler modules are imported on first use
+tool_manifest.load()
 
 
-SYSTEM_PROMPT = f"""Você é o {config.AGENT_NAME}, um assistente de IA inteligente, amigável e capaz.
+PERSONA_PROMPT = f"""Você é o {config.AGENT_NAME}, um assistente de IA inteligente, amigável e capaz.
 
 ## SEUS OBJETIVOS
 1. **Companheiro**: Conversar sobre qualquer assunto (vida, tecnologia, universo), contar piadas ou apenas bater papo.
@@ -26,7 +41,9 @@ SYSTEM_PROMPT = f"""Você é o {config.AGENT_NAME}, um assistente de IA intelige
 - **EXPRESSIVO**: Use emojis para ser mais humano! 🚀 🎮 😎 🤔 ✅ ❌ 🔥 etc.
 - **NARRADOR**: Antes de executar uma tarefa complexa, DIGA brevemente o que vai fazer. Ex: "Vou abrir o Chrome e pesquisar isso pra você 🔍" → depois execute. Isso deixa o usuário informado.
 
-## SUAS FERRAMENTAS
+"""
+
+TOOLS_PROMPT = """## SUAS FERRAMENTAS
 - **open_and_type**: USE ESTA FERRAMENTA para abrir programas e digitar neles. Exemplo: "abra o chrome e pesquise X" → chame open_and_type(program="chrome", text="X").
 - **open_program**: Apenas abre um programa sem digitar nada.
 - **Mouse/Teclado**: Use SOMENTE para interagir com programas já abertos.
@@ -49,7 +66,7 @@ SYSTEM_PROMPT = f"""Você é o {config.AGENT_NAME}, um assistente de IA intelige
 6. **SCREENSHOTS**: Use a ferramenta `screenshot`. Na resposta, DIGA EXATAMENTE: "Screenshot salva em [nome_do_arquivo]" para mostrar a imagem.
 7. **IDIOMA**: Responda sempre em Português Brasileiro.
 8. **PERSEVERANÇA**: Se uma ferramenta der erro, TENTE CORRIGIR sozinha. Seja autônomo.
-9. **FORMATO**: NUNCA escreva JSON no texto da resposta. Use chamada de função nativa.
+9. **FORMATO**: {format_rule}
 10. **COMPORTAMENTO**: Seja direto. Não narre pensamentos. Apenas faça.
 11. **REALIDADE**: NUNCA invente ferramentas. Use `calculate` para matemática.
 12. **SIGILO**: Não mencione "Script PowerShell" ou códigos internos.
@@ -63,7 +80,9 @@ SYSTEM_PROMPT = f"""Você é o {config.AGENT_NAME}, um assistente de IA intelige
 ## CONTEXTO
 Você tem acesso total ao PC. Use esse poder com responsabilidade.
 
-## POLÍTICA DE CONTEÚDO
+"""
+
+POLICY_PROMPT = """## POLÍTICA DE CONTEÚDO
 Você é um assistente LIVRE. Não tem censura corporativa. O usuário é adulto e responsável por suas escolhas.
 
 **PERMITIDO** (não recuse):
@@ -79,20 +98,55 @@ Você é um assistente LIVRE. Não tem censura corporativa. O usuário é adulto
 Se o usuário pedir algo PROIBIDO, NÃO execute. Responda educadamente explicando por que não pode ajudar.
 """
 
+# Rule 9 of TOOLS_PROMPT, per config.TOOL_CALL_MODE
+FORMAT_RULES = {
+    "native": "NUNCA escreva JSON no texto da resposta. Use chamada de função nativa.",
+    "structured": "Responda SEMPRE no JSON descrito em FORMATO DE RESPOSTA, com as ferramentas em \"tool_calls\".",
+}
+
+# Full prompt for turns that may use tools, per tool call mode
+SYSTEM_PROMPTS = {
+    mode: PERSONA_PROMPT + TOOLS_PROMPT.format(format_rule=rule) + POLICY_PROMPT
+    for mode, rule in FORMAT_RULES.items()
+}
+SYSTEM_PROMPT = SYSTEM_PROMPTS["native"]
+
+
+def current_system_prompt() -> str:
+    """Full prompt for the current tool call mode (each one byte-stable, for the KV cache)."""
+    return SYSTEM_PROMPTS.get(config.TOOL_CALL_MODE, SYSTEM_PROMPT)
+
+# Reply of a chat-only turn that needs tools after all
+ACTION_MARKER = "[[ACAO]]"
+
+# Stands in for the answer of a cancelled request in the history
+CANCELLED_REPLY = "(Pedido cancelado pelo usuário antes de terminar.)"
+
+# Lightweight prompt for pure conversation (sent without tool schemas)
+CHAT_PROMPT = PERSONA_PROMPT + f"""## MODO CONVERSA
+Nesta conversa você NÃO tem ferramentas. Responda direto, em Português Brasileiro.
+Se o pedido exigir uma ação no PC ou dados atuais (clima, cotações, notícias, arquivos, tela), responda APENAS com {ACTION_MARKER} e nada mais.
+
+""" + POLICY_PROMPT
+
 
 class Agent:
     """Main JARVIS agent that orchestrates conversations and tool execution."""
     
-    def __init__(self):
-        self.ollama = OllamaClient()
-        self.conversation_history: list[dict] = []
+    def __init__(self, ollama: Optional[OllamaClient] = None):
+        # Sessions share one client; a standalone Agent owns its own
+        self._owns_client = ollama is None
+        self.ollama = ollama or OllamaClient()
+        self.history = ConversationHistory(self.ollama)
+        # Full tool results too big for the prompt, paged by fetch_more
+        self.results = ResultStore()
         self.max_iterations = config.MAX_TOOL_ITERATIONS
+        # Class of the previous turn, inherited by short follow-ups
+        self._last_class: Optional[str] = None
     
     def _get_dynamic_context(self) -> str:
         """Get dynamic context with real-time system information."""
-        import psutil
         from datetime import datetime
-        import os
         
         try:
             # Get current time
@@ -100,31 +154,18 @@ class Agent:
             time_str = now.strftime("%H:%M:%S")
             date_str = now.strftime("%d/%m/%Y (%A)")
             
-            # Get system info
-            cpu_percent = psutil.cpu_percent(interval=0.1)
-            memory = psutil.virtual_memory()
-            
-            # Get current directory
-            current_dir = os.getcwd()
-            
-            # Get active processes (top 5 by memory)
-            top_processes = []
-            for proc in sorted(psutil.process_iter(['name', 'memory_percent']), 
-                              key=lambda x: x.info.get('memory_percent', 0) or 0, 
-                              reverse=True)[:5]:
-                try:
-                    top_processes.append(proc.info['name'])
-                except:
-                    pass
+            # System info comes from the background sampler (no blocking psutil scan)
+            snapshot = sampler.snapshot()
             
             context = f"""
 ## 📊 CONTEXTO ATUAL (Atualizado em tempo real)
 - **Data**: {date_str}
 - **Hora**: {time_str}
-- **CPU**: {cpu_percent}% em uso
-- **RAM**: {memory.percent}% em uso ({round(memory.used/1024**3, 1)}GB / {round(memory.total/1024**3, 1)}GB)
-- **Diretório atual**: {current_dir}
-- **Processos ativos principais**: {', '.join(top_processes[:5])}
+- **CPU**: {snapshot.cpu_percent}% em uso
+- **RAM**: {snapshot.memory_percent}% em uso ({round(snapshot.memory_used/1024**3, 1)}GB / {round(snapshot.memory_total/1024**3, 1)}GB)
+- **Diretório atual**: {snapshot.cwd}
+- **Processos ativos principais**: {', '.join(snapshot.top_processes(5))}
+- **Amostra do sistema**: há {round(snapshot.age)}s
 
 Use essas informações para contextualizar suas respostas quando relevante.
 """
@@ -132,129 +173,568 @@ Use essas informações para contextualizar suas respostas quando relevante.
         except:
             return ""
     
-    def _get_messages(self, user_message: str) -> list[dict]:
-        """Build the messages list with system prompt, dynamic context, and history."""
-        # Combine system prompt with dynamic context
-        full_system = SYSTEM_PROMPT + self._get_dynamic_context()
-        
-        messages = [{"role": "system", "content": full_system}]
-        messages.extend(self.conversation_history)
-        messages.append({"role": "user", "content": user_message})
+    def _get_messages(self, system_prompt: Optional[str] = None) -> list[dict]:
+        """
+        Build the messages list with system prompt, dynamic context, and history.
+        
+        In the "cache_friendly" layout (default) the system prompt is byte-stable
+        and the volatile context (time, CPU, processes) goes in a short message
+        right before the user's request. Ollama can then reuse its KV cache for
+        the whole prefix (system prompt, tool schemas, history) on every turn.
+        The "legacy" layout appends the context to the system prompt instead.
+        """
+        # History already ends with the current user message
+        history = self.history.for_prompt()
+        system_prompt = system_prompt or current_system_prompt()
+        
+        if config.PROMPT_LAYOUT == "legacy":
+            # Combine system prompt with dynamic context
+            full_system = system_prompt + self._get_dynamic_context()
+            return [{"role": "system", "content": full_system}] + history
+        
+        messages = [{"role": "system", "content": system_prompt}]
+        messages.extend(history[:-1])
+        context = self._get_dynamic_context()
+        if context:
+            messages.append({"role": "system", "content": context.strip()})
+        messages.extend(history[-1:])
         return messages
     
-    async def process_message(self, user_message: str) -> str:
+    async def _chat(
+        self,
+        messages: list[dict],
+        tools: Optional[list[dict]],
+        reply: dict,
+        model: Optional[str] = None,
+        request_class: Optional[str] = None
+    ) -> AsyncGenerator[dict, None]:
         """
-        Process a user message and return the agent's response.
+        Run one LLM call, yielding content deltas as they arrive.
+        
+        The assembled response (same shape as OllamaClient.chat) is stored
+        in `reply`, since async generators cannot return values.
+        """
+        if config.TOOL_CALL_MODE == "structured":
+            async with aclosing(self._chat_structured(messages, tools or [], reply, model, request_class)) as events:
+                async for event in events:
+                    yield event
+            return
+        
+        if not config.STREAM_RESPONSES:
+            reply.update(await self.ollama.chat(messages, tools=tools, model=model, request_class=request_class))
+            return
+        
+        content = ""
+        tool_calls = []
+        async with aclosing(self.ollama.chat_stream(messages, tools=tools, model=model, request_class=request_class)) as chunks:
+            async for chunk in chunks:
+                if "error" in chunk:
+                    reply.update(chunk)
+                    return
+                
+                message = chunk.get("message", {})
+                delta = message.get("content", "")
+                if delta:
+                    content += delta
+                    yield {"type": "token", "content": delta}
+                tool_calls.extend(message.get("tool_calls") or [])
+                
+                if chunk.get("done"):
+                    # Keep Ollama's final stats (eval_count, durations...)
+                    reply.update({k: v for k, v in chunk.items() if k != "message"})
+        
+        message = {"role": "assistant", "content": content}
+        if tool_calls:
+            message["tool_calls"] = tool_calls
+        reply["message"] = message
+    
+    async def _chat_only(
+        self,
+        messages: list[dict],
+        reply: dict,
+        model: Optional[str] = None
+    ) -> AsyncGenerator[dict, None]:
+        """
+        Run one chat-only LLM call (no tools), holding back the stream while
+        it could still be ACTION_MARKER so the marker never reaches the user.
+        """
+        held = ""
+        passing = False
+        async with aclosing(self._chat(messages, None, reply, model, CHAT)) as events:
+            async for event in events:
+                if passing:
+                    yield event
+                    continue
+                held += event["content"]
+                if not ACTION_MARKER.startswith(held.lstrip()):
+                    passing = True
+                    yield {"type": "token", "content": held}
+        if held and not passing and ACTION_MARKER not in held:
+            yield {"type": "token", "content": held}
+    
+    async def _chat_structured(
+        self,
+        messages: list[dict],
+        tools: list[dict],
+        reply: dict,
+        model: Optional[str] = None,
+        request_class: Optional[str] = None
+    ) -> AsyncGenerator[dict, None]:
+        """
+        Run one LLM call constrained to the structured reply schema.
+        
+        The "reply" field is streamed as it is decoded and the tool calls
+        come from the parsed document, so `reply` ends up in the same shape
+        as a native call. The raw JSON is kept in reply["raw"] to be echoed
+        back to the model as its own turn.
+        
+        The instructions list the selected tools, so they go after the
+        history, next to the per-turn context (right before the current
+        request): the system prompt and history stay a cacheable prefix.
+        """
+        instructions = {"role": "system", "content": structured.build_instructions(tools)}
+        last_user = max((i for i, m in enumerate(messages) if m["role"] == "user"), default=len(messages))
+        messages = messages[:last_user] + [instructions] + messages[last_user:]
+        schema = structured.build_schema(tools)
+        parser = structured.StructuredReplyParser()
+        
+        if not config.STREAM_RESPONSES:
+            response = await self.ollama.chat(messages, format=schema, model=model, request_class=request_class)
+            if "error" in response:
+                reply.update(response)
+                return
+            parser.feed(response.get("message", {}).get("content", ""))
+            reply.update({k: v for k, v in response.items() if k != "message"})
+        else:
+            async with aclosing(self.ollama.chat_stream(messages, format=schema, model=model, request_class=request_class)) as chunks:
+                async for chunk in chunks:
+                    if "error" in chunk:
+                        reply.update(chunk)
+                        return
+                    delta = parser.feed(chunk.get("message", {}).get("content", ""))
+                    if delta:
+                        yield {"type": "token", "content": delta}
+                    if chunk.get("done"):
+                        reply.update({k: v for k, v in chunk.items() if k != "message"})
+        
+        content, tool_calls, _ = parser.finish()
+        message = {"role": "assistant", "content": content}
+        if tool_calls:
+            message["tool_calls"] = tool_calls
+        reply["message"] = message
+        reply["raw"] = parser.text
+    
+    @staticmethod
+    def _parse_tool_call(tool_call: dict) -> tuple[str, dict]:
+        """Extract (name, arguments) from an Ollama tool call."""
+        function = tool_call.get("function", {})
+        tool_name = function.get("name", "")
+        tool_args = function.get("arguments", {})
+        
+        # Parse arguments if string
+        if isinstance(tool_args, str):
+            try:
+                tool_args = json.loads(tool_args)
+            except json.JSONDecodeError:
+                tool_args = {}
+        
+        return tool_name, tool_args
+    
+    @staticmethod
+    def _plan_batches(calls: list[tuple[str, dict]]) -> list[list[tuple[str, dict]]]:
+        """
+        Group tool calls into batches that can run together.
+        
+        Consecutive calls to independent (read-only) tools share a batch;
+        any other call runs alone, so side effects keep the model's order.
+        """
+        batches = []
+        for call in calls:
+            tool = registry.get(call[0])
+            independent = config.PARALLEL_TOOL_CALLS and tool is not None and tool.independent
+            if independent and batches and batches[-1][0] is True:
+                batches[-1][1].append(call)
+            else:
+                batches.append((independent, [call]))
+        return [batch for _, batch in batches]
+    
+    async def _execute_tool(self, tool_name: str, tool_args: dict, content: str, budget: Optional[int] = None):
+        """
+        Run one tool call, applying the agent-level safety checks first.
+        
+        `budget` is the tokens its result may take in the prompt (see
+        _result_budget), so fetch_more can size its page to it.
+        """
+        # SAFETY CHECK: Prevent double-typing (chat + keyboard)
+        if tool_name in ["type_into_application", "type_text"]:
+            text_to_type = tool_args.get("text", "").strip()
+            chat_content = str(content).replace("\n", " ").strip()
+            
+            # If typing content matches chat content significantly ( > 50 chars to avoid blocking short words/phrases)
+            # AND the chat content is NOT significantly longer than the text to type (which would imply it's just quoting)
+            if len(text_to_type) > 50 and (text_to_type in chat_content or chat_content in text_to_type):
+                # If chat content is less than 1.2x the typing content, it's likely a duplicate response
+                if len(chat_content) < 1.2 * len(text_to_type):
+                    return {
+                        "success": False,
+                        "error": "SEGURANÇA: Bloqueada tentativa de digitar a resposta do chat. Use o teclado APENAS para interagir com programas."
+                    }
+        
+        # fetch_more reads from this agent's result store
+        token = current_store.set(self.results)
+        budget_token = current_page_budget.set(budget)
+        try:
+            return await registry.execute(tool_name, tool_args)
+        finally:
+            current_page_budget.reset(budget_token)
+            current_store.reset(token)
+    
+    async def _execute_guarded(self, guard: LoopGuard, tool_name: str, tool_args: dict, content: str, budget: int):
+        """Run one tool call, or reuse the result of an identical read-only call of this request."""
+        memo = guard.lookup(tool_name, tool_args)
+        if memo is not None:
+            with tracing.span(tool_name, "tool", cached=True, memoized=True):
+                return memo
+        result = await self._execute_tool(tool_name, tool_args, content, budget)
+        guard.record(tool_name, tool_args, result)
+        return result
+    
+    @staticmethod
+    def _result_budget(tool_name: str, turn_budget: int) -> int:
+        """
+        Token budget of a tool result: the tool's own (or
+        config.RESULT_TOKEN_BUDGET), capped by what is left of the request's
+        budget but never below config.RESULT_MIN_TOKENS.
+        """
+        tool = registry.get(tool_name)
+        budget = (tool.result_budget if tool and tool.result_budget else None) or config.RESULT_TOKEN_BUDGET
+        return max(min(budget, turn_budget), config.RESULT_MIN_TOKENS)
+    
+    def _shape_result(self, tool_name: str, result, turn_budget: int) -> tuple[str, Optional[str]]:
+        """Serialize a tool result within its token budget (see _result_budget)."""
+        if tool_name == "fetch_more":
+            # Pages are already sized to the budget; cutting one again would
+            # leave a gap before its next_offset
+            return json.dumps(result, ensure_ascii=False, default=str), None
+        return self.results.shape(result, self._result_budget(tool_name, turn_budget))
+    
+    async def _fast_path(self, user_message: str) -> AsyncGenerator[dict, None]:
+        """
+        Try to answer the message with the fast-path router.
+        
+        Yields the tool events of the direct call, then a "response" event
+        with the templated answer. No "response" means the router did not
+        match or the tool failed, and the LLM should handle the message.
+        """
+        plan = fast_path.route(user_message)
+        if plan is None:
+            return
+        
+        result = None
+        if plan.tool_name:
+            yield {"type": "tool_call", "tool_name": plan.tool_name, "tool_args": plan.tool_args}
+            result = await registry.execute(plan.tool_name, plan.tool_args)
+            yield {"type": "tool_result", "tool_name": plan.tool_name, "success": succeeded(result)}
+        
+        try:
+            answer = plan.render(result)
+        except (KeyError, TypeError, ValueError):
+            answer = None
+        if answer:
+            yield {"type": "response", "content": answer}
+    
+    async def _replay_macro(self, plan: MacroPlan, done: list) -> AsyncGenerator[dict, None]:
+        """
+        Run the steps of a learned macro in order.
+        
+        Yields the tool events, then a "response" event with the learned
+        answer. No "response" means a step failed (or the answer could not
+        be rendered); the calls made so far are left in `done` as
+        (tool name, arguments, result) so the LLM can take over from there.
+        """
+        for tool_name, tool_args in plan.steps:
+            yield {"type": "tool_call", "tool_name": tool_name, "tool_args": tool_args}
+            result = await self._execute_tool(tool_name, tool_args, "")
+            done.append((tool_name, tool_args, result))
+            yield {"type": "tool_result", "tool_name": tool_name, "success": succeeded(result)}
+            if not succeeded(result):
+                macros.failed(plan)
+                return
+        
+        answer = macros.replayed(plan, [result for _, _, result in done])
+        if answer:
+            yield {"type": "response", "content": answer}
+    
+    async def process_message(self, user_message: str) -> AsyncGenerator[dict, None]:
+        """
+        Process a user message, streaming events as they happen.
         Handles multi-turn tool calling automatically.
         
         Args:
             user_message: The user's input message
             
-        Returns:
-            The agent's final response text
+        Yields:
+            Event dicts, sent as-is to the WebSocket client:
+            - {"type": "token", "content": str} for each content delta
+            - {"type": "tool_call", "tool_name": str, "tool_args": dict}
+            - {"type": "tool_result", "tool_name": str, "success": bool}
+            - {"type": "retract"} when the text streamed since the last tool
+              call is dropped (the step is retried on a larger model)
+            - {"type": "trace", "content": dict} with the request's span tree
+              (if config.TRACE_TO_CLIENT), right before the response
+            - {"type": "response", "content": str} with the final answer
+        
+        Cancelling the task that iterates it (or closing the generator)
+        stops the request: the Ollama stream is closed, child processes
+        started by its tools are killed and no further step runs.
         """
+        scope = CancelScope()
+        token = current_scope.set(scope)
+        try:
+            with tracing.span("process_message", "request", chars=len(user_message)) as request_span:
+                try:
+                    async with aclosing(self._process_message(user_message)) as events:
+                        async for event in events:
+                            if event["type"] == "response":
+                                llm_spans = list(request_span.descendants("llm"))
+                                request_span.set(
+                                    llm_calls=len(llm_spans),
+                                    # Ollama model load time (ns) - non-zero means a cold start
+                                    load_duration=sum(s.attrs.get("load_duration", 0) for s in llm_spans)
+                                )
+                                request_span.end()
+                                trace = request_span.to_dict()
+                                tracing.recent_traces.append(trace)
+                                if config.TRACE_TO_CLIENT:
+                                    yield {"type": "trace", "content": trace}
+                            yield event
+                except (asyncio.CancelledError, GeneratorExit):
+                    request_span.set(cancelled=True, processes_killed=scope.cancel())
+                    # Close the unanswered turn so the history keeps alternating
+                    if self.history.messages and self.history.messages[-1]["role"] == "user":
+                        self.history.append({"role": "assistant", "content": CANCELLED_REPLY})
+                    raise
+        finally:
+            try:
+                current_scope.reset(token)
+            except ValueError:
+                # Generator finalized from another context - nothing to restore
+                pass
+    
+    async def _process_message(self, user_message: str) -> AsyncGenerator[dict, None]:
+        """Untraced body of process_message."""
         # Add user message to history
-        self.conversation_history.append({
+        self.history.append({
             "role": "user",
             "content": user_message
         })
         
-        messages = self._get_messages(user_message)
-        tools = registry.get_ollama_format()
+        # Fast path: answer simple, unambiguous requests without the LLM
+        if config.FAST_PATH:
+            answer = None
+            with tracing.span("fast_path", "fast_path") as fast_span:
+                async with aclosing(self._fast_path(user_message)) as events:
+                    async for event in events:
+                        if event["type"] == "response":
+                            answer = event["content"]
+                        else:
+                            yield event
+                fast_span.set(answered=bool(answer))
+            if answer:
+                self.history.append({"role": "assistant", "content": answer})
+                self._last_class = SIMPLE_TOOL
+                yield {"type": "response", "content": answer}
+                return
+        
+        # Learned macros: replay the tool sequence that solved this kind of
+        # request before, handing over to the LLM if a step fails
+        replayed: list[tuple] = []
+        plan = macros.match(user_message) if config.MACROS else None
+        if plan:
+            answer = None
+            with tracing.span("macro", "macro", steps=len(plan.steps)) as macro_span:
+                async with aclosing(self._replay_macro(plan, replayed)) as events:
+                    async for event in events:
+                        if event["type"] == "response":
+                            answer = event["content"]
+                        else:
+                            yield event
+                macro_span.set(answered=bool(answer), steps_run=len(replayed))
+            if answer:
+                self.history.append({"role": "assistant", "content": answer})
+                self._last_class = SIMPLE_TOOL
+                yield {"type": "response", "content": answer}
+                return
+        
+        # Tool retrieval: rank tools against the request (and the previous
+        # user turn, for follow-ups like "e em Curitiba?")
+        selection_query = " ".join(m["content"] for m in self.history.messages[-3:] if m["role"] == "user")
+        used_tools: list[str] = []
+        offer_all_tools = not config.TOOL_SELECTION
+        turn_budget = config.TURN_RESULT_TOKEN_BUDGET
+        
+        # Model routing: small models for conversation and simple actions,
+        # climbing the ladder when a reply falls short
+        turn_class = await router.classify(user_message, self._last_class, self.ollama)
+        self._last_class = turn_class
+        rung = router.start_rung(turn_class)
+        tools_ran = bool(replayed)
+        
+        # Loop detection: repeated read-only calls reuse their result, and a
+        # request cycling through the same calls is hinted, then cut off from tools
+        guard = LoopGuard()
+        tools_cut = False
+        max_iterations = self.max_iterations
+        
+        # Chat-only mode: conversation gets a short prompt and no tool schemas;
+        # the model answers ACTION_MARKER to switch to the full prompt
+        chat_only = config.CHAT_ONLY_MODE and turn_class == CHAT and not replayed
+        router.chat_only_turn(chat_only)
+        messages = self._get_messages(CHAT_PROMPT if chat_only else None)
+        if replayed:
+            messages.append({"role": "system", "content": fallback_note(replayed)})
+        
+        # Calls of this request, learned as a macro if it ends well
+        executed: list[tuple] = []
         
         final_response = ""
         iterations = 0
         
-        while iterations < self.max_iterations:
+        while iterations < max_iterations:
             iterations += 1
-            
-            # Get response from Ollama
-            response = await self.ollama.chat(messages, tools=tools if tools else None)
-            
-            if "error" in response:
-                final_response = response["message"]["content"]
-                break
-            
-            message = response.get("message", {})
-            content = message.get("content", "")
-            tool_calls = message.get("tool_calls", [])
-            
-            # SELF-HEALING: Check for leaked JSON tool calls in content
-            if not tool_calls and "{" in content and "name" in content:
-                try:
-                    import re
-                    # Look for {"name": "...", "parameters": {...}} pattern
-                    json_match = re.search(r'(\{[\s\r\n]*"name"[\s\r\n]*:[\s\r\n]*".*?"[\s\r\n]*,[\s\r\n]*"parameters"[\s\r\n]*:[\s\r\n]*\{.*?\}.*?\})', content, re.DOTALL)
-                    if json_match:
-                        potential_json = json_match.group(1)
-                        try:
-                            tool_data = json.loads(potential_json)
-                            if "name" in tool_data and "parameters" in tool_data:
-                                tool_calls = [{
-                                    "function": {
-                                        "name": tool_data["name"],
-                                        "arguments": tool_data["parameters"]
-                                    }
-                                }]
-                                # Optional: Clear content if it looks like JUST the JSON
-                                if len(content.strip()) < len(potential_json) + 20:
-                                    content = "" 
-                        except json.JSONDecodeError:
-                            pass
-                except Exception as e:
-                    print(f"Self-healing failed: {e}")
-            
-            # If no tool calls, we have the final response
-            if not tool_calls:
-                final_response = content
-                break
-            
-            # Add assistant message with tool calls to messages
-            messages.append(message)
-            
-            # Execute each tool call
-            for tool_call in tool_calls:
-                function = tool_call.get("function", {})
-                tool_name = function.get("name", "")
-                tool_args = function.get("arguments", {})
+            with tracing.span(f"iteration {iterations}", "iteration") as iteration_span:
+                if chat_only or tools_cut:
+                    tools = []
+                elif offer_all_tools:
+                    tools = registry.get_ollama_format()
+                else:
+                    tools = registry.get_ollama_format(selector.select(selection_query, used_tools))
+                
+                # Get response from Ollama
+                response = {}
+                model = router.model(rung)
+                with tracing.span("llm", "llm", model=model, turn_class=turn_class, tools=len(tools or [])) as llm_span:
+                    if chat_only:
+                        chat = self._chat_only(messages, response, model)
+                    else:
+                        chat = self._chat(messages, tools if tools else None, response, model, turn_class)
+                    streamed = False
+                    async with aclosing(chat) as events:
+                        async for event in events:
+                            streamed = streamed or event["type"] == "token"
+                            yield event
+                    llm_span.set(**tracing.llm_stats(response))
+                router.record(model, llm_span.duration)
+                
+                # The conversational model asked for tools: redo the step with the full prompt
+                if chat_only and ACTION_MARKER in response.get("message", {}).get("content", ""):
+                    router.chat_only_switched()
+                    llm_span.set(action_marker=True)
+                    chat_only = False
+                    turn_class = self._last_class = SIMPLE_TOOL
+                    rung = max(rung, router.start_rung(SIMPLE_TOOL))
+                    messages = self._get_messages()
+                    if streamed:
+                        yield {"type": "retract"}
+                    continue
+                
+                if "error" in response and not router.should_escalate(rung, turn_class, response, [], tools_ran):
+                    final_response = response["message"]["content"]
+                    break
+                
+                message = response.get("message", {})
+                content = message.get("content", "")
+                tool_calls = message.get("tool_calls", [])
                 
-                # Parse arguments if string
-                if isinstance(tool_args, str):
+                # SELF-HEALING: Check for leaked JSON tool calls in content
+                # (native mode only - structured replies are already parsed)
+                if config.TOOL_CALL_MODE != "structured" and not tool_calls and "{" in content and "name" in content:
                     try:
-                        tool_args = json.loads(tool_args)
-                    except json.JSONDecodeError:
-                        tool_args = {}
+                        import re
+                        # Look for {"name": "...", "parameters": {...}} pattern
+                        json_match = re.search(r'(\{[\s\r\n]*"name"[\s\r\n]*:[\s\r\n]*".*?"[\s\r\n]*,[\s\r\n]*"parameters"[\s\r\n]*:[\s\r\n]*\{.*?\}.*?\})', content, re.DOTALL)
+                        if json_match:
+                            potential_json = json_match.group(1)
+                            try:
+                                tool_data = json.loads(potential_json)
+                                if "name" in tool_data and "parameters" in tool_data:
+                                    tool_calls = [{
+                                        "function": {
+                                            "name": tool_data["name"],
+                                            "arguments": tool_data["parameters"]
+                                        }
+                                    }]
+                                    structured.parse_stats["regex_recovered"] += 1
+                                    # Optional: Clear content if it looks like JUST the JSON
+                                    if len(content.strip()) < len(potential_json) + 20:
+                                        content = "" 
+                            except json.JSONDecodeError:
+                                pass
+                    except Exception as e:
+                        print(f"Self-healing failed: {e}")
+                
+                # Escalation: retry this step one rung up, dropping the streamed text
+                calls = [self._parse_tool_call(tool_call) for tool_call in tool_calls]
+                if router.should_escalate(rung, turn_class, response, calls, tools_ran):
+                    router.escalated(model)
+                    llm_span.set(escalated=True)
+                    rung += 1
+                    yield {"type": "retract"}
+                    continue
+                
+                # If no tool calls, we have the final response (calls made
+                # after the loop was cut off are not run)
+                if not tool_calls or tools_cut:
+                    final_response = content
+                    break
+                
+                # Add assistant message with tool calls to messages (structured
+                # replies are echoed as the JSON the model actually wrote)
+                messages.append({"role": "assistant", "content": response["raw"]} if "raw" in response else message)
                 
-                # Execute the tool
-                # SAFETY CHECK: Prevent double-typing (chat + keyboard)
-                if tool_name in ["type_into_application", "type_text"]:
-                    text_to_type = tool_args.get("text", "").strip()
-                    chat_content = str(content).replace("\n", " ").strip()
+                # Execute the tool calls, independent ones concurrently
+                tools_ran = True
+                
+                # Selection fallback: tools the model reached for stay offered, and
+                # an unknown tool name means the selection missed - offer everything
+                for tool_name, _ in calls:
+                    if registry.get(tool_name) is None:
+                        offer_all_tools = True
+                    elif tool_name not in used_tools:
+                        used_tools.append(tool_name)
+                for batch in self._plan_batches(calls):
+                    for tool_name, tool_args in batch:
+                        yield {"type": "tool_call", "tool_name": tool_name, "tool_args": tool_args}
                     
-                    # If typing content matches chat content significantly ( > 50 chars to avoid blocking short words/phrases)
-                    # AND the chat content is NOT significantly longer than the text to type (which would imply it's just quoting)
-                    if len(text_to_type) > 50 and (text_to_type in chat_content or chat_content in text_to_type):
-                        # If chat content is less than 1.2x the typing content, it's likely a duplicate response
-                        if len(chat_content) < 1.2 * len(text_to_type):
-                            result = {
-                                "success": False,
-                                "error": "SEGURANÇA: Bloqueada tentativa de digitar a resposta do chat. Use o teclado APENAS para interagir com programas."
-                            }
-                            # Register error and skip execution
-                            messages.append({
-                                "role": "tool",
-                                "content": json.dumps(result),
-                                "name": tool_name
-                            })
-                            continue
-
-                result = await registry.execute(tool_name, tool_args)
+                    results = await asyncio.gather(*(
+                        self._execute_guarded(guard, tool_name, tool_args, content,
+                                              self._result_budget(tool_name, turn_budget))
+                        for tool_name, tool_args in batch
+                    ))
+                    
+                    # Results are appended in call order so the transcript is deterministic
+                    for (tool_name, tool_args), result in zip(batch, results):
+                        executed.append((tool_name, tool_args, result))
+                        content_json, handle = self._shape_result(tool_name, result, turn_budget)
+                        turn_budget -= estimate_tokens(content_json)
+                        if handle and "fetch_more" not in used_tools:
+                            used_tools.append("fetch_more")
+                        messages.append({
+                            "role": "tool",
+                            "content": content_json
+                        })
+                        yield {"type": "tool_result", "tool_name": tool_name, "success": succeeded(result)}
                 
-                # Add tool result to messages
-                messages.append({
-                    "role": "tool",
-                    "content": json.dumps(result, ensure_ascii=False, default=str)
-                })
+                # Loop detection: same calls with the same results as before
+                verdict = guard.observe()
+                if verdict:
+                    iteration_span.set(loop=verdict, memo_hits=guard.memo_hits)
+                    messages.append({"role": "system", "content": LOOP_HINT if verdict == HINT else LOOP_STOP})
+                if verdict == STOP:
+                    # One more call, without tools, to answer with what is already known
+                    tools_cut = True
+                    guard.stopped(max_iterations - iterations - 1)
+                    max_iterations = max(max_iterations, iterations + 1)
         
         # Add final response to history
         # POST-PROCESSING: Clean leaked JSON from response
@@ -274,37 +754,63 @@ Use essas informações para contextualizar suas respostas quando relevante.
                     else:
                         final_response = "Houve um problema ao executar a tarefa. Por favor, tente novamente."
         
-        self.conversation_history.append({
+        self.history.append({
             "role": "assistant",
             "content": final_response
         })
+        # Learn the tool sequence (not after a failed replay: the LLM only did the rest)
+        if config.MACROS and executed and not replayed and not tools_cut and "error" not in response:
+            macros.record(user_message, executed, final_response)
+        # Fold old turns into the summary in the background if over budget
+        self.history.maybe_summarize()
         
+        yield {"type": "response", "content": final_response}
+    
+    async def get_response(self, user_message: str) -> str:
+        """Process a user message and return only the final response text."""
+        final_response = ""
+        async for event in self.process_message(user_message):
+            if event["type"] == "response":
+                final_response = event["content"]
         return final_response
     
     def clear_history(self) -> None:
         """Clear conversation history."""
-        self.conversation_history = []
+        self.history.clear()
+        self.results.clear()
     
     async def check_status(self) -> dict:
         """Check the status of JARVIS and its dependencies."""
-        ollama_ok = await self.ollama.check_connection()
-        models = await self.ollama.list_models() if ollama_ok else []
-        
-        return {
-            "agent": config.AGENT_NAME,
-            "ollama_connected": ollama_ok,
-            "model": config.OLLAMA_MODEL,
-            "model_available": config.OLLAMA_MODEL in models or any(
-                config.OLLAMA_MODEL in m for m in models
-            ),
-            "available_models": models,
-            "tools_count": len(registry.get_all())
-        }
+        return await check_status(self.ollama)
     
     async def close(self) -> None:
         """Clean up resources."""
-        await self.ollama.close()
+        if self._owns_client:
+            await self.ollama.close()
 
 
-# Global agent instance
-agent = Agent()
+async def check_status(ollama: OllamaClient) -> dict:
+    """Check the status of JARVIS and its dependencies."""
+    ollama_ok = await ollama.check_connection()
+    models = await ollama.list_models() if ollama_ok else []
+    
+    return {
+        "agent": config.AGENT_NAME,
+        "ollama_connected": ollama_ok,
+        "model": config.OLLAMA_MODEL,
+        "ollama_transport": ollama.transport_stats(),
+        "context": sizer.stats(),
+        "cancellation": cancellation.stats(),
+        "model_available": config.OLLAMA_MODEL in models or any(
+            config.OLLAMA_MODEL in m for m in models
+        ),
+        "available_models": models,
+        "tools_count": len(registry.get_all()),
+        "tool_loading": tool_manifest.profile(),
+        "tool_cache": registry.cache.stats(),
+        "tool_loops": loop_guard.stats(),
+        "macros": macros.stats(),
+        "warmup": warmer.stats(),
+        "routing": router.stats(),
+        "tool_calls": {"mode": config.TOOL_CALL_MODE, **structured.stats()}
+    }
@@ -0,0 +1,109 @@
+"""
+Tool result cache for JARVIS
+Bounded LRU/TTL cache serving repeated calls to idempotent tools
+"""
+
+import copy
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+import config
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    """How a tool's results are cached (see @tool(cache=...))."""
+    ttl: float  # Seconds a result stays valid
+    key_fields: Optional[tuple[str, ...]] = None  # Arguments that identify a call (default: all)
+    max_entries: Optional[int] = None  # Per-tool cap (default: config.TOOL_CACHE_MAX_ENTRIES)
+    vary: Optional[Callable[[dict], Any]] = None  # Extra key part from the arguments, e.g. a file's mtime
+
+
+def _cacheable(result: Any) -> bool:
+    """Only successful results are cached, so errors are retried next time."""
+    if isinstance(result, dict):
+        return result.get("success", "error" not in result) is not False
+    return result is not None
+
+
+class ToolCache:
+    """
+    Shared result cache for all tools, one LRU bucket per tool.
+
+    Entries expire after their policy's TTL and each bucket is bounded, so
+    memory stays flat however long the server runs. Results are copied in
+    and out, so callers can't corrupt what is cached.
+    """
+
+    def __init__(self):
+        self._buckets: dict[str, OrderedDict] = {}
+        self._stats: dict[str, dict[str, int]] = {}
+
+    @staticmethod
+    def make_key(policy: CachePolicy, arguments: dict) -> str:
+        """Stable key for a call: the identifying arguments as sorted JSON."""
+        fields = policy.key_fields if policy.key_fields is not None else sorted(arguments)
+        key = {name: arguments.get(name) for name in fields}
+        if policy.vary:
+            key["__vary__"] = policy.vary(arguments)
+        return json.dumps(key, sort_keys=True, ensure_ascii=False, default=str)
+
+    def _count(self, tool_name: str, outcome: str) -> None:
+        stats = self._stats.setdefault(tool_name, {"hits": 0, "misses": 0})
+        stats[outcome] += 1
+
+    def get(self, tool_name: str, key: str) -> tuple[bool, Any]:
+        """
+        Look up a cached result.
+
+        Returns:
+            (True, result) on a hit, (False, None) on a miss or expired entry
+        """
+        bucket = self._buckets.get(tool_name)
+        entry = bucket.get(key) if bucket else None
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del bucket[key]
+            self._count(tool_name, "misses")
+            return False, None
+
+        bucket.move_to_end(key)
+        self._count(tool_name, "hits")
+        return True, copy.deepcopy(entry[1])
+
+    def put(self, tool_name: str, key: str, result: Any, policy: CachePolicy) -> None:
+        """Store a result if it is cacheable, evicting the oldest entries past the cap."""
+        if not _cacheable(result):
+            return
+        bucket = self._buckets.setdefault(tool_name, OrderedDict())
+        bucket[key] = (time.monotonic() + policy.ttl, copy.deepcopy(result))
+        bucket.move_to_end(key)
+
+        limit = policy.max_entries or config.TOOL_CACHE_MAX_ENTRIES
+        while len(bucket) > limit:
+            bucket.popitem(last=False)
+
+    def stats(self) -> dict:
+        """Hit/miss counters, overall and per tool, for /health."""
+        hits = sum(s["hits"] for s in self._stats.values())
+        misses = sum(s["misses"] for s in self._stats.values())
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+            "entries": sum(len(bucket) for bucket in self._buckets.values()),
+            "tools": {
+                name: {**stats, "entries": len(self._buckets.get(name, ()))}
+                for name, stats in sorted(self._stats.items())
+            }
+        }
+
+    def clear(self, tool_name: Optional[str] = None) -> None:
+        """Drop cached results (of one tool, or all). Counters are kept."""
+        if tool_name is None:
+            self._buckets.clear()
+        else:
+            self._buckets.pop(tool_name, None)
@@ -0,0 +1,127 @@
+"""
+Request cancellation for JARVIS
+Cancel scopes that kill the child processes started by the tools of an abandoned request
+"""
+
+import subprocess
+import threading
+from collections import Counter
+from contextvars import ContextVar
+from typing import Optional
+
+import psutil
+
+
+class RequestCancelled(Exception):
+    """Raised by run() when the request it belongs to was cancelled."""
+
+    def __init__(self):
+        super().__init__("Pedido cancelado pelo usuário")
+
+
+def _kill_tree(process: subprocess.Popen) -> None:
+    """Kill a child process and everything it started (shell=True spawns grandchildren)."""
+    try:
+        children = psutil.Process(process.pid).children(recursive=True)
+    except psutil.Error:
+        children = []
+    for child in children:
+        try:
+            child.kill()
+        except psutil.Error:
+            pass
+    try:
+        process.kill()
+    except OSError:
+        pass
+
+
+class CancelScope:
+    """
+    Cancellation state of one request.
+
+    The agent opens a scope per request; tools start their child processes
+    through run(), which registers them in the current scope (the scope is
+    a contextvar, so it follows the request into the tool thread pools).
+    cancel() kills every registered process tree and makes later run()
+    calls of the request fail at once.
+    """
+
+    def __init__(self):
+        self.cancelled = False
+        self._processes: set[subprocess.Popen] = set()
+        self._lock = threading.Lock()  # Tools register from worker threads
+
+    def register(self, process: subprocess.Popen) -> None:
+        with self._lock:
+            if not self.cancelled:
+                self._processes.add(process)
+                return
+        # Started while the request was being cancelled
+        _kill_tree(process)
+        counters["processes_killed"] += 1
+
+    def unregister(self, process: subprocess.Popen) -> None:
+        with self._lock:
+            self._processes.discard(process)
+
+    def cancel(self) -> int:
+        """Cancel the request and kill its running processes. Returns how many were killed."""
+        with self._lock:
+            if self.cancelled:
+                return 0
+            self.cancelled = True
+            processes, self._processes = self._processes, set()
+        for process in processes:
+            _kill_tree(process)
+        counters["requests_cancelled"] += 1
+        counters["processes_killed"] += len(processes)
+        return len(processes)
+
+
+current_scope: ContextVar[Optional[CancelScope]] = ContextVar("cancel_scope", default=None)
+
+# Totals for /health
+counters: Counter = Counter()
+
+
+def run(args, timeout: Optional[float] = None, capture_output: bool = False, **kwargs) -> subprocess.CompletedProcess:
+    """
+    subprocess.run() for tools: the process is killed if the request is cancelled.
+
+    Takes the same arguments as subprocess.run(). On timeout the whole
+    process tree is killed before TimeoutExpired is raised.
+
+    Raises:
+        RequestCancelled: The request was cancelled before or while it ran
+    """
+    scope = current_scope.get()
+    if scope and scope.cancelled:
+        raise RequestCancelled()
+    if capture_output:
+        kwargs["stdout"] = kwargs["stderr"] = subprocess.PIPE
+
+    with subprocess.Popen(args, **kwargs) as process:
+        if scope:
+            scope.register(process)
+        try:
+            stdout, stderr = process.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            _kill_tree(process)
+            process.communicate()
+            raise
+        finally:
+            if scope:
+                scope.unregister(process)
+
+    if scope and scope.cancelled:
+        raise RequestCancelled()
+    return subprocess.CompletedProcess(args, process.returncode, stdout, stderr)
+
+
+def stats() -> dict:
+    """Cancellation counters for /health."""
+    return {
+        "requests_cancelled": counters["requests_cancelled"],
+        "processes_killed": counters["processes_killed"]
+    }
@@ -0,0 +1,115 @@
+"""
+Context sizing for JARVIS
+Picks num_ctx per request from the estimated prompt size, in sticky buckets, and num_predict per request class
+"""
+
+import json
+import time
+from collections import Counter
+from typing import Optional
+
+from core.history import estimate_tokens, message_tokens
+import config
+
+
+# The chars/4 estimate undercounts accented text and JSON; leave headroom
+ESTIMATE_MARGIN = 1.2
+# Tokens an image costs a vision model (moondream's projector emits ~730)
+IMAGE_TOKENS = 768
+
+
+def prompt_tokens(messages: list[dict], tools: Optional[list[dict]] = None, format: Optional[dict] = None) -> int:
+    """Estimated prompt tokens of a chat request (messages, tool schemas, images, output schema)."""
+    total = sum(message_tokens(m) + IMAGE_TOKENS * len(m.get("images") or []) for m in messages)
+    if tools:
+        total += estimate_tokens(json.dumps(tools, ensure_ascii=False))
+    if format:
+        total += estimate_tokens(json.dumps(format, ensure_ascii=False))
+    return int(total * ESTIMATE_MARGIN)
+
+
+def num_predict(request_class: Optional[str]) -> Optional[int]:
+    """Reply token cap for a request class (None: no cap)."""
+    return config.NUM_PREDICT.get(request_class) if request_class else None
+
+
+class ContextSizer:
+    """
+    Chooses num_ctx for each request.
+
+    The size is the prompt estimate plus room for the reply, rounded up
+    to one of NUM_CTX_BUCKETS. Ollama reloads the model when num_ctx
+    changes, so a model's bucket is sticky: it grows at once when a
+    request needs more, but only shrinks after NUM_CTX_SHRINK_AFTER
+    seconds without needing the larger size.
+    """
+
+    def __init__(self):
+        self._current: dict[str, int] = {}  # model -> bucket in use
+        self._last_needed: dict[str, float] = {}  # model -> when the current bucket was last needed
+        self.buckets_used: Counter = Counter()
+        self.switches = 0  # Bucket changes (each one makes Ollama reload the model)
+
+    @staticmethod
+    def bucket_for(tokens: int) -> int:
+        """Smallest configured bucket holding `tokens`, within the min/max limits."""
+        buckets = sorted(b for b in config.NUM_CTX_BUCKETS if config.NUM_CTX_MIN <= b <= config.NUM_CTX_MAX)
+        for bucket in buckets:
+            if bucket >= tokens:
+                return bucket
+        return buckets[-1] if buckets else config.NUM_CTX_MAX
+
+    def num_ctx(self, model: str, prompt: int, reply: Optional[int] = None) -> int:
+        """
+        num_ctx for a request to `model`.
+
+        Args:
+            model: Model the request goes to
+            prompt: Estimated prompt tokens (see prompt_tokens())
+            reply: Reply token cap (default: config.NUM_CTX_REPLY_RESERVE)
+        """
+        if not config.ADAPTIVE_CONTEXT:
+            return config.OLLAMA_NUM_CTX
+
+        needed = self.bucket_for(prompt + (reply or config.NUM_CTX_REPLY_RESERVE))
+        now = time.monotonic()
+        current = self._current.get(model)
+        recently_needed = now - self._last_needed.get(model, 0.0) < config.NUM_CTX_SHRINK_AFTER
+        if current is not None and needed < current and recently_needed:
+            bucket = current  # Keep the loaded context rather than reload twice
+        else:
+            bucket = needed
+            self._last_needed[model] = now
+            if current is not None and bucket != current:
+                self.switches += 1
+        self._current[model] = bucket
+        self.buckets_used[bucket] += 1
+        return bucket
+
+    def current(self, model: str) -> int:
+        """
+        num_ctx `model` is loaded with, for warm-up and keep-warm requests.
+
+        Before its first request the model gets its warm-up bucket
+        (NUM_CTX_WARMUP), kept like a needed one so a smaller first request
+        doesn't reload it. Asking never counts as needing the bucket.
+        """
+        if not config.ADAPTIVE_CONTEXT:
+            return config.OLLAMA_NUM_CTX
+        if model not in self._current:
+            self._current[model] = self.bucket_for(config.NUM_CTX_WARMUP_PER_MODEL.get(model, config.NUM_CTX_WARMUP))
+            self._last_needed[model] = time.monotonic()
+        return self._current[model]
+
+    def stats(self) -> dict:
+        """Context sizing counters for /health."""
+        return {
+            "adaptive": config.ADAPTIVE_CONTEXT,
+            "current": dict(self._current),
+            "requests_per_bucket": {str(b): n for b, n in sorted(self.buckets_used.items())},
+            "switches": self.switches
+        }
+
+
+# Global sizer instance
+sizer = ContextSizer()
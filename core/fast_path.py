@@ -0,0 +1,197 @@
+"""
+Fast-path intent router for JARVIS
+Answers high-confidence simple requests (math, time, quotes, weather) without the LLM
+"""
+
+import re
+import unicodedata
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Optional
+
+
+WEEKDAYS = ["segunda-feira", "terça-feira", "quarta-feira", "quinta-feira", "sexta-feira", "sábado", "domingo"]
+
+CURRENCIES = {
+    "dolar": "USD", "dolares": "USD", "euro": "EUR", "euros": "EUR", "libra": "GBP",
+    "iene": "JPY", "peso argentino": "ARS", "peso chileno": "CLP",
+}
+
+COINS = {
+    "bitcoin": "bitcoin", "btc": "bitcoin", "ethereum": "ethereum", "eth": "ethereum",
+    "solana": "solana", "sol": "solana", "dogecoin": "dogecoin", "doge": "dogecoin",
+    "cardano": "cardano", "ada": "cardano", "xrp": "xrp", "litecoin": "litecoin", "ltc": "litecoin",
+}
+
+# Words the weather pattern could mistake for a city ("temperatura de hoje")
+NOT_CITIES = {"hoje", "agora", "amanha", "ontem", "semana", "fim de semana", "aqui", "casa", "la fora"}
+
+# Time words after a city ("Rio de Janeiro amanhã"): the answer is the current weather, so the LLM handles them
+TIME_WORDS = {"hoje", "agora", "amanha", "ontem", "depois", "semana", "manha", "tarde", "noite", "madrugada"}
+
+
+@dataclass
+class FastPathPlan:
+    """What to do for a matched request: an optional tool call, then a templated answer."""
+    intent: str
+    tool_name: Optional[str]
+    tool_args: dict
+    render: Callable[[Any], Optional[str]]  # Tool result -> answer, None to fall back to the LLM
+
+
+def fold(text: str) -> str:
+    """
+    Lowercase and strip accents one character at a time, so that positions
+    in the folded text map 1:1 onto the original (used to extract city names
+    and macro slots).
+    """
+    return "".join(unicodedata.normalize("NFKD", c)[:1].lower() or c for c in text)
+
+
+def _number(text: str) -> Optional[str]:
+    """
+    pt-BR number ('1.500', '1.234,5' or '2,5') to a Python literal.
+
+    A dot followed by groups of three digits is a thousands separator,
+    any other single dot a decimal point ('2.5'). Returns None when the
+    meaning is unclear ('1.23,4', '1,234,5'), so the LLM handles the request.
+    """
+    if re.fullmatch(r"\d{1,3}(?:\.\d{3})+(?:,\d+)?", text):
+        return text.replace(".", "").replace(",", ".")
+    if re.fullmatch(r"\d+,\d+", text):
+        return text.replace(",", ".")
+    if re.fullmatch(r"\d+(?:\.\d+)?", text):
+        return text
+    return None
+
+
+def _format_number(value) -> str:
+    """Format a calculation result the pt-BR way (decimal comma)."""
+    if isinstance(value, float):
+        if value.is_integer():
+            value = int(value)
+        else:
+            value = round(value, 6)
+    text = f"{value:,}" if isinstance(value, int) else f"{value:,.6f}".rstrip("0").rstrip(".")
+    return text.replace(",", "_").replace(".", ",").replace("_", ".")
+
+
+def _ok(result) -> bool:
+    return isinstance(result, dict) and result.get("success") is True
+
+
+# ============ INTENTS ============
+# Patterns run on folded text (lowercase, no accents, no trailing punctuation)
+# and must match the WHOLE message, so anything more elaborate reaches the LLM.
+
+ASK = r"(?:(?:me )?(?:diz|diga|fala|fale)(?: ai)?,? )?"
+
+TIME_PATTERN = re.compile(rf"^{ASK}(?:que horas? (?:sao|e)|que horas? sao agora|(?:as|a) horas?)(?: agora)?$")
+DATE_PATTERN = re.compile(rf"^{ASK}(?:que dia e hoje|qual (?:e )?a data de hoje|que data e hoje|hoje e que dia)$")
+PERCENT_PATTERN = re.compile(
+    r"^(?:quanto (?:e|da)|calcul[ae]|qual (?:e )?) ?(\d+(?:[.,]\d+)*) ?(?:%|por ?cento) (?:de|do valor de) (\d+(?:[.,]\d+)*)$"
+)
+MATH_PATTERN = re.compile(r"^(?:quanto (?:e|da)|calcul[ae]|qual (?:e )?o resultado de) ([\d\s.,+\-*/x()^]+)$")
+EXCHANGE_PATTERN = re.compile(
+    r"^(?:qual (?:e )?)?(?:a )?(?:cotacao|preco|valor) (?:atual )?do (dolar|euro|libra|iene|peso argentino|peso chileno)(?: hoje| agora)?$"
+    r"|^quanto (?:esta|ta|custa|vale) o (dolar|euro|libra|iene|peso argentino|peso chileno)(?: hoje| agora)?$"
+)
+CRYPTO_PATTERN = re.compile(
+    rf"^(?:qual (?:e )?)?(?:o |a )?(?:preco|cotacao|valor) (?:atual )?d[oa] ({'|'.join(COINS)})(?: hoje| agora)?$"
+    rf"|^quanto (?:esta|ta|custa|vale) (?:o |um |1 )?({'|'.join(COINS)})(?: hoje| agora)?$"
+)
+WEATHER_PATTERN = re.compile(
+    r"^(?:como (?:esta|ta|vai) )?(?:o |a )?(?:tempo|clima|previsao do tempo|temperatura) "
+    r"(?:em|no|na|de|para|pra) ([a-z][a-z .'-]{1,40}?)(?: hoje| agora)?$"
+)
+
+
+class FastPathRouter:
+    """Matches simple requests with compiled patterns and plans a direct answer."""
+
+    def route(self, user_message: str) -> Optional[FastPathPlan]:
+        """
+        Plan a direct answer for the message, or None if the LLM is needed.
+
+        Args:
+            user_message: Raw user text
+
+        Returns:
+            A FastPathPlan, or None when no intent matches with confidence
+        """
+        original = unicodedata.normalize("NFC", user_message).strip().rstrip("?!. ")
+        text = fold(original)
+        if len(text) > 80:
+            return None
+
+        if TIME_PATTERN.match(text):
+            return FastPathPlan("time", None, {}, lambda _: f"Agora são {datetime.now().strftime('%H:%M')} 🕒")
+
+        if DATE_PATTERN.match(text):
+            def render_date(_):
+                now = datetime.now()
+                return f"Hoje é {WEEKDAYS[now.weekday()]}, {now.strftime('%d/%m/%Y')} 📅"
+            return FastPathPlan("date", None, {}, render_date)
+
+        match = PERCENT_PATTERN.match(text)
+        if match:
+            percent, base = match.group(1), match.group(2)
+            if _number(percent) is None or _number(base) is None:
+                return None
+            expression = f"{_number(percent)} / 100 * {_number(base)}"
+            return FastPathPlan(
+                "percent", "calculate", {"expression": expression},
+                lambda r: f"{percent}% de {base} é **{_format_number(r['result'])}** 🧮" if _ok(r) else None
+            )
+
+        match = MATH_PATTERN.match(text)
+        if match and re.search(r"\d\s*[+\-*/x^]\s*[\d(]", match.group(1)):
+            shown = match.group(1).strip()
+            expression = re.sub(r"(?<=[\d)\s])x(?=[\s\d(])", "*", shown)
+            numbers = re.findall(r"\d+(?:[.,]\d+)+", expression)
+            if any(_number(number) is None for number in numbers):
+                return None
+            expression = re.sub(r"\d+(?:[.,]\d+)+", lambda m: _number(m.group(0)), expression)
+            return FastPathPlan(
+                "math", "calculate", {"expression": expression},
+                lambda r: f"{shown} = **{_format_number(r['result'])}** 🧮" if _ok(r) else None
+            )
+
+        match = EXCHANGE_PATTERN.match(text)
+        if match:
+            currency = CURRENCIES[match.group(1) or match.group(2)]
+            return FastPathPlan(
+                "exchange", "get_exchange_rate", {"from_currency": currency, "to_currency": "BRL"},
+                lambda r: f"💱 Cotação agora: **{r['message']}**" if _ok(r) else None
+            )
+
+        match = CRYPTO_PATTERN.match(text)
+        if match:
+            coin = COINS[match.group(1) or match.group(2)]
+
+            def render_crypto(r):
+                if not _ok(r):
+                    return None
+                return (f"🪙 **{r['coin']['name']}** está custando **{r['price']['current']}** "
+                        f"({r['change']['24h']} em 24h)")
+            return FastPathPlan("crypto", "get_crypto_price", {"coin": coin, "currency": "brl"}, render_crypto)
+
+        match = WEATHER_PATTERN.match(text)
+        if match and match.group(1).strip() not in NOT_CITIES and not TIME_WORDS & set(match.group(1).split()):
+            city = original[match.start(1):match.end(1)].strip()
+
+            def render_weather(r):
+                if not _ok(r):
+                    return None
+                current = r["current"]
+                place = r["location"]["city"] or city
+                return (f"🌤️ Agora em **{place}**: {current['temperature']} "
+                        f"(sensação de {current['feels_like']}), {current['description'].lower()}, "
+                        f"umidade {current['humidity']}.")
+            return FastPathPlan("weather", "get_weather", {"city": city}, render_weather)
+
+        return None
+
+
+# Global router instance
+fast_path = FastPathRouter()
@@ -0,0 +1,155 @@
+"""
+Conversation history for JARVIS
+Keeps recent turns inside a token budget and folds older ones into a running summary
+"""
+
+import asyncio
+from typing import Optional
+import config
+
+
+SUMMARY_PROMPT = """Você resume conversas entre um usuário e o assistente {name}.
+Atualize o resumo existente com os novos trechos da conversa.
+Mantenha: fatos sobre o usuário, preferências, decisões, tarefas pedidas e seus resultados, nomes de arquivos e programas.
+Descarte: cumprimentos, piadas e detalhes irrelevantes.
+Responda APENAS com o resumo, em Português Brasileiro, em no máximo 10 tópicos curtos."""
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap token estimate for a piece of text.
+
+    Roughly 4 characters per token for Portuguese text and JSON, which is
+    close enough for budgeting without loading a tokenizer.
+    """
+    return len(text) // 4 + 1
+
+
+def message_tokens(message: dict) -> int:
+    """Estimated tokens for a chat message, including role/template overhead."""
+    return estimate_tokens(str(message.get("content", ""))) + 4
+
+
+class ConversationHistory:
+    """
+    Token-budgeted conversation history.
+
+    Token counts are computed once per message and cached. When the history
+    grows past the budget, the oldest turns are folded into a running summary
+    by a background model call. Folding goes down to a lower watermark so it
+    happens in occasional chunks rather than on every turn, which keeps the
+    start of the prompt stable between requests.
+    """
+
+    def __init__(self, ollama, budget: Optional[int] = None):
+        self.ollama = ollama
+        self.budget = budget or config.HISTORY_TOKEN_BUDGET
+        self.messages: list[dict] = []
+        self._token_counts: list[int] = []  # Aligned with self.messages
+        self.summary = ""
+        self._summary_tokens = 0
+        self._summary_task: Optional[asyncio.Task] = None
+
+    def append(self, message: dict) -> None:
+        """Add a message and cache its token estimate."""
+        self.messages.append(message)
+        self._token_counts.append(message_tokens(message))
+
+    @property
+    def total_tokens(self) -> int:
+        """Estimated tokens of the full (unfolded) history plus the summary."""
+        return sum(self._token_counts) + self._summary_tokens
+
+    def for_prompt(self) -> list[dict]:
+        """
+        Messages to send to the model: the running summary (if any) followed
+        by the most recent turns that fit in the budget.
+        """
+        available = self.budget - self._summary_tokens
+        start = len(self.messages)
+        used = 0
+        while start > 0 and used + self._token_counts[start - 1] <= available:
+            start -= 1
+            used += self._token_counts[start]
+        # The latest message (the user's request) is always sent
+        if start == len(self.messages) and self.messages:
+            start -= 1
+
+        prompt = []
+        if self.summary:
+            prompt.append({
+                "role": "system",
+                "content": f"Resumo da conversa até agora:\n{self.summary}"
+            })
+        prompt.extend(self.messages[start:])
+        return prompt
+
+    def maybe_summarize(self) -> None:
+        """Start a background summarization if the history is over budget."""
+        if self.total_tokens <= self.budget:
+            return
+        if self._summary_task and not self._summary_task.done():
+            return
+
+        fold = self._fold_point()
+        if fold == 0:
+            return
+        self._summary_task = asyncio.create_task(self._summarize(fold))
+
+    def _fold_point(self) -> int:
+        """
+        Index of the first message to keep after folding.
+
+        Keeps the newest messages that fit in HISTORY_KEEP_RATIO of the budget,
+        and always cuts at a user message so kept turns stay whole.
+        """
+        target = int(self.budget * config.HISTORY_KEEP_RATIO)
+        keep = len(self.messages)
+        used = 0
+        while keep > 0 and used + self._token_counts[keep - 1] <= target:
+            keep -= 1
+            used += self._token_counts[keep]
+
+        while keep < len(self.messages) and self.messages[keep].get("role") != "user":
+            keep += 1
+        return keep
+
+    async def _summarize(self, fold: int) -> None:
+        """Fold messages[:fold] into the running summary."""
+        folded = self.messages[:fold]
+        transcript = "\n".join(
+            f"{m.get('role', 'user').upper()}: {m.get('content', '')}" for m in folded
+        )
+        if self.summary:
+            transcript = f"RESUMO ATUAL:\n{self.summary}\n\nNOVOS TRECHOS:\n{transcript}"
+
+        response = await self.ollama.chat(
+            [
+                {"role": "system", "content": SUMMARY_PROMPT.format(name=config.AGENT_NAME)},
+                {"role": "user", "content": transcript}
+            ],
+            model=config.SUMMARY_MODEL,
+            request_class="summary"
+        )
+
+        # If the model is unavailable the old turns are still dropped, so
+        # memory stays bounded; the previous summary is kept as-is.
+        if "error" not in response:
+            summary = response.get("message", {}).get("content", "").strip()
+            if summary:
+                self.summary = summary
+                self._summary_tokens = estimate_tokens(summary) + 4
+
+        # Only appends happen while summarizing, so the folded prefix is intact
+        del self.messages[:fold]
+        del self._token_counts[:fold]
+
+    def clear(self) -> None:
+        """Forget everything, cancelling any summarization in progress."""
+        if self._summary_task and not self._summary_task.done():
+            self._summary_task.cancel()
+        self._summary_task = None
+        self.messages = []
+        self._token_counts = []
+        self.summary = ""
+        self._summary_tokens = 0
@@ -0,0 +1,145 @@
+"""
+Tool loop detection for JARVIS
+Serves repeated read-only tool calls from memory and stops requests that cycle through the same calls
+"""
+
+import hashlib
+import json
+from collections import Counter
+from typing import Any, Optional
+
+import config
+from core.tools import registry, succeeded
+
+
+# Verdicts of LoopGuard.observe()
+HINT = "hint"
+STOP = "stop"
+
+LOOP_HINT = (
+    "ATENÇÃO: você está repetindo as mesmas chamadas de ferramenta com os mesmos argumentos "
+    "e os resultados não vão mudar. Use os resultados que já tem: responda ao usuário agora "
+    "ou tente uma abordagem diferente."
+)
+LOOP_STOP = (
+    "As chamadas de ferramenta entraram em ciclo e foram interrompidas. Responda ao usuário "
+    "apenas com o que já descobriu, sem chamar mais ferramentas, e diga o que não conseguiu fazer."
+)
+
+# Totals for /health
+counters: Counter = Counter()
+
+
+def fingerprint(tool_name: str, tool_args: dict) -> tuple[str, str]:
+    """Identity of a call: its tool plus its arguments in canonical JSON (key order ignored)."""
+    return tool_name, json.dumps(tool_args, sort_keys=True, ensure_ascii=False, default=str)
+
+
+def _digest(result: Any) -> str:
+    return hashlib.sha1(json.dumps(result, sort_keys=True, ensure_ascii=False, default=str).encode()).hexdigest()
+
+
+def _read_only(tool_name: str) -> bool:
+    tool = registry.get(tool_name)
+    return tool is not None and tool.independent
+
+
+class LoopGuard:
+    """
+    Per-request watch over the model's tool calls.
+
+    Exact repeats of read-only (independent) tools get the result of the
+    first call; any call with side effects forgets them, since the state
+    they read may have changed. Each iteration's calls and results form a
+    signature, and when the latest signatures repeat a block of up to
+    config.LOOP_MAX_PERIOD iterations (A→A, A→B→A→B...) the model is
+    hinted to stop, then cut off from tools if it keeps going. Results are
+    part of the signature so that progress (e.g. scrolling and reading new
+    text each time) is not mistaken for a loop.
+    """
+
+    def __init__(self):
+        self._memo: dict[tuple[str, str], Any] = {}
+        self._signatures: list[tuple[tuple[str, str, str], ...]] = []
+        self._iteration: list[tuple[str, str, str]] = []
+        self.cycles = 0
+        self.memo_hits = 0
+
+    def lookup(self, tool_name: str, tool_args: dict) -> Optional[Any]:
+        """Result of an identical earlier read-only call of this request, if any."""
+        if not config.LOOP_MEMOIZE:
+            return None
+        key = fingerprint(tool_name, tool_args)
+        result = self._memo.get(key)
+        if result is not None:
+            self.memo_hits += 1
+            counters["memo_hits"] += 1
+            self._iteration.append((*key, _digest(result)))
+        return result
+
+    def record(self, tool_name: str, tool_args: dict, result: Any) -> None:
+        """
+        Note a call that ran, remembering its result if the tool is
+        read-only (failures are not kept, they may be transient).
+        """
+        key = fingerprint(tool_name, tool_args)
+        self._iteration.append((*key, _digest(result)))
+        if not _read_only(tool_name):
+            self._memo.clear()
+        elif succeeded(result) and result is not None:
+            self._memo[key] = result
+
+    def _period(self) -> Optional[int]:
+        """Length of the block the latest signatures repeat, if they do."""
+        signatures = self._signatures
+        for period in range(1, config.LOOP_MAX_PERIOD + 1):
+            if len(signatures) < 2 * period:
+                break
+            block = signatures[-period:]
+            if block != signatures[-2 * period:-period]:
+                continue
+            if len(set(block)) == 1:
+                # One call repeated: fine for side effects (e.g. pressing "down" again)
+                if period > 1 or not all(_read_only(name) for name, _, _ in block[0]):
+                    continue
+            return period
+        return None
+
+    def observe(self) -> Optional[str]:
+        """
+        Close an iteration: its calls (noted by lookup/record) become one signature.
+
+        Returns:
+            None to go on, HINT to add LOOP_HINT to the conversation, or
+            STOP to add LOOP_STOP and ask for a final answer without tools
+        """
+        self._signatures.append(tuple(sorted(self._iteration)))
+        self._iteration = []
+        if not config.LOOP_DETECTION or self._period() is None:
+            return None
+
+        self.cycles += 1
+        if self.cycles == 1:
+            counters["requests_looping"] += 1
+        if self.cycles > config.LOOP_MAX_HINTS:
+            counters["requests_stopped"] += 1
+            return STOP
+        counters["hints"] += 1
+        return HINT
+
+    def stopped(self, iterations_left: int) -> None:
+        """Count the iterations a stopped request did not spend."""
+        counters["iterations_saved"] += max(iterations_left, 0)
+
+
+def stats() -> dict:
+    """Loop detection counters for /health."""
+    return {
+        "detection": config.LOOP_DETECTION,
+        "memoize": config.LOOP_MEMOIZE,
+        "memo_hits": counters["memo_hits"],
+        "requests_looping": counters["requests_looping"],
+        "hints": counters["hints"],
+        "requests_stopped": counters["requests_stopped"],
+        "iterations_saved": counters["iterations_saved"]
+    }
@@ -0,0 +1,311 @@
+"""
+Learned task macros for JARVIS
+Replays the tool sequence that already solved a kind of request, without the LLM
+"""
+
+import json
+import re
+import time
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional
+
+import config
+from core.fast_path import fold
+from core.tools import registry, succeeded
+
+
+MACROS_FILE = Path(__file__).parent.parent / "user_macros.json"
+
+# Shortest tool-result string referenced from a learned answer
+MIN_RESULT_CHARS = 4
+
+# Totals for /health
+counters: Counter = Counter()
+
+
+@dataclass
+class MacroPlan:
+    """A matched macro: the calls to make, then the answer to render from their results."""
+    key: str
+    steps: list[tuple[str, dict]]
+    slots: list[str]  # Slot values taken from the new message
+
+
+def _normalize(message: str) -> tuple[str, str]:
+    """The message as matched (no surrounding spaces or final punctuation), and its folded form."""
+    original = unicodedata.normalize("NFC", message).strip().rstrip("?!. ")
+    return original, fold(original)
+
+
+def _find(folded: str, value: str) -> Optional[tuple[int, int]]:
+    """Span of a whole-word occurrence of a (folded) value, if any."""
+    match = re.search(rf"(?<!\w){re.escape(value)}(?!\w)", folded)
+    return match.span() if match else None
+
+
+def _leaves(value: Any, path: tuple = ()):
+    """(path, string) for every string inside a tool result."""
+    if isinstance(value, str):
+        yield path, value
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            yield from _leaves(item, path + (key,))
+    elif isinstance(value, list):
+        for index, item in enumerate(value):
+            yield from _leaves(item, path + (index,))
+
+
+def _segments(text: str, refs: list[tuple[str, dict]]) -> list:
+    """
+    Split a text into literal strings and refs, replacing whole-word
+    occurrences of each ref's (folded) value, longest values first.
+    """
+    folded = fold(text)
+    spans = []
+    for value, ref in sorted(refs, key=lambda item: -len(item[0])):
+        for match in re.finditer(rf"(?<!\w){re.escape(value)}(?!\w)", folded):
+            if not any(start < match.end() and match.start() < end for start, end, _ in spans):
+                spans.append((match.start(), match.end(), ref))
+    segments, position = [], 0
+    for start, end, ref in sorted(spans, key=lambda span: span[0]):
+        if start > position:
+            segments.append(text[position:start])
+        segments.append(ref)
+        position = end
+    if position < len(text):
+        segments.append(text[position:])
+    return segments
+
+
+def _resolve(result: Any, path: list) -> Optional[str]:
+    for key in path:
+        try:
+            result = result[key]
+        except (KeyError, IndexError, TypeError):
+            return None
+    return result if isinstance(result, str) else None
+
+
+def _learnable(tool_name: str) -> bool:
+    """
+    Safe action tools only: the answer to a read-only tool is its (changing)
+    result, and destructive ones (@tool(destructive=True)) must not run on a
+    slot filled by a loose match without the LLM.
+    """
+    tool = registry.get(tool_name)
+    return tool is not None and not tool.independent and not tool.destructive
+
+
+class MacroStore:
+    """
+    Tool sequences learned from successful requests, kept in a JSON file.
+
+    A request is stored as a template: the message with the spans that
+    became tool arguments turned into slots ("digita {0} e aperta {1}"),
+    the calls with those arguments pointing at the slots, and the answer
+    with slot values and tool-result strings turned into references.
+    A slot is only free once it was seen with different values; until
+    then the new message must repeat the value it was learned with.
+    """
+
+    def __init__(self, path: Path = MACROS_FILE):
+        self.path = path
+        self._macros: Optional[dict[str, dict]] = None
+
+    def load(self) -> dict[str, dict]:
+        """(Re)read the macros from the file."""
+        try:
+            self._macros = json.loads(self.path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            self._macros = {}
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Macros ignoradas ({e})")
+            self._macros = {}
+        return self._macros
+
+    @property
+    def macros(self) -> dict[str, dict]:
+        return self._macros if self._macros is not None else self.load()
+
+    def _save(self) -> None:
+        try:
+            self.path.write_text(json.dumps(self.macros, ensure_ascii=False, indent=2), encoding="utf-8")
+        except OSError as e:
+            print(f"⚠️ Erro ao salvar macros: {e}")
+
+    def record(self, message: str, calls: list[tuple[str, dict, Any]], answer: str) -> bool:
+        """
+        Learn from a request the LLM solved with tools.
+
+        Args:
+            message: The user's message
+            calls: (tool name, arguments, result) of every call, in order
+            answer: The final answer sent to the user
+
+        Returns:
+            True if the request was stored (only successful runs of
+            action tools, with a message that keeps some literal text)
+        """
+        if not calls or not answer or not all(_learnable(name) and succeeded(result) for name, _, result in calls):
+            return False
+
+        # Slots: argument values found in the message (longest first, no overlaps)
+        original, folded = _normalize(message)
+        values = {fold(value.strip()) for _, args, _ in calls for value in args.values() if isinstance(value, str)}
+        spans = []
+        for value in sorted(values, key=len, reverse=True):
+            span = _find(folded, value) if len(value) >= 2 else None
+            if span and not any(start < span[1] and span[0] < end for start, end in spans):
+                spans.append(span)
+        spans.sort()
+
+        template, position = [], 0
+        for index, (start, end) in enumerate(spans):
+            if start == position and index > 0:
+                return False  # Two slots in a row can't be told apart
+            if start > position:
+                template.append(folded[position:start])
+            template.append(index)
+            position = end
+        if position < len(folded):
+            template.append(folded[position:])
+        literal = "".join(part for part in template if isinstance(part, str))
+        if not re.search(r"[a-z]{3,}", literal):
+            return False
+
+        slots = [folded[start:end] for start, end in spans]
+        steps = [
+            [name, {key: {"slot": slots.index(fold(value.strip()))}
+                    if isinstance(value, str) and fold(value.strip()) in slots else value
+                    for key, value in args.items()}]
+            for name, args, _ in calls
+        ]
+        refs = [(slot, {"slot": index}) for index, slot in enumerate(slots)]
+        refs += [
+            (fold(text), {"result": [step, *path]})
+            for step, (_, _, result) in enumerate(calls)
+            for path, text in _leaves(result) if len(text.strip()) >= MIN_RESULT_CHARS
+        ]
+        response = _segments(answer, refs)
+
+        key = json.dumps(template, ensure_ascii=False)
+        macro = self.macros.get(key)
+        if macro is None or macro["steps"] != steps:
+            macro = {"template": template, "steps": steps, "values": [[] for _ in slots],
+                     "runs": 0, "replays": 0, "failures": 0}
+        for seen, slot in zip(macro["values"], slots):
+            if slot not in seen:
+                seen.append(slot)
+                del seen[:-config.MACRO_MAX_VALUES]
+        macro.update(response=response, runs=macro["runs"] + 1, last_used=time.time())
+        self.macros.pop(key, None)
+        self.macros[key] = macro
+        while len(self.macros) > config.MACRO_MAX:
+            oldest = min(self.macros, key=lambda k: self.macros[k]["last_used"])
+            del self.macros[oldest]
+        counters["recorded"] += 1
+        self._save()
+        return True
+
+    def match(self, message: str) -> Optional[MacroPlan]:
+        """
+        The learned macro for a message, or None if the LLM is needed.
+
+        Only macros with config.MACRO_MIN_RUNS successful runs are
+        considered, the whole message must match the template, and slots
+        seen with a single value must have that value. When several
+        match, the one with the most literal text wins.
+        """
+        original, folded = _normalize(message)
+        best, best_literal = None, -1
+        for key, macro in self.macros.items():
+            # Stored before a tool was flagged destructive: never replayed
+            if macro["runs"] < config.MACRO_MIN_RUNS or not all(_learnable(name) for name, _ in macro["steps"]):
+                continue
+            pattern = "".join(re.escape(part) if isinstance(part, str) else "(.+?)" for part in macro["template"])
+            found = re.fullmatch(pattern, folded)
+            if not found:
+                continue
+            slots = [original[found.start(i):found.end(i)].strip() for i in range(1, found.lastindex + 1)] \
+                if found.lastindex else []
+            if any(len(seen) < 2 and fold(slot) not in seen for slot, seen in zip(slots, macro["values"])):
+                continue
+            literal = sum(len(part) for part in macro["template"] if isinstance(part, str))
+            if literal > best_literal:
+                steps = [
+                    (name, {arg: slots[value["slot"]] if isinstance(value, dict) and "slot" in value else value
+                            for arg, value in args.items()})
+                    for name, args in macro["steps"]
+                ]
+                best, best_literal = MacroPlan(key, steps, slots), literal
+        return best
+
+    def replayed(self, plan: MacroPlan, results: list) -> Optional[str]:
+        """
+        Count a replay whose steps all succeeded and render its answer.
+
+        Returns:
+            The answer, or None if a referenced tool result is missing
+            (the LLM then answers from the results)
+        """
+        macro = self.macros.get(plan.key)
+        if macro is None:
+            return None
+        parts = []
+        for segment in macro["response"]:
+            if isinstance(segment, str):
+                parts.append(segment)
+            elif "slot" in segment:
+                parts.append(plan.slots[segment["slot"]])
+            else:
+                step, *path = segment["result"]
+                text = _resolve(results[step], path) if step < len(results) else None
+                if text is None:
+                    return None
+                parts.append(text)
+        macro["replays"] += 1
+        macro["last_used"] = time.time()
+        counters["replayed"] += 1
+        counters["tool_calls"] += len(results)
+        self._save()
+        return "".join(parts)
+
+    def failed(self, plan: MacroPlan) -> None:
+        """A replayed step failed: the macro must be relearned before it is replayed again."""
+        macro = self.macros.get(plan.key)
+        if macro is not None:
+            macro["runs"] = 0
+            macro["failures"] += 1
+            self._save()
+        counters["failed"] += 1
+
+    def stats(self) -> dict:
+        """Macro counters for /health."""
+        ready = sum(1 for macro in self.macros.values() if macro["runs"] >= config.MACRO_MIN_RUNS)
+        return {
+            "enabled": config.MACROS,
+            "stored": len(self.macros),
+            "ready": ready,
+            "recorded": counters["recorded"],
+            "replayed": counters["replayed"],
+            "replayed_tool_calls": counters["tool_calls"],
+            "failed": counters["failed"]
+        }
+
+
+def fallback_note(done: list[tuple[str, dict, Any]]) -> str:
+    """Context for the LLM after a replay stopped: the steps already made and how they went."""
+    lines = [
+        f"- {name}({json.dumps(args, ensure_ascii=False)}): "
+        + ("ok" if succeeded(result) else f"FALHOU - {json.dumps(result, ensure_ascii=False, default=str)[:300]}")
+        for name, args, result in done
+    ]
+    return ("Estes passos já foram executados para o pedido do usuário; não os repita sem necessidade "
+            "e continue a partir daqui:\n" + "\n".join(lines))
+
+
+# Global macro store instance
+macros = MacroStore()
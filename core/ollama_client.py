@@ -3,19 +3,163 @@ Ollama API Client for JARVIS
 Handles communication with local Ollama server
 """
 
+import asyncio
 import httpx
 import json
 from typing import Optional, AsyncGenerator
+from core.context_size import sizer, prompt_tokens, num_predict
+from core.resilience import CircuitBreaker, CircuitOpenError, backoff, CLOSED
 import config
 
 
+# Answers worth retrying: Ollama restarting, overloaded or behind a proxy hiccup
+RETRY_STATUSES = {502, 503, 504}
+
+
+def _retryable(error: Exception) -> bool:
+    """Transient failures: the request never reached a working server."""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in RETRY_STATUSES
+    # Not read timeouts: a hung server would just hang again
+    return isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout, httpx.RemoteProtocolError))
+
+
+def _server_down(error: Exception) -> bool:
+    """Failures that say Ollama is unreachable or unresponsive (they trip the breaker)."""
+    if isinstance(error, CircuitOpenError):
+        return True
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in RETRY_STATUSES
+    return isinstance(error, httpx.TransportError) and not isinstance(error, httpx.PoolTimeout)
+
+
+def _make_http_client() -> httpx.AsyncClient:
+    """HTTP client with the pool limits and timeouts from config."""
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(
+            connect=config.OLLAMA_CONNECT_TIMEOUT,
+            # Ollama sends nothing until the model is loaded and the prompt
+            # evaluated, so the first read gets the first-byte budget
+            read=config.OLLAMA_FIRST_BYTE_TIMEOUT,
+            write=config.OLLAMA_CONNECT_TIMEOUT,
+            pool=config.OLLAMA_POOL_TIMEOUT
+        ),
+        limits=httpx.Limits(
+            max_connections=config.OLLAMA_MAX_CONNECTIONS,
+            max_keepalive_connections=config.OLLAMA_MAX_KEEPALIVE,
+            keepalive_expiry=config.OLLAMA_KEEPALIVE_EXPIRY
+        )
+    )
+
+
 class OllamaClient:
     """Async client for Ollama API with tool/function calling support."""
     
-    def __init__(self):
-        self.base_url = config.OLLAMA_BASE_URL
+    def __init__(self, base_url: Optional[str] = None):
+        self.base_url = base_url or config.OLLAMA_BASE_URL
         self.model = config.OLLAMA_MODEL
-        self.client = httpx.AsyncClient(timeout=120.0)
+        self.client = _make_http_client()
+        self.breaker = CircuitBreaker()
+        self.retries = 0
+    
+    def _build_payload(
+        self,
+        messages: list[dict],
+        tools: Optional[list[dict]],
+        images: Optional[list[str]],
+        stream: bool,
+        model: Optional[str],
+        format: Optional[dict] = None,
+        request_class: Optional[str] = None
+    ) -> dict:
+        """
+        Build the /api/chat request body shared by chat() and chat_stream().
+        
+        num_ctx is sized from the estimated prompt (see core.context_size)
+        and num_predict capped by the request class, if it has a limit.
+        """
+        # Add images to the last message if provided
+        # Ollama API expects 'images' field inside the message object
+        if images and messages:
+            messages[-1]["images"] = images
+        
+        model = model or self.model
+        reply_limit = num_predict(request_class)
+        options = {"num_ctx": sizer.num_ctx(model, prompt_tokens(messages, tools, format), reply_limit)}
+        if reply_limit:
+            options["num_predict"] = reply_limit
+        
+        payload = {
+            "model": model,
+            "messages": messages,
+            "stream": stream,
+            "keep_alive": config.OLLAMA_KEEP_ALIVE,
+            "options": options
+        }
+        
+        if tools:
+            payload["tools"] = tools
+        
+        if format:
+            payload["format"] = format
+        
+        return payload
+    
+    def _error_reply(self, error: Exception) -> dict:
+        """Failed call in the same shape as a reply, so the agent can show it."""
+        if isinstance(error, CircuitOpenError):
+            content = (f"O Ollama está fora do ar no momento. Vou tentar reconectar em "
+                       f"{error.retry_after:.0f}s - tente de novo em instantes.")
+        else:
+            content = f"Erro ao conectar com Ollama: {error}"
+        reply = {"error": str(error), "message": {"role": "assistant", "content": content}}
+        if _server_down(error):
+            reply["status"] = "unavailable"
+        return reply
+    
+    def _record(self, error: Optional[Exception]) -> None:
+        """Feed the outcome of a request into the circuit breaker."""
+        if error is None:
+            self.breaker.record_success()
+        elif _server_down(error) and not isinstance(error, CircuitOpenError):
+            self.breaker.record_failure(f"{type(error).__name__}: {error}")
+        elif isinstance(error, httpx.HTTPStatusError):
+            # The server answered (e.g. 404 model not found) - it is up
+            self.breaker.record_success()
+    
+    async def _backoff(self, error: Exception, attempt: int) -> bool:
+        """Sleep before the next attempt if the error is worth retrying."""
+        if attempt >= config.OLLAMA_RETRIES or not _retryable(error) or self.breaker.state != CLOSED:
+            return False
+        self.retries += 1
+        await asyncio.sleep(backoff(attempt))
+        return True
+    
+    async def _send(self, method: str, path: str, retry: bool = True, **kwargs) -> httpx.Response:
+        """
+        Send a request with the circuit breaker and bounded retries.
+        
+        Every Ollama call we make is idempotent (generation has no side
+        effects), so connection failures and 502/503/504 answers are retried
+        with jittered backoff. Raises CircuitOpenError or httpx.HTTPError.
+        """
+        attempt = 0
+        while True:
+            self.breaker.check()
+            try:
+                response = await self.client.request(method, f"{self.base_url}{path}", **kwargs)
+                response.raise_for_status()
+            except httpx.HTTPError as e:
+                self._record(e)
+                if retry and await self._backoff(e, attempt):
+                    attempt += 1
+                    continue
+                raise
+            except asyncio.CancelledError:
+                self.breaker.release()
+                raise
+            self._record(None)
+            return response
     
     async def chat(
         self,
@@ -23,7 +167,9 @@ class OllamaClient:
         tools: Optional[list[dict]] = None,
         images: Optional[list[str]] = None,
         stream: bool = False,
-        model: Optional[str] = None
+        model: Optional[str] = None,
+        format: Optional[dict] = None,
+        request_class: Optional[str] = None
     ) -> dict:
         """
         Send a chat request to Ollama with optional tool definitions and images.
@@ -34,47 +180,30 @@ class OllamaClient:
             images: Optional list of base64 encoded images (for vision models)
             stream: Whether to stream the response
             model: Override default model (e.g. for using 'moondream')
+            format: Optional JSON schema the output is constrained to
+            request_class: Kind of request (turn class, "summary", "vision"...)
+                whose config.NUM_PREDICT cap applies
             
         Returns:
-            Response dict from Ollama
+            Response dict from Ollama. On failure, a dict with an 'error'
+            key and the error as the assistant message ('status' is
+            "unavailable" when Ollama can't be reached)
         """
-        payload = {
-            "model": model or self.model,
-            "messages": messages,
-            "stream": stream,
-            "options": {
-                "num_ctx": 8192  # Increased context for longer documents (PDFs, etc.)
-            }
-        }
-        
-        if tools:
-            payload["tools"] = tools
-        
-        # Add images to the last message if provided
-        # Ollama API expects 'images' field inside the message object
-        if images and messages:
-            messages[-1]["images"] = images
+        payload = self._build_payload(messages, tools, images, stream, model, format, request_class)
         
         try:
-            response = await self.client.post(
-                f"{self.base_url}/api/chat",
-                json=payload
-            )
-            response.raise_for_status()
+            response = await self._send("POST", "/api/chat", json=payload)
             return response.json()
-        except httpx.HTTPError as e:
-            return {
-                "error": str(e),
-                "message": {
-                    "role": "assistant",
-                    "content": f"Erro ao conectar com Ollama: {e}"
-                }
-            }
+        except (httpx.HTTPError, CircuitOpenError) as e:
+            return self._error_reply(e)
     
     async def chat_stream(
         self,
         messages: list[dict],
-        tools: Optional[list[dict]] = None
+        tools: Optional[list[dict]] = None,
+        model: Optional[str] = None,
+        format: Optional[dict] = None,
+        request_class: Optional[str] = None
     ) -> AsyncGenerator[dict, None]:
         """
         Stream a chat response from Ollama.
@@ -82,49 +211,153 @@ class OllamaClient:
         Args:
             messages: List of message dicts
             tools: Optional tool definitions
+            model: Override default model
+            format: Optional JSON schema the output is constrained to
+            request_class: Kind of request whose config.NUM_PREDICT cap applies
             
         Yields:
-            Response chunks from Ollama
+            Response chunks from Ollama. On connection failure (or a stall
+            longer than OLLAMA_READ_TIMEOUT between chunks) a single chunk
+            with an 'error' key (same shape as chat()) is yielded instead.
+            Failures before the first chunk are retried like chat().
         """
-        payload = {
-            "model": self.model,
-            "messages": messages,
-            "stream": True,
-        }
+        payload = self._build_payload(messages, tools, None, True, model, format, request_class)
         
-        if tools:
-            payload["tools"] = tools
+        attempt = 0
+        started = False
+        while True:
+            try:
+                self.breaker.check()
+                async with self.client.stream(
+                    "POST",
+                    f"{self.base_url}/api/chat",
+                    json=payload
+                ) as response:
+                    response.raise_for_status()
+                    self._record(None)
+                    lines = response.aiter_lines()
+                    # First chunk: covered by the client's first-byte read timeout;
+                    # after that, generation must keep flowing
+                    line_timeout = None
+                    while True:
+                        try:
+                            line = await asyncio.wait_for(anext(lines), line_timeout)
+                        except StopAsyncIteration:
+                            break
+                        except asyncio.TimeoutError:
+                            raise httpx.ReadTimeout(
+                                f"Ollama parou de responder por {config.OLLAMA_READ_TIMEOUT}s"
+                            ) from None
+                        line_timeout = config.OLLAMA_READ_TIMEOUT
+                        if line:
+                            try:
+                                chunk = json.loads(line)
+                            except json.JSONDecodeError:
+                                continue
+                            started = True
+                            yield chunk
+                return
+            except (httpx.HTTPError, CircuitOpenError) as e:
+                self._record(e)
+                # Nothing was delivered yet, so the call can be replayed
+                if not started and await self._backoff(e, attempt):
+                    attempt += 1
+                    continue
+                yield {**self._error_reply(e), "done": True}
+                return
+            except (asyncio.CancelledError, GeneratorExit):
+                # Request cancelled: leaving the `async with` closed the stream,
+                # which makes Ollama stop generating
+                self.breaker.release()
+                raise
+    
+    async def load_model(self, model: Optional[str] = None, keep_alive=None) -> dict:
+        """
+        Load a model into memory without generating anything (or refresh
+        its keep-alive if it is already loaded).
         
-        async with self.client.stream(
-            "POST",
-            f"{self.base_url}/api/chat",
-            json=payload
-        ) as response:
-            async for line in response.aiter_lines():
-                if line:
-                    try:
-                        yield json.loads(line)
-                    except json.JSONDecodeError:
-                        continue
+        Sends the num_ctx the model is (or will be) used with, since Ollama
+        reloads a model whose next request asks for a different one.
+        
+        Args:
+            model: Model to load (default: the chat model)
+            keep_alive: How long to keep it loaded (default: config.OLLAMA_KEEP_ALIVE)
+            
+        Returns:
+            Ollama's response, or a dict with an 'error' key
+        """
+        model = model or self.model
+        payload = {
+            "model": model,
+            "keep_alive": config.OLLAMA_KEEP_ALIVE if keep_alive is None else keep_alive,
+            "options": {"num_ctx": sizer.current(model)}
+        }
+        try:
+            response = await self._send("POST", "/api/generate", json=payload)
+            return response.json()
+        except (httpx.HTTPError, CircuitOpenError) as e:
+            return {"error": str(e)}
+    
+    async def running_models(self) -> list[dict]:
+        """Models currently loaded in memory (/api/ps)."""
+        try:
+            response = await self._send("GET", "/api/ps")
+            return response.json().get("models", [])
+        except (httpx.HTTPError, CircuitOpenError):
+            return []
     
     async def check_connection(self) -> bool:
-        """Check if Ollama is running and accessible."""
+        """Check if Ollama is running and accessible (no retries - this is the probe)."""
         try:
-            response = await self.client.get(f"{self.base_url}/api/tags")
-            return response.status_code == 200
-        except httpx.HTTPError:
+            await self._send("GET", "/api/tags", retry=False)
+            return True
+        except (httpx.HTTPError, CircuitOpenError):
             return False
     
     async def list_models(self) -> list[str]:
         """Get list of available models."""
         try:
-            response = await self.client.get(f"{self.base_url}/api/tags")
-            response.raise_for_status()
+            response = await self._send("GET", "/api/tags")
             data = response.json()
             return [model["name"] for model in data.get("models", [])]
-        except httpx.HTTPError:
+        except (httpx.HTTPError, CircuitOpenError):
             return []
     
+    def transport_stats(self) -> dict:
+        """Circuit breaker and retry counters for /health."""
+        return {"circuit": self.breaker.stats(), "retries": self.retries}
+    
     async def close(self):
         """Close the HTTP client."""
         await self.client.aclose()
+
+
+class OllamaClientRegistry:
+    """
+    Process-wide pooled Ollama clients, one per server URL.
+    
+    The agent sessions, the model warmer and tools (through injection,
+    see @tool(inject=...)) share these instead of opening their own
+    connections. They are closed once, on application shutdown.
+    """
+    
+    def __init__(self):
+        self._clients: dict[str, OllamaClient] = {}
+    
+    def get(self, base_url: Optional[str] = None) -> OllamaClient:
+        """The shared client for a server (default: config.OLLAMA_BASE_URL)."""
+        base_url = base_url or config.OLLAMA_BASE_URL
+        client = self._clients.get(base_url)
+        if client is None or client.client.is_closed:
+            client = self._clients[base_url] = OllamaClient(base_url)
+        return client
+    
+    async def close(self) -> None:
+        """Close every shared client."""
+        clients, self._clients = list(self._clients.values()), {}
+        for client in clients:
+            await client.close()
+
+
+# Global client registry
+clients = OllamaClientRegistry()
@@ -0,0 +1,113 @@
+"""
+Resilience helpers for JARVIS
+Circuit breaker and jittered exponential backoff for calls to Ollama
+"""
+
+import random
+import time
+from typing import Optional
+
+import config
+
+
+CLOSED = "closed"  # Requests flow normally
+OPEN = "open"  # Server considered down - requests fail immediately
+HALF_OPEN = "half_open"  # One probe request is let through to test recovery
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request while the circuit is open."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Ollama indisponível (circuito aberto, nova tentativa em {retry_after:.0f}s)")
+        self.retry_after = retry_after
+
+
+def backoff(attempt: int, base: Optional[float] = None, cap: Optional[float] = None) -> float:
+    """
+    Seconds to wait before retry number `attempt` (0-based).
+
+    "Full jitter": a random delay up to base * 2**attempt (capped), so
+    clients that failed together don't all retry at the same instant.
+    """
+    base = config.OLLAMA_BACKOFF_BASE if base is None else base
+    cap = config.OLLAMA_BACKOFF_MAX if cap is None else cap
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    After `failure_threshold` failures in a row the circuit opens and
+    allow() refuses requests for `reset_timeout` seconds. Then a single
+    probe is allowed (half-open): success closes the circuit, failure
+    opens it again.
+    """
+
+    def __init__(self, failure_threshold: Optional[int] = None, reset_timeout: Optional[float] = None):
+        self.failure_threshold = failure_threshold or config.CIRCUIT_FAILURE_THRESHOLD
+        self.reset_timeout = reset_timeout or config.CIRCUIT_RESET_TIMEOUT
+        self.state = CLOSED
+        self.failures = 0  # Consecutive
+        self.opened_at = 0.0
+        self.last_error: Optional[str] = None
+        self.times_opened = 0
+        self.rejected = 0
+        self._probing = False
+
+    @property
+    def retry_after(self) -> float:
+        """Seconds until a probe is allowed (0 when not open)."""
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now (claims the probe slot when half-open)."""
+        if self.state == OPEN and self.retry_after == 0:
+            self.state = HALF_OPEN
+            self._probing = False
+        if self.state == CLOSED:
+            return True
+        if self.state == HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        self.rejected += 1
+        return False
+
+    def check(self) -> None:
+        """Raise CircuitOpenError if a request may not be sent now."""
+        if not self.allow():
+            raise CircuitOpenError(self.retry_after or self.reset_timeout)
+
+    def record_success(self) -> None:
+        self.state = CLOSED
+        self.failures = 0
+        self._probing = False
+
+    def release(self) -> None:
+        """Give back the probe slot of a request abandoned before its outcome was known."""
+        if self.state == HALF_OPEN:
+            self._probing = False
+
+    def record_failure(self, error: Optional[str] = None) -> None:
+        self.failures += 1
+        self.last_error = error
+        self._probing = False
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != OPEN:
+                self.times_opened += 1
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+
+    def stats(self) -> dict:
+        """Breaker state for /health."""
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "retry_after_seconds": round(self.retry_after, 1),
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+            "last_error": self.last_error
+        }
@@ -0,0 +1,153 @@
+"""
+Tool result shaping for JARVIS
+Fits tool outputs into a token budget and keeps the full data addressable by handle
+"""
+
+import json
+import uuid
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Any, Optional
+
+import config
+from core.history import estimate_tokens
+
+
+# (max list items, max string chars) tried in order until a result fits its budget
+SHRINK_LEVELS = [(30, 4000), (20, 2000), (10, 1000), (6, 500), (4, 250), (2, 100)]
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, default=str)
+
+
+def _shrink(value: Any, max_items: int, max_chars: int) -> Any:
+    """
+    Copy of a JSON-like value with long strings cut and long lists reduced
+    to their head and tail plus a count of what was left out.
+    """
+    if isinstance(value, str):
+        if len(value) > max_chars:
+            return value[:max_chars] + f"… [+{len(value) - max_chars} caracteres]"
+        return value
+    if isinstance(value, dict):
+        return {key: _shrink(item, max_items, max_chars) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        items = list(value)
+        if len(items) > max_items:
+            tail = max_items // 3
+            head = max_items - tail
+            omitted = len(items) - head - tail
+            items = items[:head] + [f"… {omitted} de {len(value)} itens omitidos …"] + (items[-tail:] if tail else [])
+        return [_shrink(item, max_items, max_chars) for item in items]
+    return value
+
+
+class ResultStore:
+    """
+    Full tool results that were too big for the prompt, addressable by handle.
+
+    Bounded LRU: the oldest results are dropped once the store is full, so
+    only recent handles can be fetched.
+    """
+
+    def __init__(self, max_results: Optional[int] = None):
+        self.max_results = max_results or config.RESULT_STORE_SIZE
+        self._results: OrderedDict[str, str] = OrderedDict()
+
+    def put(self, result: Any) -> str:
+        """Keep a result (serialized) and return its handle."""
+        handle = uuid.uuid4().hex[:8]
+        self._results[handle] = _dumps(result)
+        while len(self._results) > self.max_results:
+            self._results.popitem(last=False)
+        return handle
+
+    def read(self, handle: str, offset: int = 0, length: Optional[int] = None,
+             max_tokens: Optional[int] = None) -> Optional[dict]:
+        """
+        A slice of a stored result's JSON text.
+
+        Args:
+            handle: Handle returned by put()/shape()
+            offset: Character to start from
+            length: Characters to read (default: config.FETCH_MORE_CHARS)
+            max_tokens: Estimated tokens the serialized page may take; the
+                slice is shortened to fit, and next_offset follows it
+
+        Returns:
+            Dict with the content and the offset to continue from, or None
+            for unknown/expired handles
+        """
+        text = self._results.get(handle)
+        if text is None:
+            return None
+        self._results.move_to_end(handle)
+
+        length = length or config.FETCH_MORE_CHARS
+        offset = max(0, offset)
+        while True:
+            end = min(offset + length, len(text))
+            page = {
+                "handle": handle,
+                "offset": offset,
+                "next_offset": end if end < len(text) else None,
+                "total_chars": len(text),
+                "content": text[offset:end]
+            }
+            tokens = estimate_tokens(_dumps(page))
+            if max_tokens is None or tokens <= max_tokens or length <= 1:
+                return page
+            length = max(1, min(length - 1, length * max_tokens // tokens))
+
+    def clear(self) -> None:
+        """Forget every stored result."""
+        self._results.clear()
+
+    def shape(self, result: Any, budget: int) -> tuple[str, Optional[str]]:
+        """
+        Serialize a tool result for the prompt within a token budget.
+
+        Results that fit are returned unchanged. Bigger ones are stored whole
+        and replaced by a reduced copy (long lists become head + tail with a
+        count, long strings are cut) plus a note with the handle for fetch_more.
+
+        Args:
+            result: Raw tool result
+            budget: Maximum estimated tokens for the serialized result
+
+        Returns:
+            (content for the tool message, handle or None if not truncated)
+        """
+        content = _dumps(result)
+        total_tokens = estimate_tokens(content)
+        if total_tokens <= budget:
+            return content, None
+
+        handle = self.put(result)
+        note = {
+            "handle": handle,
+            "total_tokens": total_tokens,
+            "dica": f"Resultado grande resumido. Use fetch_more(handle=\"{handle}\", offset=0) para ler o resultado completo em partes."
+        }
+
+        for max_items, max_chars in SHRINK_LEVELS:
+            shaped = _shrink(result, max_items, max_chars)
+            if isinstance(shaped, dict):
+                shaped = {**shaped, "_truncado": note}
+            else:
+                shaped = {"result": shaped, "_truncado": note}
+            content = _dumps(shaped)
+            if estimate_tokens(content) <= budget:
+                break
+        else:
+            # Too many keys to shrink structurally - send a raw prefix
+            content = _dumps({"preview": content[:budget * 3], "_truncado": note})
+        return content, handle
+
+
+# Store of the agent whose tools are running (set per tool call by the Agent)
+current_store: ContextVar[Optional[ResultStore]] = ContextVar("current_store", default=None)
+
+# Estimated tokens a fetch_more page may take in the prompt (set per tool call by the Agent)
+current_page_budget: ContextVar[Optional[int]] = ContextVar("current_page_budget", default=None)
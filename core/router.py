@@ -0,0 +1,227 @@
+"""
+Model routing for JARVIS
+Classifies each turn and picks a model from a small-to-large ladder, escalating on failure
+"""
+
+import json
+import statistics
+from collections import Counter, deque
+from typing import Optional
+
+from core.ollama_client import OllamaClient
+from core.tool_selector import selector, tokenize
+from core.tools import registry
+import config
+
+
+# Turn classes
+CHAT = "chat"  # Conversation, opinions, general knowledge - no tool needed
+SIMPLE_TOOL = "simple_tool"  # One action or lookup
+MULTI_STEP = "multi_step"  # Several actions in sequence
+TURN_CLASSES = (CHAT, SIMPLE_TOOL, MULTI_STEP)
+
+# Words that ask for an action on the PC (verbs in infinitive/imperative forms)
+ACTION_WORDS = (
+    "abrir abre abra fechar feche fecha clicar clique clica digitar digite digita "
+    "escrever escreva escreve pesquisar pesquise pesquisa buscar busque busca procurar procure "
+    "criar crie cria salvar salve salva mostrar mostre mostra executar execute executa "
+    "rodar rode roda instalar instale mover mova move enviar envie envia baixar baixe baixa "
+    "tirar tire tira ler leia listar liste lista apagar apague apaga deletar delete "
+    "copiar copie copia renomear renomeie analisar analise verificar verifique "
+    "lembrar lembre anotar anote calcular calcule converter converta tocar toque "
+    "pausar pause desligar desligue reiniciar reinicie minimizar minimize maximizar maximize"
+)
+
+# Things only a tool can see or fetch (live data, the desktop, files)
+LIVE_WORDS = (
+    "clima previsao temperatura cotacao dolar euro bitcoin cripto noticias manchetes "
+    "print screenshot tela arquivo arquivos pasta janela programa processos cpu memoria "
+    "site pdf documento"
+)
+
+# Words that chain steps ("abre o bloco de notas e depois salva")
+SEQUENCE_WORDS = "depois seguida entao apos primeiro then after"
+
+ACTION_STEMS = set(tokenize(ACTION_WORDS))
+LIVE_STEMS = set(tokenize(LIVE_WORDS))
+SEQUENCE_STEMS = set(tokenize(SEQUENCE_WORDS))
+
+CLASSIFIER_PROMPT = """Classifique a mensagem do usuário para um assistente de desktop:
+- chat: conversa, piadas, opiniões ou conhecimento geral (nenhuma ação no PC ou consulta na internet)
+- simple_tool: uma ação no PC ou uma consulta (abrir programa, clima, cotação, pesquisar algo)
+- multi_step: várias ações em sequência
+Responda apenas com o JSON."""
+
+CLASSIFIER_SCHEMA = {
+    "type": "object",
+    "properties": {"class": {"type": "string", "enum": list(TURN_CLASSES)}},
+    "required": ["class"]
+}
+
+
+def _tagged(model: str) -> str:
+    """Model name as /api/tags lists it ("llama3" is pulled as "llama3:latest")."""
+    return model if ":" in model else f"{model}:latest"
+
+
+def classify_heuristic(text: str, previous: Optional[str] = None) -> str:
+    """
+    Classify a turn from keywords and the tool ranking, without any model call.
+
+    Args:
+        text: User message
+        previous: Class of the previous turn, inherited by follow-ups
+            like "e em Curitiba?"
+
+    Returns:
+        One of TURN_CLASSES
+    """
+    stems = tokenize(text)
+    actions = ACTION_STEMS.intersection(stems)
+    ranked = selector.rank(text)
+    needs_tool = bool(actions or LIVE_STEMS.intersection(stems)) or (
+        bool(ranked) and ranked[0][1] >= config.ROUTER_TOOL_SCORE
+    )
+
+    if not needs_tool:
+        follow_up = text.strip().lower().startswith(("e ", "and "))
+        if follow_up and previous and previous != CHAT:
+            return previous
+        return CHAT
+    if len(actions) >= 2 or SEQUENCE_STEMS.intersection(stems):
+        return MULTI_STEP
+    return SIMPLE_TOOL
+
+
+class ModelRouter:
+    """
+    Picks the model for each turn and decides when to escalate.
+
+    The ladder goes from the smallest model to the largest. Each turn
+    class starts at a configured rung; a reply that needed a tool call but
+    has none (or has an invalid one), or a model error, moves the request
+    one rung up for the rest of that request. Rungs Ollama doesn't have
+    (see installed()) are left out, so a missing model costs no 404s.
+    """
+
+    def __init__(self):
+        self._calls: Counter = Counter()
+        self._escalations: Counter = Counter()  # By the model that was escalated from
+        self._classes: Counter = Counter()
+        self._latencies: dict[str, deque] = {}
+        self._chat_only: Counter = Counter()
+        self._installed: Optional[set[str]] = None  # None until Ollama listed its models
+
+    @property
+    def ladder(self) -> list[str]:
+        if not config.MODEL_ROUTING:
+            return [config.OLLAMA_MODEL]
+        return [model for model in config.MODEL_LADDER if self.is_installed(model)] or [config.OLLAMA_MODEL]
+
+    def installed(self, models: list[str]) -> None:
+        """
+        Note the models Ollama has (from list_models).
+
+        An empty list means Ollama could not be asked, so the last known
+        list (or, before any, the whole ladder) is kept.
+        """
+        if models:
+            self._installed = {_tagged(model) for model in models}
+
+    def is_installed(self, model: str) -> bool:
+        return self._installed is None or _tagged(model) in self._installed
+
+    async def refresh(self, ollama: OllamaClient) -> list[str]:
+        """Re-read the installed models; returns the resulting ladder."""
+        self.installed(await ollama.list_models())
+        return self.ladder
+
+    async def classify(self, text: str, previous: Optional[str], ollama: OllamaClient) -> str:
+        """Turn class from the configured classifier (falls back to the heuristic)."""
+        if config.ROUTER_CLASSIFIER == "model":
+            response = await ollama.chat(
+                [{"role": "system", "content": CLASSIFIER_PROMPT}, {"role": "user", "content": text}],
+                model=self.ladder[0],
+                format=CLASSIFIER_SCHEMA,
+                request_class="classifier"
+            )
+            try:
+                turn_class = json.loads(response["message"]["content"])["class"]
+            except (KeyError, TypeError, ValueError):
+                turn_class = None
+            if turn_class in TURN_CLASSES:
+                self._classes[turn_class] += 1
+                return turn_class
+        turn_class = classify_heuristic(text, previous)
+        self._classes[turn_class] += 1
+        return turn_class
+
+    def start_rung(self, turn_class: str) -> int:
+        """Ladder index a turn of this class starts at."""
+        rung = config.ROUTE_START_RUNG.get(turn_class, len(self.ladder) - 1)
+        return max(0, min(rung, len(self.ladder) - 1))
+
+    def model(self, rung: int) -> str:
+        return self.ladder[min(rung, len(self.ladder) - 1)]
+
+    def should_escalate(self, rung: int, turn_class: str, response: dict, calls: list[tuple[str, dict]],
+                        tools_ran: bool) -> bool:
+        """
+        Whether this reply should be discarded and retried one rung up.
+
+        Args:
+            rung: Ladder index that produced the reply
+            turn_class: Class of the turn
+            response: The assembled reply (may carry an 'error' and 'status')
+            calls: Parsed (name, arguments) tool calls of the reply
+            tools_ran: Whether tools already ran in this request (a plain
+                answer is expected after them)
+        """
+        if rung >= len(self.ladder) - 1:
+            return False
+        if "error" in response:
+            # A bigger model won't help if Ollama itself is unreachable
+            return response.get("status") != "unavailable"
+        if any(registry.get(name) is None or not isinstance(args, dict) for name, args in calls):
+            return True
+        return not calls and turn_class != CHAT and not tools_ran
+
+    def record(self, model: str, seconds: float) -> None:
+        """Count one LLM call of a model and its latency."""
+        self._calls[model] += 1
+        self._latencies.setdefault(model, deque(maxlen=200)).append(seconds)
+
+    def escalated(self, model: str) -> None:
+        self._escalations[model] += 1
+
+    def chat_only_turn(self, chat_only: bool) -> None:
+        """Count a turn sent with (or without) the chat-only prompt."""
+        self._chat_only["turns" if chat_only else "tool_turns"] += 1
+
+    def chat_only_switched(self) -> None:
+        """Count a chat-only turn that asked for the tools after all."""
+        self._chat_only["switched"] += 1
+
+    def stats(self) -> dict:
+        """Routing counters for /health."""
+        models = {}
+        for model, calls in self._calls.items():
+            latencies = self._latencies.get(model) or [0.0]
+            models[model] = {
+                "calls": calls,
+                "escalations": self._escalations[model],
+                "p50_ms": round(statistics.median(latencies) * 1000, 1)
+            }
+        return {
+            "enabled": config.MODEL_ROUTING,
+            "classifier": config.ROUTER_CLASSIFIER,
+            "ladder": self.ladder,
+            "missing": [model for model in config.MODEL_LADDER if not self.is_installed(model)],
+            "turn_classes": dict(self._classes),
+            "chat_only": {"enabled": config.CHAT_ONLY_MODE, **self._chat_only},
+            "models": models
+        }
+
+
+# Global router instance
+router = ModelRouter()
@@ -0,0 +1,212 @@
+"""
+Request scheduling for JARVIS
+Admission control, priorities and per-session fairness in front of the agent
+"""
+
+import asyncio
+import itertools
+import math
+import statistics
+import time
+from collections import Counter, deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+import config
+
+
+# Priority classes (lower runs first)
+INTERACTIVE = "interactive"  # A user waiting for the answer
+BACKGROUND = "background"  # Autonomous or scheduled work nobody is watching
+PRIORITIES = {INTERACTIVE: 0, BACKGROUND: 1}
+
+
+class QueueFullError(Exception):
+    """Raised when a request arrives with the queue at its maximum depth."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Servidor ocupado: fila cheia. Tente novamente em {retry_after:.0f}s.")
+        self.retry_after = retry_after
+
+
+@dataclass
+class Ticket:
+    """A request waiting for (or holding) a slot."""
+    session_id: str
+    priority: str
+    seq: int  # Arrival order, breaks ties
+    enqueued_at: float = field(default_factory=time.monotonic)
+    position: int = 0  # 1-based place in the queue (0 once running)
+    granted: bool = False
+    changed: asyncio.Event = field(default_factory=asyncio.Event)
+
+
+class RequestScheduler:
+    """
+    Decides which waiting request runs next on the shared backend.
+
+    At most SCHEDULER_SLOTS requests run at once, and background ones may
+    only take SCHEDULER_BACKGROUND_SLOTS of them, so an interactive request
+    always finds a slot soon. Waiting requests are ordered by priority,
+    then by their place in their own session's queue, then by how long ago
+    their session was last served (round-robin between sessions, so one
+    client can't starve the others), then by arrival. A session runs one
+    request at a time. Background requests waiting
+    longer than SCHEDULER_AGING are ordered like interactive ones.
+    """
+
+    def __init__(self, slots: Optional[int] = None, max_queue: Optional[int] = None):
+        self.slots = slots or config.SCHEDULER_SLOTS
+        self.max_queue = max_queue or config.SCHEDULER_MAX_QUEUE
+        self._waiting: list[Ticket] = []
+        self._running: list[Ticket] = []
+        self._seq = itertools.count()
+        self._grants = itertools.count()
+        self._last_granted: dict[str, int] = {}  # Session -> grant number of its last request (while it has any)
+        self._service_times: deque = deque(maxlen=100)
+        self._waits: dict[str, deque] = {name: deque(maxlen=200) for name in PRIORITIES}
+        self.completed: Counter = Counter()
+        self.rejected = 0
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiting)
+
+    @property
+    def running(self) -> int:
+        return len(self._running)
+
+    def retry_after(self) -> float:
+        """Seconds until a slot is likely free for a new request (from recent service times)."""
+        service = statistics.median(self._service_times) if self._service_times else config.SCHEDULER_DEFAULT_SERVICE_TIME
+        return math.ceil(service * (self.queued + 1) / self.slots)
+
+    def _effective_priority(self, ticket: Ticket, now: float) -> int:
+        priority = PRIORITIES[ticket.priority]
+        if priority and now - ticket.enqueued_at > config.SCHEDULER_AGING:
+            priority -= 1
+        return priority
+
+    def _order(self) -> list[Ticket]:
+        """Waiting tickets in the order they would be granted."""
+        now = time.monotonic()
+        rank: Counter = Counter()
+        keyed = []
+        for ticket in sorted(self._waiting, key=lambda t: t.seq):
+            priority = self._effective_priority(ticket, now)
+            served = self._last_granted.get(ticket.session_id, -1)
+            keyed.append(((priority, rank[(ticket.session_id, priority)], served, ticket.seq), ticket))
+            rank[(ticket.session_id, priority)] += 1
+        return [ticket for _, ticket in sorted(keyed, key=lambda item: item[0])]
+
+    def _release(self, ticket: Ticket) -> None:
+        """Take a ticket out of the scheduler (done or cancelled)."""
+        if ticket in self._waiting:
+            self._waiting.remove(ticket)
+        elif ticket in self._running:
+            self._running.remove(ticket)
+        # An idle session starts over: its next request isn't held back
+        if not any(t.session_id == ticket.session_id for t in self._waiting + self._running):
+            self._last_granted.pop(ticket.session_id, None)
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Grant free slots to the first eligible tickets and refresh queue positions."""
+        busy_sessions = {ticket.session_id for ticket in self._running}
+        for ticket in self._order():
+            if len(self._running) >= self.slots:
+                break
+            if ticket.session_id in busy_sessions:
+                continue
+            background = sum(1 for t in self._running if t.priority == BACKGROUND)
+            if ticket.priority == BACKGROUND and background >= config.SCHEDULER_BACKGROUND_SLOTS:
+                continue
+            self._waiting.remove(ticket)
+            self._running.append(ticket)
+            busy_sessions.add(ticket.session_id)
+            self._last_granted[ticket.session_id] = next(self._grants)
+            ticket.granted, ticket.position = True, 0
+            self._waits[ticket.priority].append(time.monotonic() - ticket.enqueued_at)
+            ticket.changed.set()
+
+        for position, ticket in enumerate(self._order(), start=1):
+            if ticket.position != position:
+                ticket.position = position
+                ticket.changed.set()
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        session_id: str,
+        priority: str = INTERACTIVE,
+        on_position: Optional[Callable[[int], Awaitable[None]]] = None
+    ) -> AsyncIterator[None]:
+        """
+        Wait for a slot and hold it for the duration of the block.
+
+        Args:
+            session_id: Session the request belongs to
+            priority: INTERACTIVE or BACKGROUND
+            on_position: Awaited with the request's 1-based queue position
+                whenever it changes while waiting, and with 0 when a request
+                that had to wait starts
+
+        Raises:
+            QueueFullError: SCHEDULER_MAX_QUEUE requests are already waiting
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority '{priority}'")
+        if self.queued >= self.max_queue:
+            self.rejected += 1
+            raise QueueFullError(self.retry_after())
+
+        ticket = Ticket(session_id=session_id, priority=priority, seq=next(self._seq))
+        self._waiting.append(ticket)
+        self._dispatch()
+        try:
+            reported = 0
+            while not ticket.granted:
+                if on_position and ticket.position != reported:
+                    reported = ticket.position
+                    await on_position(reported)
+                    continue
+                ticket.changed.clear()
+                await ticket.changed.wait()
+            if on_position and reported:
+                await on_position(0)
+        except BaseException:
+            # Cancelled (or the client went away) while waiting
+            self._release(ticket)
+            raise
+
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._service_times.append(time.monotonic() - started)
+            self.completed[priority] += 1
+            self._release(ticket)
+
+    def stats(self) -> dict:
+        """Queue counters for /health."""
+        waits = {}
+        for name, samples in self._waits.items():
+            ordered = sorted(samples) or [0.0]
+            waits[name] = {
+                "p50_ms": round(ordered[len(ordered) // 2] * 1000, 1),
+                "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 1)
+            }
+        return {
+            "slots": self.slots,
+            "running": self.running,
+            "queued": self.queued,
+            "max_queue": self.max_queue,
+            "completed": dict(self.completed),
+            "rejected": self.rejected,
+            "wait": waits
+        }
+
+
+# Global scheduler instance
+scheduler = RequestScheduler()
@@ -0,0 +1,132 @@
+"""
+Session management for JARVIS
+Gives every connection (or client-provided session id) its own isolated Agent
+"""
+
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional
+
+import config
+from core.agent import Agent, check_status
+from core.ollama_client import clients
+from core.scheduler import scheduler
+
+
+class SessionLimitError(Exception):
+    """Raised when the session cap is reached and every session is busy."""
+
+
+@dataclass
+class Session:
+    """One user's conversation: its Agent plus a lock serializing its requests."""
+    id: str
+    agent: Agent
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    created_at: float = field(default_factory=time.monotonic)
+    last_used: float = field(default_factory=time.monotonic)
+
+    @property
+    def busy(self) -> bool:
+        """True while a request is being processed for this session."""
+        return self.lock.locked()
+
+    def touch(self) -> None:
+        """Mark the session as used now (resets its idle timer)."""
+        self.last_used = time.monotonic()
+
+
+class SessionManager:
+    """
+    Creates and evicts per-session Agents.
+
+    Sessions are kept in LRU order. Idle sessions older than the TTL are
+    dropped, and when the cap is reached the least recently used idle
+    session is evicted to make room. Busy sessions are never evicted.
+    """
+
+    def __init__(self, max_sessions: Optional[int] = None, idle_ttl: Optional[float] = None):
+        self.max_sessions = max_sessions or config.MAX_SESSIONS
+        self.idle_ttl = idle_ttl or config.SESSION_IDLE_TTL
+        # One pooled HTTP client shared by every session's Agent
+        self.ollama = clients.get()
+        self._sessions: OrderedDict[str, Session] = OrderedDict()
+        self.evicted = 0
+
+    def get(self, session_id: Optional[str] = None) -> Session:
+        """
+        Get the session for an id, creating it if needed.
+
+        Args:
+            session_id: Client-provided id (to resume a conversation after a
+                reconnect). If omitted, a new random id is generated.
+
+        Returns:
+            The Session, marked as most recently used
+        """
+        self.prune()
+
+        session = self._sessions.get(session_id) if session_id else None
+        if session:
+            self._sessions.move_to_end(session.id)
+            session.touch()
+            return session
+
+        self._make_room()
+        session = Session(id=session_id or uuid.uuid4().hex, agent=Agent(ollama=self.ollama))
+        self._sessions[session.id] = session
+        return session
+
+    def prune(self) -> int:
+        """Drop idle sessions whose TTL expired. Returns how many were removed."""
+        now = time.monotonic()
+        expired = [
+            session.id for session in self._sessions.values()
+            if not session.busy and now - session.last_used > self.idle_ttl
+        ]
+        for session_id in expired:
+            self._remove(session_id)
+        return len(expired)
+
+    def _make_room(self) -> None:
+        """Evict least recently used idle sessions until a new one fits."""
+        while len(self._sessions) >= self.max_sessions:
+            victim = next((s for s in self._sessions.values() if not s.busy), None)
+            if victim is None:
+                raise SessionLimitError(
+                    f"Limite de {self.max_sessions} sessões simultâneas atingido. Tente novamente em instantes."
+                )
+            self._remove(victim.id)
+
+    def _remove(self, session_id: str) -> None:
+        """Forget a session (its history is discarded)."""
+        if self._sessions.pop(session_id, None) is not None:
+            self.evicted += 1
+
+    def stats(self) -> dict:
+        """Session counters for /health."""
+        return {
+            "active": len(self._sessions),
+            "busy": sum(1 for s in self._sessions.values() if s.busy),
+            "max": self.max_sessions,
+            "idle_ttl_seconds": self.idle_ttl,
+            "evicted": self.evicted
+        }
+
+    async def check_status(self) -> dict:
+        """Agent/Ollama status plus session counters."""
+        status = await check_status(self.ollama)
+        status["sessions"] = self.stats()
+        status["scheduler"] = scheduler.stats()
+        return status
+
+    async def close(self) -> None:
+        """Drop all sessions (the shared Ollama client is closed with the registry)."""
+        self._sessions.clear()
+
+
+# Global session manager instance
+session_manager = SessionManager()
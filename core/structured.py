@@ -0,0 +1,213 @@
+"""
+Structured-output tool calling for JARVIS
+JSON schema for Ollama's `format` field and an incremental parser for the replies
+"""
+
+import json
+import re
+from collections import Counter
+from typing import Optional
+
+
+STRUCTURED_INSTRUCTIONS = """## FORMATO DE RESPOSTA
+Responda SEMPRE com um objeto JSON: {{"reply": "...", "tool_calls": [...]}}
+- "reply": o texto para o usuário (pode ser vazio enquanto usa ferramentas).
+- "tool_calls": lista de {{"name": ferramenta, "arguments": {{...}}}}. Lista vazia quando a tarefa terminou.
+
+## FERRAMENTAS DISPONÍVEIS
+{tools}"""
+
+# Outcome counters for structured replies (see /health)
+parse_stats: Counter = Counter()
+
+
+def build_schema(tools: list[dict]) -> dict:
+    """
+    JSON schema for a structured reply, derived from the tool definitions.
+
+    Each tool becomes one anyOf branch pinning its name and using its own
+    parameter schema, so the decoder can only emit valid calls.
+
+    Args:
+        tools: Tool definitions in Ollama format (registry.get_ollama_format)
+    """
+    branches = [
+        {
+            "type": "object",
+            "properties": {
+                "name": {"type": "string", "enum": [t["function"]["name"]]},
+                "arguments": t["function"]["parameters"] or {"type": "object", "properties": {}}
+            },
+            "required": ["name", "arguments"]
+        }
+        for t in tools
+    ]
+    calls = {"type": "array", "items": {"anyOf": branches}} if branches else {"type": "array", "maxItems": 0}
+    return {
+        "type": "object",
+        # "reply" first so it can be streamed before the tool calls are decoded
+        "properties": {"reply": {"type": "string"}, "tool_calls": calls},
+        "required": ["reply", "tool_calls"]
+    }
+
+
+def build_instructions(tools: list[dict]) -> str:
+    """System message explaining the reply format and listing the offered tools."""
+    lines = [f"- {t['function']['name']}: {t['function']['description']}" for t in tools]
+    return STRUCTURED_INSTRUCTIONS.format(tools="\n".join(lines) or "(nenhuma)")
+
+
+def _close_json(text: str) -> tuple[Optional[str], int]:
+    """
+    Complete a truncated JSON document: close an open string and every open
+    array/object, dropping a dangling key, colon or comma.
+
+    Returns:
+        (completed text or None if it is not a JSON prefix, how many
+        containers were still open)
+    """
+    stack = []
+    in_string = False
+    escaped = False
+    for char in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+        elif char in "}]":
+            if not stack:
+                return None, 0
+            stack.pop()
+
+    if in_string:
+        text = text[:-1] if escaped else text
+        text += '"'
+    text = text.rstrip()
+    if stack and stack[-1] == "}":
+        # A key without a value ('{"a": 1, "b"' or '{"b":') can't be completed
+        text = re.sub(r'([{,])\s*"(?:[^"\\]|\\.)*"\s*:?$', r"\1", text)
+    text = text.rstrip().rstrip(",")
+    return text + "".join(reversed(stack)), len(stack)
+
+
+class StructuredReplyParser:
+    """
+    Incremental parser for one structured reply.
+
+    feed() takes content deltas as they stream and returns the newly decoded
+    part of the "reply" string, so the answer reaches the user token by token.
+    finish() parses the whole document, completing it if it was cut off.
+    """
+
+    REPLY_START = re.compile(r'^\s*\{\s*"reply"\s*:\s*"')
+    HIGH_SURROGATE = re.compile(r"\\u[dD][89abAB][0-9a-fA-F]{2}")
+
+    def __init__(self):
+        self.text = ""
+        self.reply = ""
+        self._pos: Optional[int] = None  # Index in self.text of the next undecoded reply char
+        self._reply_done = False
+
+    def feed(self, delta: str) -> str:
+        """Add a content delta; return the new reply text it completes."""
+        self.text += delta
+        if self._reply_done:
+            return ""
+        if self._pos is None:
+            match = self.REPLY_START.match(self.text)
+            if not match:
+                return ""
+            self._pos = match.end()
+
+        raw = []
+        i = self._pos
+        while i < len(self.text):
+            char = self.text[i]
+            if char == '"':
+                self._reply_done = True
+                break
+            if char == "\\":
+                size = 6 if self.text[i + 1:i + 2] == "u" else 2
+                if i + size > len(self.text):
+                    break  # Escape sequence not complete yet
+                if size == 6 and self.HIGH_SURROGATE.match(self.text, i):
+                    # Decoded alone each half would be a lone surrogate (not valid UTF-8)
+                    low = self.text[i + 6:i + 8]
+                    if i + 12 > len(self.text) and "\\u".startswith(low):
+                        break  # Wait for the low half
+                    if low == "\\u":
+                        size = 12
+                raw.append(self.text[i:i + size])
+                i += size
+                continue
+            raw.append(char)
+            i += 1
+        self._pos = i + 1 if self._reply_done else i
+
+        try:
+            decoded = json.loads('"' + "".join(raw) + '"')
+        except json.JSONDecodeError:
+            decoded = "".join(raw)
+        self.reply += decoded
+        return decoded
+
+    def finish(self) -> tuple[str, list[dict], str]:
+        """
+        Parse the complete reply.
+
+        Returns:
+            (reply text, tool calls in Ollama format, outcome) where outcome
+            is "ok", "recovered" (completed or salvaged) or "failed" (the raw
+            text is used as the reply and no tools are called)
+        """
+        outcome = "ok"
+        open_depth = 0
+        try:
+            data = json.loads(self.text)
+        except json.JSONDecodeError:
+            outcome = "recovered"
+            closed, open_depth = _close_json(self.text.strip())
+            try:
+                data = json.loads(closed) if closed else None
+            except json.JSONDecodeError:
+                data = None
+            if data is None and self.reply:
+                data = {"reply": self.reply, "tool_calls": []}
+
+        if not isinstance(data, dict):
+            parse_stats["failed"] += 1
+            return self.text.strip(), [], "failed"
+
+        calls = []
+        for call in data.get("tool_calls") or []:
+            if isinstance(call, dict) and isinstance(call.get("name"), str):
+                arguments = call.get("arguments")
+                calls.append({"function": {
+                    "name": call["name"],
+                    "arguments": arguments if isinstance(arguments, dict) else {}
+                }})
+        # Cut off inside a call (root > tool_calls > call): its arguments are
+        # incomplete, so it is not run
+        if open_depth >= 3 and calls:
+            calls.pop()
+        parse_stats[outcome] += 1
+        return str(data.get("reply", "")), calls, outcome
+
+
+def stats() -> dict:
+    """Parse outcome counters for /health."""
+    total = sum(parse_stats.values())
+    return {
+        "ok": parse_stats["ok"],
+        "recovered": parse_stats["recovered"],
+        "failed": parse_stats["failed"],
+        "regex_recovered": parse_stats["regex_recovered"],
+        "success_rate": round((parse_stats["ok"] + parse_stats["recovered"]) / total, 3) if total else 1.0
+    }
@@ -0,0 +1,127 @@
+"""
+System monitor for JARVIS
+Background sampler keeping a rolling snapshot of CPU, RAM, processes and cwd
+"""
+
+import asyncio
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+import psutil
+import config
+
+
+@dataclass
+class SystemSnapshot:
+    """Point-in-time view of the machine's resources."""
+    timestamp: float  # time.time() when sampled
+    cpu_percent: float
+    memory_percent: float
+    memory_used: int
+    memory_total: int
+    memory_available: int
+    cwd: str
+    processes: list[dict] = field(default_factory=list)  # Sorted by memory, highest first
+
+    @property
+    def age(self) -> float:
+        """Seconds since this snapshot was taken."""
+        return time.time() - self.timestamp
+
+    def top_processes(self, count: int = 5) -> list[str]:
+        """Names of the processes using the most memory."""
+        return [proc["name"] for proc in self.processes[:count]]
+
+
+class SystemSampler:
+    """
+    Samples system stats on an interval in a background task.
+
+    Readers call snapshot() and get the latest sample instantly instead of
+    blocking on psutil. When the background task is not running (scripts,
+    tests) snapshot() samples on demand once the cached one is too old.
+    """
+
+    def __init__(self, interval: Optional[float] = None):
+        self.interval = interval or config.SYSTEM_SAMPLE_INTERVAL
+        self._snapshot: Optional[SystemSnapshot] = None
+        self._task: Optional[asyncio.Task] = None
+        self._lock = threading.Lock()  # Tools read snapshots from worker threads
+
+    def sample(self) -> SystemSnapshot:
+        """Take a new snapshot now (blocking) and store it."""
+        # Non-blocking CPU measure since the previous call; the very first
+        # call has no reference point, so wait briefly for a real value.
+        first = self._snapshot is None
+        cpu_percent = psutil.cpu_percent(interval=0.1 if first else None)
+        memory = psutil.virtual_memory()
+
+        processes = []
+        for proc in psutil.process_iter(['pid', 'name', 'cpu_percent', 'memory_percent']):
+            try:
+                info = proc.info
+                processes.append({
+                    "pid": info['pid'],
+                    "name": info['name'] or "",
+                    "cpu": round(info['cpu_percent'] or 0, 1),
+                    "memory": round(info['memory_percent'] or 0, 1)
+                })
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        processes.sort(key=lambda p: p["memory"], reverse=True)
+
+        snapshot = SystemSnapshot(
+            timestamp=time.time(),
+            cpu_percent=cpu_percent,
+            memory_percent=memory.percent,
+            memory_used=memory.used,
+            memory_total=memory.total,
+            memory_available=memory.available,
+            cwd=os.getcwd(),
+            processes=processes
+        )
+        with self._lock:
+            self._snapshot = snapshot
+        return snapshot
+
+    def snapshot(self) -> SystemSnapshot:
+        """
+        Latest snapshot. Only samples synchronously if there is none yet or
+        it is older than SYSTEM_SNAPSHOT_MAX_AGE (background task not running).
+        """
+        with self._lock:
+            snapshot = self._snapshot
+        if snapshot is None or snapshot.age > config.SYSTEM_SNAPSHOT_MAX_AGE:
+            snapshot = self.sample()
+        return snapshot
+
+    async def _run(self) -> None:
+        """Background loop refreshing the snapshot."""
+        while True:
+            try:
+                await asyncio.to_thread(self.sample)
+            except Exception as e:
+                print(f"System sampler error: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        """Start the background sampling task (needs a running event loop)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background sampling task."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Global sampler instance
+sampler = SystemSampler()
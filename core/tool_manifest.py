@@ -0,0 +1,117 @@
+"""
+Tool manifest for JARVIS
+Prebuilt tool schemas, so every tool is listed without importing the handler modules
+
+Rebuild after changing a tool's name, description or parameters:
+    python -m core.tool_manifest
+(modules edited since the last build are imported at startup until then)
+"""
+
+import hashlib
+import importlib
+import json
+import time
+from pathlib import Path
+from typing import Optional
+
+from core.tools import ToolRegistry, registry
+import config
+
+
+# Tool modules in registration order (the order schemas are sent to the model)
+TOOL_MODULES = (
+    "tools.mouse_keyboard", "tools.screen", "tools.processes", "tools.filesystem", "tools.commands",
+    "tools.web", "tools.calculator", "tools.apps", "tools.apis", "tools.vision", "tools.documents",
+    "tools.coding", "tools.memory", "tools.results",
+)
+
+ROOT = Path(__file__).parent.parent
+MANIFEST_PATH = ROOT / "tools" / "manifest.json"
+
+# Tool fields stored in the manifest (handlers and cache policies are code, loaded with the module)
+FIELDS = ("name", "description", "parameters", "executor", "independent", "idempotent", "result_budget", "inject",
+          "destructive", "module")
+
+# Filled by load(), reported in /health
+stats: dict = {}
+
+
+def source_hash(module: str) -> Optional[str]:
+    """SHA-1 of a module's source file (None if it doesn't exist), ignoring CRLF vs LF checkouts."""
+    try:
+        source = (ROOT / (module.replace(".", "/") + ".py")).read_bytes()
+        return hashlib.sha1(source.replace(b"\r\n", b"\n")).hexdigest()
+    except OSError:
+        return None
+
+
+def build(path: Path = MANIFEST_PATH) -> dict:
+    """
+    Import every tool module and write the schemas they register.
+
+    Needs all the tools' dependencies installed.
+    """
+    for module in TOOL_MODULES:
+        importlib.import_module(module)
+    tools = [
+        {field: getattr(tool, field) for field in FIELDS}
+        for tool in registry.get_all() if tool.module in TOOL_MODULES
+    ]
+    manifest = {"modules": {module: source_hash(module) for module in TOOL_MODULES}, "tools": tools}
+    path.write_text(json.dumps(manifest, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    return manifest
+
+
+def load(target: ToolRegistry = registry, path: Path = MANIFEST_PATH) -> dict:
+    """
+    Register every tool, importing as few modules as possible.
+
+    Tools of modules unchanged since the manifest was built are listed
+    from it and their module is imported on first call. Other modules
+    (edited, new, or everything if config.TOOL_LAZY_LOADING is off) are
+    imported now. A module whose import fails is skipped.
+
+    Returns:
+        Load stats (also kept in `stats`)
+    """
+    start = time.perf_counter()
+    manifest = {"modules": {}, "tools": []}
+    if config.TOOL_LAZY_LOADING:
+        try:
+            manifest = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Manifesto de ferramentas ignorado ({e}); importando todos os módulos")
+
+    fresh = {
+        module for module, digest in manifest["modules"].items()
+        if module in TOOL_MODULES and digest == source_hash(module)
+    }
+    listed = 0
+    for entry in manifest["tools"]:
+        # Keep handlers already registered (module imported before us)
+        if entry["module"] in fresh and target.get(entry["name"]) is None:
+            target.register(handler=None, **entry)
+            listed += 1
+
+    stale = [module for module in TOOL_MODULES if module not in fresh]
+    for module in stale:
+        target.load_module(module, trigger="startup")
+
+    stats.clear()
+    stats.update({
+        "lazy": config.TOOL_LAZY_LOADING,
+        "listed_from_manifest": listed,
+        "imported_at_startup": stale,
+        "load_ms": round((time.perf_counter() - start) * 1000, 1)
+    })
+    return stats
+
+
+def profile(target: ToolRegistry = registry) -> dict:
+    """Startup profile for /health: manifest load stats plus the import time of each tool module."""
+    return {**stats, "imports": dict(target.imports)}
+
+
+if __name__ == "__main__":
+    manifest = build()
+    print(f"✅ {len(manifest['tools'])} ferramentas de {len(manifest['modules'])} módulos em {MANIFEST_PATH}")
@@ -0,0 +1,131 @@
+"""
+Tool selection for JARVIS
+Ranks tools against the request with BM25 so only relevant schemas are sent
+"""
+
+import math
+import re
+import unicodedata
+from collections import Counter
+from typing import Iterable, Optional
+
+import config
+from core.tools import registry, ToolRegistry
+
+
+STOPWORDS = {
+    "the", "and", "for", "use", "para", "com", "uma", "um", "uns", "umas", "que", "por",
+    "como", "dos", "das", "nos", "nas", "pelo", "pela", "isso", "esse", "essa", "este",
+    "esta", "seu", "sua", "meu", "minha", "voce", "ele", "ela", "mais", "muito", "tem",
+    "ser", "sao", "foi", "pode", "quando", "onde", "qual", "quais", "mas", "tambem",
+    "padrao", "exemplo", "opcional",
+}
+
+# Portuguese/English suffixes stripped by the light stemmer (longest first)
+SUFFIXES = ("ando", "endo", "indo", "ados", "adas", "ado", "ada", "ar", "er", "ir",
+            "as", "es", "os", "is", "s", "a", "e", "o")
+
+
+def stem(word: str) -> str:
+    """Very light stemmer: 'abra', 'abre' and 'abrir' all become 'abr'."""
+    for suffix in SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            word = word[:-len(suffix)]
+            break
+    return word[:7]
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase, strip accents, split on non-alphanumerics, drop stopwords, stem."""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    words = re.findall(r"[a-z0-9]+", text)
+    return [stem(w) for w in words if len(w) > 2 and w not in STOPWORDS]
+
+
+def _tool_document(tool) -> str:
+    """Text indexed for a tool: name, description and parameter descriptions."""
+    parts = [tool.name.replace("_", " "), tool.description]
+    for param_name, param in tool.parameters.get("properties", {}).items():
+        parts.append(param_name.replace("_", " "))
+        parts.append(str(param.get("description", "")))
+    return " ".join(parts)
+
+
+class ToolSelector:
+    """
+    BM25 index over the registered tools.
+
+    The index is built once and rebuilt only when the set of registered
+    tools changes. select() returns the top-k tools for a query plus an
+    always-on core set.
+    """
+
+    def __init__(self, tool_registry: ToolRegistry, k1: float = 1.5, b: float = 0.75):
+        self.registry = tool_registry
+        self.k1 = k1
+        self.b = b
+        self._indexed: tuple[str, ...] = ()
+        self._docs: dict[str, Counter] = {}
+        self._lengths: dict[str, int] = {}
+        self._idf: dict[str, float] = {}
+        self._avg_length = 0.0
+
+    def _ensure_index(self) -> None:
+        """(Re)build the index if tools were registered since the last build."""
+        names = tuple(tool.name for tool in self.registry.get_all())
+        if names == self._indexed:
+            return
+
+        self._docs = {tool.name: Counter(tokenize(_tool_document(tool))) for tool in self.registry.get_all()}
+        self._lengths = {name: sum(doc.values()) for name, doc in self._docs.items()}
+        self._avg_length = sum(self._lengths.values()) / max(len(self._docs), 1)
+
+        doc_freq = Counter()
+        for doc in self._docs.values():
+            doc_freq.update(doc.keys())
+        total = len(self._docs)
+        self._idf = {
+            term: math.log(1 + (total - freq + 0.5) / (freq + 0.5))
+            for term, freq in doc_freq.items()
+        }
+        self._indexed = names
+
+    def rank(self, query: str) -> list[tuple[str, float]]:
+        """Score every tool against the query, best first (zero scores omitted)."""
+        self._ensure_index()
+        terms = tokenize(query)
+        scores = []
+        for name, doc in self._docs.items():
+            norm = self.k1 * (1 - self.b + self.b * self._lengths[name] / (self._avg_length or 1))
+            score = 0.0
+            for term in terms:
+                freq = doc.get(term, 0)
+                if freq:
+                    score += self._idf[term] * freq * (self.k1 + 1) / (freq + norm)
+            if score > 0:
+                scores.append((name, score))
+        scores.sort(key=lambda item: item[1], reverse=True)
+        return scores
+
+    def select(self, query: str, plan_tools: Iterable[str] = (), top_k: Optional[int] = None) -> list[str]:
+        """
+        Names of the tools to offer the model for this request.
+
+        Args:
+            query: User message (plus recent context) to rank against
+            plan_tools: Tools already used in this request; always kept
+            top_k: Ranked tools to include (default: config.TOOL_TOP_K)
+
+        Returns:
+            Tool names in registry order, so the schema list stays stable
+            for the same selection (friendlier to Ollama's prompt cache)
+        """
+        top_k = top_k or config.TOOL_TOP_K
+        chosen = set(config.TOOL_CORE_SET) | set(plan_tools)
+        chosen.update(name for name, _ in self.rank(query)[:top_k])
+        return [tool.name for tool in self.registry.get_all() if tool.name in chosen]
+
+
+# Global selector instance
+selector = ToolSelector(registry)
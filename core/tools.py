@@ -3,8 +3,39 @@ Tool definitions and registry for JARVIS
 Each tool has a name, description, parameters, and handler function
 """
 
-from typing import Callable, Any
+import asyncio
+import contextvars
+import functools
+import importlib
+import inspect
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Any, Iterable, Optional
 from dataclasses import dataclass, field
+from core.cache import CachePolicy, ToolCache
+from core.ollama_client import clients
+from core import tracing
+import config
+
+
+# Executor classes a sync handler can be dispatched to (see @tool(executor=...))
+EXECUTOR_IO = "io"      # Network, disk and subprocess waits
+EXECUTOR_CPU = "cpu"    # CPU-bound work (parsing, evaluation)
+EXECUTOR_GUI = "gui"    # Mouse, keyboard, focus and screen - one at a time
+EXECUTOR_CLASSES = (EXECUTOR_IO, EXECUTOR_CPU, EXECUTOR_GUI)
+
+
+def succeeded(result) -> bool:
+    """Best-effort success check for the heterogeneous tool result shapes."""
+    if isinstance(result, dict):
+        return result.get("success", "error" not in result) is not False
+    return True
+
+
+def _size(value: Any) -> int:
+    """Serialized size in bytes (as sent to the model), for traces."""
+    return len(json.dumps(value, ensure_ascii=False, default=str).encode())
 
 
 @dataclass
@@ -13,7 +44,15 @@ class Tool:
     name: str
     description: str
     parameters: dict
-    handler: Callable[..., Any]
+    handler: Optional[Callable[..., Any]]  # None until its module is imported (listed from the manifest)
+    executor: str = EXECUTOR_IO
+    independent: bool = False  # No side effects - may run concurrently with other calls
+    idempotent: bool = False  # Same arguments give the same result - safe to serve again
+    cache: Optional[CachePolicy] = None  # Results served from the shared cache while fresh
+    result_budget: Optional[int] = None  # Max estimated tokens of its result in the prompt (default: config)
+    inject: tuple[str, ...] = ()  # Handler parameters filled by the registry (see provide()), never by the model
+    destructive: bool = False  # Deletes, overwrites or ends things - never replayed without the LLM (core.macros)
+    module: Optional[str] = None  # Module defining the handler, imported on first use when not loaded yet
 
 
 class ToolRegistry:
@@ -21,20 +60,68 @@ class ToolRegistry:
     
     def __init__(self):
         self._tools: dict[str, Tool] = {}
+        self._executors: dict[str, ThreadPoolExecutor] = {}
+        # Serializes GUI tools (sync or async) across concurrent tool calls
+        self.gui_lock = asyncio.Lock()
+        self.cache = ToolCache()
+        # Shared resources tools can ask for with @tool(inject=...)
+        self._providers: dict[str, Callable[[], Any]] = {}
+        # Tool modules imported so far: module -> {"ms", "trigger"} or {"error", "trigger"}
+        self.imports: dict[str, dict] = {}
+    
+    def provide(self, name: str, factory: Callable[[], Any]) -> None:
+        """Make a shared resource injectable into tool handlers as parameter `name`."""
+        self._providers[name] = factory
     
     def register(
         self,
         name: str,
         description: str,
         parameters: dict,
-        handler: Callable[..., Any]
+        handler: Callable[..., Any],
+        executor: str = EXECUTOR_IO,
+        independent: bool = False,
+        idempotent: bool = False,
+        cache: Optional[CachePolicy] = None,
+        result_budget: Optional[int] = None,
+        inject: tuple[str, ...] = (),
+        destructive: bool = False,
+        module: Optional[str] = None
     ) -> None:
-        """Register a new tool."""
+        """
+        Register a new tool.
+        
+        A handler of None lists the tool without loading it (see
+        core.tool_manifest); `module` is then imported on its first call and
+        its @tool decorator registers the real handler under the same name.
+        
+        Raises:
+            ValueError: Invalid options, or the name is taken by another module
+        """
+        module = module or getattr(handler, "__module__", None)
+        existing = self._tools.get(name)
+        if existing and existing.module != module:
+            raise ValueError(f"Tool '{name}' is already registered by {existing.module}")
+        if executor not in EXECUTOR_CLASSES:
+            raise ValueError(f"Unknown executor '{executor}' for tool '{name}'")
+        if cache is not None and not idempotent:
+            raise ValueError(f"Tool '{name}' has a cache policy but is not idempotent")
+        if set(inject) & set(parameters.get("properties", {})):
+            raise ValueError(f"Tool '{name}' exposes an injected parameter to the model")
+        
         self._tools[name] = Tool(
             name=name,
             description=description,
             parameters=parameters,
-            handler=handler
+            handler=handler,
+            executor=executor,
+            independent=independent,
+            idempotent=idempotent,
+            cache=cache,
+            result_budget=result_budget,
+            inject=tuple(inject),
+            destructive=destructive,
+            module=module
         )
     
     def get(self, name: str) -> Tool | None:
@@ -45,13 +132,44 @@ class ToolRegistry:
         """Get all registered tools."""
         return list(self._tools.values())
     
-    def get_ollama_format(self) -> list[dict]:
+    def load_module(self, module: str, trigger: str = "startup") -> bool:
         """
-        Convert all tools to Ollama's function calling format.
+        Import a tool module, timing it for the startup profile.
+        
+        A module that fails to import (usually a missing optional
+        dependency) is recorded and skipped: only its tools are unavailable.
+        
+        Args:
+            module: Dotted module name, e.g. "tools.screen"
+            trigger: What caused the import ("startup" or the tool called)
+        
+        Returns:
+            True if the module is loaded
+        """
+        if module in self.imports:
+            return "error" not in self.imports[module]
+        start = time.perf_counter()
+        try:
+            importlib.import_module(module)
+        except Exception as e:
+            self.imports[module] = {"error": f"{type(e).__name__}: {e}", "trigger": trigger}
+            print(f"⚠️ Ferramentas de {module} indisponíveis: {e}")
+            return False
+        self.imports[module] = {"ms": round((time.perf_counter() - start) * 1000, 1), "trigger": trigger}
+        return True
+    
+    def get_ollama_format(self, names: Optional[Iterable[str]] = None) -> list[dict]:
+        """
+        Convert tools to Ollama's function calling format.
+        
+        Args:
+            names: Only include these tools (default: all). Registry order
+                is kept either way.
         
         Returns:
             List of tool definitions in Ollama format
         """
+        wanted = set(names) if names is not None else None
         return [
             {
                 "type": "function",
@@ -62,12 +180,41 @@ class ToolRegistry:
                 }
             }
             for tool in self._tools.values()
+            if wanted is None or tool.name in wanted
         ]
     
+    def _get_executor(self, kind: str) -> ThreadPoolExecutor:
+        """Get (creating on first use) the bounded thread pool for an executor class."""
+        if kind not in self._executors:
+            self._executors[kind] = ThreadPoolExecutor(
+                max_workers=config.TOOL_EXECUTOR_WORKERS[kind],
+                thread_name_prefix=f"jarvis-{kind}"
+            )
+        return self._executors[kind]
+    
+    async def run_sync(self, kind: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run a blocking callable on one of the tool thread pools.
+        
+        Async handlers use this for their blocking parts (e.g. taking a
+        screenshot) so they share the same limits as sync handlers.
+        The caller's contextvars are propagated to the worker thread.
+        """
+        loop = asyncio.get_running_loop()
+        ctx = contextvars.copy_context()
+        call = functools.partial(ctx.run, func, *args, **kwargs)
+        return await loop.run_in_executor(self._get_executor(kind), call)
+    
     async def execute(self, name: str, arguments: dict) -> Any:
         """
         Execute a tool by name with given arguments.
         
+        Async handlers run on the event loop; sync handlers are dispatched
+        to the thread pool of their executor class so they never block it.
+        Tools with a cache policy are served from the shared cache while
+        their last result for the same arguments is fresh. Every call is
+        traced as a "tool" span (argument/result sizes, cache hit, success).
+        
         Args:
             name: Tool name
             arguments: Dict of arguments to pass
@@ -75,34 +222,119 @@ class ToolRegistry:
         Returns:
             Tool execution result
         """
+        with tracing.span(name, "tool", args_bytes=_size(arguments)) as span:
+            result, cached = await self._execute(name, arguments)
+            span.set(cached=cached, success=succeeded(result), result_bytes=_size(result))
+            return result
+    
+    async def _execute(self, name: str, arguments: dict) -> tuple[Any, bool]:
+        """Run (or serve from the cache) one tool call. Returns (result, cached)."""
         tool = self._tools.get(name)
         if not tool:
-            return {"error": f"Tool '{name}' not found"}
+            return {"error": f"Tool '{name}' not found"}, False
+        if tool.handler is None:
+            # Listed from the manifest: import its module on first use
+            if not self.load_module(tool.module, trigger=name) or self._tools[name].handler is None:
+                reason = self.imports.get(tool.module, {}).get("error", f"{tool.module} não registrou o handler")
+                return {"success": False, "error": f"Ferramenta '{name}' indisponível: {reason}"}, False
+            tool = self._tools[name]
+        if tool.inject:
+            # Injected parameters come from the registry only
+            arguments = {k: v for k, v in arguments.items() if k not in tool.inject}
+        
+        key = None
+        if tool.cache and config.TOOL_CACHE:
+            key = self.cache.make_key(tool.cache, self._bind_arguments(tool, arguments))
+            hit, result = self.cache.get(name, key)
+            if hit:
+                return result, True
         
         try:
-            # Handle both sync and async handlers
-            result = tool.handler(**arguments)
-            if hasattr(result, '__await__'):
-                result = await result
-            return result
+            if tool.executor == EXECUTOR_GUI:
+                async with self.gui_lock:
+                    result = await self._call(tool, arguments)
+            else:
+                result = await self._call(tool, arguments)
         except Exception as e:
-            return {"error": f"Tool execution failed: {str(e)}"}
+            return {"error": f"Tool execution failed: {str(e)}"}, False
+        
+        if key is not None:
+            self.cache.put(name, key, result, tool.cache)
+        return result, False
+    
+    @staticmethod
+    def _bind_arguments(tool: Tool, arguments: dict) -> dict:
+        """Arguments with the handler's defaults filled in, so `f(x)` and `f(x, n=5)` share a cache key."""
+        try:
+            bound = inspect.signature(tool.handler).bind(**arguments)
+        except (TypeError, ValueError):
+            return arguments
+        bound.apply_defaults()
+        return dict(bound.arguments)
+    
+    async def _call(self, tool: Tool, arguments: dict) -> Any:
+        """Invoke a tool handler on the loop (async) or its thread pool (sync)."""
+        for dependency in tool.inject:
+            arguments = {**arguments, dependency: self._providers[dependency]()}
+        if inspect.iscoroutinefunction(tool.handler):
+            return await tool.handler(**arguments)
+        
+        result = await self.run_sync(tool.executor, tool.handler, **arguments)
+        # Sync wrappers may still hand back an awaitable
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+    
+    def shutdown(self) -> None:
+        """Stop the tool thread pools (running handlers are not interrupted)."""
+        for executor in self._executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+        self._executors.clear()
 
 
 # Global registry instance
 registry = ToolRegistry()
+registry.provide("ollama", clients.get)
 
 
-def tool(name: str, description: str, parameters: dict):
+def tool(
+    name: str,
+    description: str,
+    parameters: dict,
+    executor: str = EXECUTOR_IO,
+    independent: bool = False,
+    idempotent: bool = False,
+    cache: Optional[CachePolicy] = None,
+    result_budget: Optional[int] = None,
+    inject: tuple[str, ...] = (),
+    destructive: bool = False
+):
     """
     Decorator to register a function as a tool.
     
+    Args:
+        executor: Thread pool for sync handlers - "io" (default), "cpu"
+            or "gui" (single worker, GUI actions never overlap)
+        independent: True for read-only tools whose calls may run
+            concurrently within one model turn (web lookups, file reads...)
+        idempotent: True if repeating a call with the same arguments gives
+            the same result and has no further effect
+        cache: CachePolicy to serve repeated calls of an idempotent tool
+            from the shared cache, e.g. CachePolicy(ttl=300)
+        result_budget: Token budget for this tool's result in the prompt
+            (default: config.RESULT_TOKEN_BUDGET); bigger results are shaped
+        inject: Handler parameters the registry fills with shared resources,
+            e.g. inject=("ollama",) for the pooled Ollama client
+        destructive: True if a call can delete or overwrite data, end a
+            process or run arbitrary code; learned macros never replay it
+    
     Usage:
         @tool("say_hello", "Says hello", {"type": "object", "properties": {...}})
         def say_hello(name: str):
             return f"Hello, {name}!"
     """
     def decorator(func: Callable):
-        registry.register(name, description, parameters, func)
+        registry.register(name, description, parameters, func, executor, independent, idempotent, cache,
+                          result_budget, inject, destructive)
         return func
     return decorator
@@ -0,0 +1,263 @@
+"""
+Tracing and metrics for JARVIS
+Span tree per request (iterations, LLM calls, tools) and Prometheus histograms for /metrics
+"""
+
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+import config
+
+
+# ============ METRICS ============
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+RATE_BUCKETS = (1, 2, 5, 10, 20, 40, 80, 160)
+COUNT_BUCKETS = (1, 2, 3, 5, 8, 12, 15)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_text(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+class Counter:
+    """Monotonic counter with optional labels."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = tuple(sorted(labels.items()))
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> Iterator[str]:
+        for key, value in self._values.items():
+            yield f"{self.name}{_label_text(dict(key))} {value:g}"
+
+
+class Gauge(Counter):
+    """Value that can go up and down (set at scrape time)."""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        self._values[tuple(sorted(labels.items()))] = value
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets: tuple = DURATION_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self._series: dict[tuple, list] = {}  # labels -> [bucket counts..., sum, count]
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(sorted(labels.items()))
+        series = self._series.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[i] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def samples(self) -> Iterator[str]:
+        for key, series in self._series.items():
+            labels = dict(key)
+            for bound, count in zip(self.buckets, series):
+                yield f"{self.name}_bucket{_label_text({**labels, 'le': f'{bound:g}'})} {count}"
+            yield f"{self.name}_bucket{_label_text({**labels, 'le': '+Inf'})} {series[-1]}"
+            yield f"{self.name}_sum{_label_text(labels)} {series[-2]:g}"
+            yield f"{self.name}_count{_label_text(labels)} {series[-1]}"
+
+
+class Metrics:
+    """All JARVIS metrics, rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics = []
+        self.request_duration = self._add(Histogram(
+            "jarvis_request_duration_seconds", "Wall time of one user request"))
+        self.request_iterations = self._add(Histogram(
+            "jarvis_request_llm_calls", "LLM calls per user request", COUNT_BUCKETS))
+        self.request_load = self._add(Histogram(
+            "jarvis_request_model_load_seconds", "Ollama model load time per user request (0 when warm)"))
+        self.llm_duration = self._add(Histogram(
+            "jarvis_llm_call_duration_seconds", "Wall time of one LLM call"))
+        self.llm_load = self._add(Histogram(
+            "jarvis_llm_load_seconds", "Ollama model load time per call"))
+        self.llm_prompt_eval = self._add(Histogram(
+            "jarvis_llm_prompt_eval_seconds", "Ollama prompt evaluation time per call"))
+        self.llm_eval = self._add(Histogram(
+            "jarvis_llm_eval_seconds", "Ollama generation time per call"))
+        self.llm_tokens_per_second = self._add(Histogram(
+            "jarvis_llm_tokens_per_second", "Generation speed per call", RATE_BUCKETS))
+        self.llm_tokens = self._add(Counter(
+            "jarvis_llm_tokens_total", "Tokens processed by Ollama (type=prompt|completion)"))
+        self.tool_duration = self._add(Histogram(
+            "jarvis_tool_duration_seconds", "Tool execution time"))
+        self.tool_result_bytes = self._add(Histogram(
+            "jarvis_tool_result_bytes", "Serialized size of tool results", BYTES_BUCKETS))
+        self.tool_calls = self._add(Counter(
+            "jarvis_tool_calls_total", "Tool calls (status=ok|error|cached)"))
+
+    def _add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self, extra: tuple = ()) -> str:
+        """
+        Prometheus text exposition of every metric.
+
+        Args:
+            extra: Additional metrics (e.g. gauges filled at scrape time)
+        """
+        lines = []
+        for metric in list(self._metrics) + list(extra):
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+# ============ SPANS ============
+
+class Span:
+    """One timed step of a request; children are the steps it contains."""
+
+    def __init__(self, name: str, kind: str, **attrs):
+        self.name = name
+        self.kind = kind  # request, iteration, llm, tool, fast_path
+        self.attrs = attrs
+        self.children: list["Span"] = []
+        self.start = time.perf_counter()
+        self.end_time: Optional[float] = None
+
+    @property
+    def duration(self) -> float:
+        """Seconds from start to end (or to now while running)."""
+        return (self.end_time or time.perf_counter()) - self.start
+
+    def child(self, name: str, kind: str, **attrs) -> "Span":
+        span = Span(name, kind, **attrs)
+        self.children.append(span)
+        return span
+
+    def set(self, **attrs) -> None:
+        self.attrs.update(attrs)
+
+    def descendants(self, kind: str) -> Iterator["Span"]:
+        """Nested spans of a kind (e.g. the LLM calls of a request)."""
+        for child in self.children:
+            if child.kind == kind:
+                yield child
+            yield from child.descendants(kind)
+
+    def end(self) -> None:
+        if self.end_time is None:
+            self.end_time = time.perf_counter()
+            _record(self)
+
+    def to_dict(self, origin: Optional[float] = None) -> dict:
+        """JSON-friendly tree with times in ms relative to the root's start."""
+        origin = self.start if origin is None else origin
+        return {
+            "name": self.name,
+            "kind": self.kind,
+            "start_ms": round((self.start - origin) * 1000, 2),
+            "duration_ms": round(self.duration * 1000, 2),
+            "attrs": self.attrs,
+            "children": [child.to_dict(origin) for child in self.children]
+        }
+
+
+_current: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def current() -> Optional[Span]:
+    """Innermost open span of this task, if a request is being traced."""
+    return _current.get()
+
+
+@contextmanager
+def span(name: str, kind: str, **attrs) -> Iterator[Span]:
+    """
+    Time a step as a child of the current span (or standalone, outside a
+    traced request - its metrics are still recorded).
+    """
+    parent = _current.get()
+    new = parent.child(name, kind, **attrs) if parent else Span(name, kind, **attrs)
+    token = _current.set(new)
+    try:
+        yield new
+    finally:
+        new.end()
+        try:
+            _current.reset(token)
+        except ValueError:
+            # Generator finalized from another context - nothing to restore
+            pass
+
+
+def _record(span: Span) -> None:
+    """Feed a finished span into the aggregated metrics."""
+    attrs = span.attrs
+    if span.kind == "request":
+        metrics.request_duration.observe(span.duration)
+        metrics.request_iterations.observe(attrs.get("llm_calls", 0))
+        metrics.request_load.observe(attrs.get("load_duration", 0) / 1e9)
+    elif span.kind == "llm":
+        model = attrs.get("model", "")
+        metrics.llm_duration.observe(span.duration, model=model)
+        for key, histogram in (("load_duration", metrics.llm_load),
+                               ("prompt_eval_duration", metrics.llm_prompt_eval),
+                               ("eval_duration", metrics.llm_eval)):
+            if attrs.get(key):
+                histogram.observe(attrs[key] / 1e9, model=model)
+        if attrs.get("tokens_per_second"):
+            metrics.llm_tokens_per_second.observe(attrs["tokens_per_second"], model=model)
+        metrics.llm_tokens.inc(attrs.get("prompt_eval_count", 0), model=model, type="prompt")
+        metrics.llm_tokens.inc(attrs.get("eval_count", 0), model=model, type="completion")
+    elif span.kind == "tool":
+        tool = span.name
+        status = "cached" if attrs.get("cached") else ("ok" if attrs.get("success", True) else "error")
+        metrics.tool_calls.inc(tool=tool, status=status)
+        if not attrs.get("cached"):
+            metrics.tool_duration.observe(span.duration, tool=tool)
+        if "result_bytes" in attrs:
+            metrics.tool_result_bytes.observe(attrs["result_bytes"], tool=tool)
+
+
+def llm_stats(reply: dict) -> dict:
+    """Timing/token fields from an Ollama reply, plus generation speed."""
+    stats = {key: reply[key] for key in (
+        "load_duration", "prompt_eval_count", "prompt_eval_duration",
+        "eval_count", "eval_duration", "total_duration"
+    ) if key in reply}
+    if stats.get("eval_count") and stats.get("eval_duration"):
+        stats["tokens_per_second"] = round(stats["eval_count"] / (stats["eval_duration"] / 1e9), 1)
+    return stats
+
+
+# Recent finished request traces (newest last), for /traces
+recent_traces: deque = deque(maxlen=config.TRACE_HISTORY)
+
+# Global metrics instance
+metrics = Metrics()
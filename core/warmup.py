@@ -0,0 +1,136 @@
+"""
+Model warm-up for JARVIS
+Preloads the chat/vision models at startup and keeps them resident during active hours
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from core.ollama_client import OllamaClient
+from core.router import router
+import config
+
+
+@dataclass
+class WarmupRecord:
+    """Outcome of the last load/ping of one model."""
+    model: str
+    timestamp: float  # time.time() of the attempt
+    seconds: float  # Wall time of the request
+    load_duration: float = 0.0  # Seconds Ollama spent loading (0 if it was resident)
+    error: Optional[str] = None
+
+
+def in_active_hours(hours: Optional[tuple] = None, now: Optional[datetime] = None) -> bool:
+    """
+    Whether `now` falls in the [start, end) local-hour window.
+
+    Windows may wrap past midnight, e.g. (22, 6). None means always active.
+    """
+    hours = config.ACTIVE_HOURS if hours is None else hours
+    if not hours:
+        return True
+    start, end = hours
+    hour = (now or datetime.now()).hour
+    if start <= end:
+        return start <= hour < end
+    return hour >= start or hour < end
+
+
+class ModelWarmer:
+    """
+    Loads models ahead of the first request and pings them on an interval.
+
+    Pings are load-only /api/generate requests with the num_ctx the model
+    is used with: instant when the model is resident, and they restart its
+    keep-alive timer. Outside active hours
+    nothing is sent, so models unload after OLLAMA_KEEP_ALIVE. Each round
+    first asks Ollama which models it has: missing ones are skipped (and
+    dropped from the routing ladder) until they are pulled.
+    """
+
+    def __init__(self, models: Optional[list[str]] = None, interval: Optional[float] = None):
+        self.models = list(models or config.WARMUP_MODELS)
+        self.interval = interval or config.KEEP_WARM_INTERVAL
+        self.records: dict[str, WarmupRecord] = {}
+        self.missing: set[str] = set()
+        self._task: Optional[asyncio.Task] = None
+
+    async def warm(self, ollama: OllamaClient) -> list[WarmupRecord]:
+        """Load (or refresh) every configured model Ollama has, one at a time."""
+        records = []
+        await router.refresh(ollama)
+        # Sequential on purpose: loading two models at once competes for VRAM/disk
+        for model in self.models:
+            if not router.is_installed(model):
+                if model not in self.missing:
+                    print(f"⚠️ Modelo {model} não instalado (ollama pull {model}) - fora do warm-up")
+                    self.missing.add(model)
+                    self.records.pop(model, None)
+                continue
+            self.missing.discard(model)
+            start = time.perf_counter()
+            response = await ollama.load_model(model)
+            record = WarmupRecord(
+                model=model,
+                timestamp=time.time(),
+                seconds=round(time.perf_counter() - start, 3),
+                load_duration=round(response.get("load_duration", 0) / 1e9, 3),
+                error=response.get("error")
+            )
+            self.records[model] = record
+            records.append(record)
+        return records
+
+    async def _run(self, ollama: OllamaClient, warm_now: bool) -> None:
+        """Background loop: warm once, then ping during active hours."""
+        while True:
+            if warm_now:
+                try:
+                    for record in await self.warm(ollama):
+                        if record.error:
+                            print(f"Warm-up de {record.model} falhou: {record.error}")
+                except Exception as e:
+                    print(f"Model warmer error: {e}")
+            await asyncio.sleep(self.interval)
+            warm_now = in_active_hours()
+
+    def start(self, ollama: OllamaClient) -> None:
+        """Start warming in the background (needs a running event loop)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(ollama, config.WARMUP_ON_START))
+
+    async def stop(self) -> None:
+        """Stop the background task."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        """Warm-up state for /health."""
+        return {
+            "keep_alive": config.OLLAMA_KEEP_ALIVE,
+            "active_hours": config.ACTIVE_HOURS,
+            "active_now": in_active_hours(),
+            "missing": sorted(self.missing),
+            "models": {
+                model: {
+                    "last_ping_age_seconds": round(time.time() - record.timestamp, 1),
+                    "seconds": record.seconds,
+                    "load_duration": record.load_duration,
+                    "error": record.error
+                }
+                for model, record in self.records.items()
+            }
+        }
+
+
+# Global warmer instance
+warmer = ModelWarmer()
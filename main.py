@@ -12,6 +12,8 @@ from contextlib import asynccontextmanager
 
 import config
 from web.routes import router
+from core.system_monitor import sampler
+from core.warmup import warmer
 
 
 @asynccontextmanager
@@ -43,11 +45,29 @@ async def lifespan(app: FastAPI):
 ╚═══════════════════════════════════════════════════════╝
     """)
     
+    # Startup profile: tools listed from the manifest, tool modules imported now
+    from core import tool_manifest
+    from core.tools import registry
+    loading = tool_manifest.profile()
+    print(f"🧰 {len(registry.get_all())} ferramentas ({loading['listed_from_manifest']} do manifesto "
+          f"em {loading['load_ms']} ms)")
+    for module, entry in loading["imports"].items():
+        print(f"   {module}: {entry['ms']} ms" if "ms" in entry else f"   {module}: ⚠️ {entry['error']}")
+    
+    sampler.start()
+    # Preload the chat/vision models and keep them resident during active hours
+    from core.sessions import session_manager
+    warmer.start(session_manager.ollama)
+    
     yield  # Application runs here
     
     # Shutdown
-    from core.agent import agent
-    await agent.close()
+    await sampler.stop()
+    await warmer.stop()
+    from core.ollama_client import clients
+    await session_manager.close()
+    await clients.close()
+    registry.shutdown()
     print("\n👋 JARVIS desligado. Até a próxima!")
 
 
@@ -0,0 +1,96 @@
+"""
+Test suite for the agent loop against the mock Ollama server
+- Runs headless: stub desktop backends, scripted model replies over HTTP
+- Tool calls are executed and their results sent back to the model
+- Structured-output mode works end to end, tool list after the cacheable prefix
+"""
+
+import sys
+sys.path.insert(0, '.')
+
+from benchmarks import stubs
+stubs.install(psutil=False)
+
+import asyncio
+import json
+import config
+from benchmarks.mock_ollama import MockOllama, Reply, call
+from core.agent import Agent
+from core.ollama_client import OllamaClient
+
+
+async def run_turn(mock: MockOllama, text: str) -> list[dict]:
+    """Send one message through a fresh Agent pointed at the mock."""
+    config.OLLAMA_BASE_URL = mock.base_url
+    agent = Agent(ollama=OllamaClient())
+    try:
+        return [event async for event in agent.process_message(text)]
+    finally:
+        await agent.close()
+
+
+def test_tool_loop():
+    print("🔁 TESTE DO LOOP COM FERRAMENTAS")
+    print("-" * 40)
+
+    base_url = config.OLLAMA_BASE_URL
+    script = [
+        Reply("Vou calcular 🧮", [call("calculate", expression="6*7")]),
+        Reply("O resultado é 42!"),
+    ]
+    try:
+        with MockOllama(script=script) as mock:
+            events = asyncio.run(run_turn(mock, "me ajuda com uma conta de multiplicar"))
+    finally:
+        config.OLLAMA_BASE_URL = base_url
+
+    types = [event["type"] for event in events]
+    print(f"  Eventos: {sorted(set(types))}")
+    assert "tool_call" in types and "tool_result" in types
+    assert events[-1] == {"type": "response", "content": "O resultado é 42!"}
+
+    # The second model call received the tool result
+    tool_messages = [m for m in mock.requests[1]["messages"] if m["role"] == "tool"]
+    assert json.loads(tool_messages[0]["content"])["result"] == 42
+
+    print("✅ LOOP COM FERRAMENTAS OK!\n")
+
+
+def test_structured_mode():
+    print("🧱 TESTE DO MODO ESTRUTURADO")
+    print("-" * 40)
+
+    base_url, mode, chat_only = config.OLLAMA_BASE_URL, config.TOOL_CALL_MODE, config.CHAT_ONLY_MODE
+    config.TOOL_CALL_MODE = "structured"
+    config.CHAT_ONLY_MODE = False  # Full prompt from the first call
+    script = [
+        Reply("Calculando...", [call("calculate", expression="2**10")]),
+        Reply("Deu 1024."),
+    ]
+    try:
+        with MockOllama(script=script) as mock:
+            events = asyncio.run(run_turn(mock, "me ajuda com uma potência de dois"))
+    finally:
+        config.OLLAMA_BASE_URL, config.TOOL_CALL_MODE, config.CHAT_ONLY_MODE = base_url, mode, chat_only
+
+    assert "format" in mock.requests[0] and "tools" not in mock.requests[0]
+
+    # The tool list goes right before the request, after the cacheable prefix
+    messages = mock.requests[0]["messages"]
+    assert "FERRAMENTAS DISPONÍVEIS" in messages[-2]["content"] and messages[-1]["role"] == "user"
+    assert all("FERRAMENTAS DISPONÍVEIS" not in m["content"] for m in messages[:-2])
+    # No native-call rule contradicting the JSON format
+    assert "chamada de função nativa" not in messages[0]["content"]
+    assert "FORMATO DE RESPOSTA" in messages[0]["content"]
+    tokens = "".join(event["content"] for event in events if event["type"] == "token")
+    print(f"  Tokens: {tokens!r}")
+    assert tokens == "Calculando...Deu 1024."
+    assert events[-1]["content"] == "Deu 1024."
+
+    print("✅ MODO ESTRUTURADO OK!\n")
+
+
+if __name__ == "__main__":
+    test_tool_loop()
+    test_structured_mode()
+    print("🎉 TODOS OS TESTES PASSARAM!")
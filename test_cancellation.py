@@ -0,0 +1,164 @@
+"""
+Test suite for request cancellation
+- Cancelling a scope kills the processes its tools started, from any thread
+- A cancelled request closes the Ollama stream and runs no further step
+- Child processes of a cancelled tool call are killed at once
+- The history stays well-formed after a cancellation
+"""
+
+import sys
+sys.path.insert(0, '.')
+
+from benchmarks import stubs
+stubs.install(psutil=False)
+
+import asyncio
+import time
+import config
+from benchmarks.mock_ollama import MockOllama, Reply, call
+from core import cancellation
+from core.agent import Agent, CANCELLED_REPLY
+from core.cancellation import CancelScope, RequestCancelled, current_scope
+from core.ollama_client import OllamaClient
+from core.tools import registry
+
+SLEEPER = [sys.executable, "-c", "import time; time.sleep(30)"]
+
+
+def test_scope_kills_processes():
+    print("🔪 TESTE DO ESCOPO DE CANCELAMENTO")
+    print("-" * 40)
+
+    async def run():
+        scope = CancelScope()
+        current_scope.set(scope)
+        # Runs on a tool thread pool; the scope follows through the contextvars
+        job = asyncio.create_task(registry.run_sync("io", cancellation.run, SLEEPER, capture_output=True))
+        await asyncio.sleep(0.5)
+        start = time.perf_counter()
+        killed = scope.cancel()
+        try:
+            await job
+            assert False, "a cancelled run() must raise"
+        except RequestCancelled:
+            pass
+        elapsed = time.perf_counter() - start
+
+        # Nothing new starts once the request is cancelled
+        try:
+            cancellation.run(SLEEPER)
+            assert False, "run() must refuse to start after cancel()"
+        except RequestCancelled:
+            pass
+        return killed, elapsed
+
+    killed, elapsed = asyncio.run(run())
+    print(f"  Processos mortos: {killed} em {elapsed * 1000:.0f} ms")
+    assert killed == 1
+    assert elapsed < 5
+
+    # Outside a request (no scope) it behaves like subprocess.run
+    result = cancellation.run([sys.executable, "-c", "print('oi')"], capture_output=True, text=True)
+    assert result.returncode == 0 and result.stdout.strip() == "oi"
+
+    print("✅ ESCOPO DE CANCELAMENTO OK!\n")
+
+
+async def cancel_when(agent: Agent, text: str, predicate, delay: float = 0.0) -> tuple[list[dict], float]:
+    """
+    Run a request and cancel its task `delay` seconds after an event matches
+    `predicate`. Returns the events and how long the cancellation took.
+    """
+    events = []
+    seen = asyncio.Event()
+
+    async def consume():
+        async for event in agent.process_message(text):
+            events.append(event)
+            if predicate(event):
+                seen.set()
+
+    task = asyncio.create_task(consume())
+    await asyncio.wait_for(seen.wait(), 10)
+    await asyncio.sleep(delay)
+    start = time.perf_counter()
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    return events, time.perf_counter() - start
+
+
+def test_cancel_stream():
+    print("⏹️ TESTE DO CANCELAMENTO DURANTE A GERAÇÃO")
+    print("-" * 40)
+
+    base_url = config.OLLAMA_BASE_URL
+
+    async def run(mock):
+        config.OLLAMA_BASE_URL = mock.base_url
+        agent = Agent(ollama=OllamaClient())
+        try:
+            events, _ = await cancel_when(agent, "me conta uma história bem longa", lambda e: e["type"] == "token")
+            await asyncio.sleep(0.5)  # Let the server notice the hang-up
+            return events, agent.history.messages
+        finally:
+            await agent.close()
+
+    try:
+        with MockOllama(script=[Reply("era uma vez " * 200, token_delay=0.02)]) as mock:
+            events, history = asyncio.run(run(mock))
+    finally:
+        config.OLLAMA_BASE_URL = base_url
+
+    print(f"  Eventos: {len(events)}, streams abortados: {mock.aborted}")
+    assert all(event["type"] == "token" for event in events)
+    assert mock.aborted == 1
+    assert len(mock.requests) == 1
+    assert [m["role"] for m in history] == ["user", "assistant"]
+    assert history[-1]["content"] == CANCELLED_REPLY
+
+    print("✅ CANCELAMENTO DURANTE A GERAÇÃO OK!\n")
+
+
+def test_cancel_tool_process():
+    print("🛑 TESTE DO CANCELAMENTO DE UM COMANDO EM EXECUÇÃO")
+    print("-" * 40)
+
+    base_url = config.OLLAMA_BASE_URL
+    command = " ".join(f'"{part}"' for part in SLEEPER)
+    script = [
+        Reply("Rodando...", [call("run_command", command=command, timeout=60)]),
+        Reply("Não deveria chegar aqui."),
+    ]
+    killed_before = cancellation.counters["processes_killed"]
+
+    async def run(mock):
+        config.OLLAMA_BASE_URL = mock.base_url
+        agent = Agent(ollama=OllamaClient())
+        try:
+            # Give the worker thread time to start the process
+            return await cancel_when(agent, "execute o comando de teste e depois rode o outro",
+                                     lambda e: e["type"] == "tool_call", delay=0.5)
+        finally:
+            await agent.close()
+
+    try:
+        with MockOllama(script=script) as mock:
+            events, elapsed = asyncio.run(run(mock))
+    finally:
+        config.OLLAMA_BASE_URL = base_url
+
+    killed = cancellation.counters["processes_killed"] - killed_before
+    print(f"  Tempo até cancelar: {elapsed * 1000:.0f} ms, processos mortos: {killed}")
+    assert "tool_result" not in [event["type"] for event in events]
+    assert len(mock.requests) == 1  # No further iteration
+    assert killed == 1
+    assert elapsed < 5
+
+    print("✅ CANCELAMENTO DE COMANDO OK!\n")
+
+
+if __name__ == "__main__":
+    test_scope_kills_processes()
+    test_cancel_stream()
+    test_cancel_tool_process()
+    print("🎉 TODOS OS TESTES PASSARAM!")
@@ -16,14 +16,14 @@ async def send_message(ws, content):
             response = await asyncio.wait_for(ws.recv(), timeout=30.0)
             data = json.loads(response)
             
-            if data.get("type") == "message":
+            if data.get("type") == "token":
                 chunk = data.get("content", "")
                 response_text += chunk
                 print(chunk, end="", flush=True)
-                
-                if data.get("is_final"):
-                    print("\n[END MESSAGE]")
-                    return response_text
+            
+            elif data.get("type") == "response":
+                print("\n[END MESSAGE]")
+                return data.get("content", response_text)
             
             elif data.get("type") == "tool_call":
                 print(f"\n[TOOL CALL]: {data.get('tool_name')} args={data.get('tool_args')}")
@@ -0,0 +1,94 @@
+"""
+Test suite for the chat-only mode
+- Conversation is sent with the short prompt and no tool schemas
+- The action marker switches the turn back to the full prompt with tools
+- The marker is never shown to the user
+"""
+
+import sys
+sys.path.insert(0, '.')
+
+from benchmarks import stubs
+stubs.install(psutil=False)
+
+import asyncio
+from benchmarks.mock_ollama import MockOllama, Reply, call
+from core.agent import Agent, ACTION_MARKER, CHAT_PROMPT, SYSTEM_PROMPT
+from core.history import estimate_tokens
+from core.ollama_client import OllamaClient
+import config
+
+
+def run_turn(script: list[Reply], text: str):
+    base_url = config.OLLAMA_BASE_URL
+
+    async def run(mock):
+        config.OLLAMA_BASE_URL = mock.base_url
+        agent = Agent(ollama=OllamaClient())
+        try:
+            return [event async for event in agent.process_message(text)]
+        finally:
+            await agent.close()
+
+    try:
+        with MockOllama(script=script) as mock:
+            events = asyncio.run(run(mock))
+    finally:
+        config.OLLAMA_BASE_URL = base_url
+    return mock, events
+
+
+def tokens(events: list[dict]) -> str:
+    return "".join(e["content"] for e in events if e["type"] == "token")
+
+
+def test_chat_turn():
+    print("💬 TESTE DO MODO CONVERSA")
+    print("-" * 40)
+
+    mock, events = run_turn([Reply("Corinthians, claro! 🖤🤍")], "qual o maior time do Brasil?")
+    request = mock.requests[0]
+    assert "tools" not in request
+    assert request["messages"][0]["content"] == CHAT_PROMPT
+    assert tokens(events) == "Corinthians, claro! 🖤🤍"
+    assert events[-1]["content"] == "Corinthians, claro! 🖤🤍"
+
+    print(f"  Prompt: {estimate_tokens(CHAT_PROMPT)} tokens (completo: {estimate_tokens(SYSTEM_PROMPT)} + ferramentas)")
+    assert estimate_tokens(CHAT_PROMPT) < estimate_tokens(SYSTEM_PROMPT) / 2
+
+    print("✅ MODO CONVERSA OK!\n")
+
+
+def test_switch_to_tools():
+    print("🔀 TESTE DA TROCA PARA FERRAMENTAS")
+    print("-" * 40)
+
+    script = [
+        Reply(ACTION_MARKER),
+        Reply("Calculando", [call("calculate", expression="3*3")]),
+        Reply("Deu 9."),
+    ]
+    mock, events = run_turn(script, "me dá uma força aqui no computador?")
+    assert "tools" not in mock.requests[0]
+    assert "tools" in mock.requests[1]
+    assert mock.requests[1]["messages"][0]["content"] == SYSTEM_PROMPT
+    types = [e["type"] for e in events]
+    print(f"  Eventos: {types}")
+    # The marker was held back, so there is nothing to retract
+    assert "retract" not in types and ACTION_MARKER not in tokens(events)
+    assert events[-1]["content"] == "Deu 9."
+
+    # A marker after some text retracts what was streamed
+    script = [Reply(f"Claro! {ACTION_MARKER}"), Reply("", [call("calculate", expression="1+1")]), Reply("Tudo certo.")]
+    mock, events = run_turn(script, "me dá uma força aqui no computador?")
+    types = [e["type"] for e in events]
+    assert "retract" in types
+    assert events[-1]["content"] == "Tudo certo."
+
+    print("✅ TROCA PARA FERRAMENTAS OK!\n")
+
+
+if __name__ == "__main__":
+    test_chat_turn()
+    test_switch_to_tools()
+    print("🎉 TODOS OS TESTES PASSARAM!")
@@ -0,0 +1,134 @@
+"""
+Test suite for adaptive context sizing
+- num_ctx is rounded up to a bucket within the min/max limits
+- Buckets grow at once but only shrink after a quiet period
+- Warm-up loads models with the bucket their first request keeps
+- Requests carry num_ctx and the num_predict cap of their class
+- ADAPTIVE_CONTEXT off keeps the fixed OLLAMA_NUM_CTX
+"""
+
+import sys
+sys.path.insert(0, '.')
+
+from benchmarks import stubs
+stubs.install(psutil=False)
+
+import asyncio
+from benchmarks.mock_ollama import MockOllama, Reply
+from core.context_size import ContextSizer, prompt_tokens
+from core.ollama_client import OllamaClient
+import config
+
+
+def test_buckets():
+    print("🪣 TESTE DOS BUCKETS DE CONTEXTO")
+    print("-" * 40)
+
+    sizer = ContextSizer()
+    assert sizer.bucket_for(100) == 2048
+    assert sizer.bucket_for(2049) == 4096
+    assert sizer.bucket_for(10 ** 6) == config.NUM_CTX_MAX
+
+    saved = config.NUM_CTX_MIN
+    config.NUM_CTX_MIN = 4096
+    try:
+        assert sizer.bucket_for(100) == 4096
+    finally:
+        config.NUM_CTX_MIN = saved
+
+    # Images count much more than their base64 text suggests
+    image = [{"role": "user", "content": "o que tem aqui?", "images": ["aGVsbG8="]}]
+    assert prompt_tokens(image) > 700
+
+    print("✅ BUCKETS OK!\n")
+
+
+def test_sticky():
+    print("📌 TESTE DA HISTERESE DO CONTEXTO")
+    print("-" * 40)
+
+    saved = config.ADAPTIVE_CONTEXT, config.NUM_CTX_SHRINK_AFTER
+    config.ADAPTIVE_CONTEXT = True
+    try:
+        sizer = ContextSizer()
+        assert sizer.num_ctx("m", 200, 300) == 2048
+        assert sizer.num_ctx("m", 5000) == 8192  # Grows at once
+        assert sizer.num_ctx("m", 200, 300) == 8192  # No reload right after
+        assert sizer.num_ctx("other", 200, 300) == 2048  # Per model
+        assert sizer.switches == 1
+
+        config.NUM_CTX_SHRINK_AFTER = 0
+        assert sizer.num_ctx("m", 200, 300) == 2048
+        assert sizer.switches == 2
+        print(f"  Estatísticas: {sizer.stats()}")
+    finally:
+        config.ADAPTIVE_CONTEXT, config.NUM_CTX_SHRINK_AFTER = saved
+
+    print("✅ HISTERESE OK!\n")
+
+
+def test_warmup_bucket():
+    print("🔥 TESTE DO CONTEXTO DE AQUECIMENTO")
+    print("-" * 40)
+
+    saved = config.ADAPTIVE_CONTEXT
+    config.ADAPTIVE_CONTEXT = True
+    try:
+        sizer = ContextSizer()
+        assert sizer.current("chat") == config.NUM_CTX_WARMUP
+        assert sizer.current(config.OLLAMA_VISION_MODEL) == 2048
+        # A smaller first request keeps the warmed context; a bigger one grows it
+        assert sizer.num_ctx("chat", 200, 300) == config.NUM_CTX_WARMUP
+        assert sizer.switches == 0
+        assert sizer.num_ctx("chat", 12000) == 16384
+        assert sizer.current("chat") == 16384  # Pings follow the loaded size
+        config.ADAPTIVE_CONTEXT = False
+        assert sizer.current("chat") == config.OLLAMA_NUM_CTX
+    finally:
+        config.ADAPTIVE_CONTEXT = saved
+
+    print("✅ CONTEXTO DE AQUECIMENTO OK!\n")
+
+
+def test_request_options():
+    print("📤 TESTE DAS OPÇÕES ENVIADAS AO OLLAMA")
+    print("-" * 40)
+
+    saved = config.OLLAMA_BASE_URL, config.ADAPTIVE_CONTEXT, config.NUM_CTX_SHRINK_AFTER
+
+    async def run(mock):
+        config.OLLAMA_BASE_URL = mock.base_url
+        client = OllamaClient()
+        try:
+            messages = [{"role": "user", "content": "oi"}]
+            await client.chat(messages, request_class="summary")
+            await client.chat(messages)
+            config.ADAPTIVE_CONTEXT = False
+            await client.chat(messages, request_class="chat")
+        finally:
+            await client.close()
+
+    try:
+        # Earlier tests may have left the shared sizer on a large bucket
+        config.ADAPTIVE_CONTEXT, config.NUM_CTX_SHRINK_AFTER = True, 0
+        with MockOllama(script=[Reply("ok")] * 3) as mock:
+            asyncio.run(run(mock))
+    finally:
+        config.OLLAMA_BASE_URL, config.ADAPTIVE_CONTEXT, config.NUM_CTX_SHRINK_AFTER = saved
+
+    summary, unclassed, fixed = (r["options"] for r in mock.requests)
+    print(f"  summary: {summary} | sem classe: {unclassed} | fixo: {fixed}")
+    assert summary["num_predict"] == config.NUM_PREDICT["summary"]
+    assert summary["num_ctx"] <= 4096
+    assert "num_predict" not in unclassed
+    assert fixed["num_ctx"] == config.OLLAMA_NUM_CTX
+
+    print("✅ OPÇÕES OK!\n")
+
+
+if __name__ == "__main__":
+    test_buckets()
+    test_sticky()
+    test_warmup_bucket()
+    test_request_options()
+    print("🎉 TODOS OS TESTES PASSARAM!")
@@ -0,0 +1,95 @@
+"""
+Test suite for the fast-path router
+- Simple requests are routed to the right tool with the right arguments
+- Anything ambiguous falls through to the LLM
+- Routed requests are answered and recorded without calling the model
+"""
+
+import sys
+sys.path.insert(0, '.')
+
+import asyncio
+from core.agent import Agent
+from core.fast_path import fast_path
+
+
+ROUTED = {
+    "Que horas são?": ("time", None, {}),
+    "que dia é hoje": ("date", None, {}),
+    "Quanto é 15% de 380?": ("percent", "calculate", {"expression": "15 / 100 * 380"}),
+    "calcule 1.234,5 x 2": ("math", "calculate", {"expression": "1234.5 * 2"}),
+    # A dot before groups of three digits separates thousands
+    "quanto é 15% de 1.500": ("percent", "calculate", {"expression": "15 / 100 * 1500"}),
+    "quanto é 1.000 + 250": ("math", "calculate", {"expression": "1000 + 250"}),
+    "quanto é 2.5 x 4": ("math", "calculate", {"expression": "2.5 * 4"}),
+    "Qual a cotação do dólar hoje?": ("exchange", "get_exchange_rate", {"from_currency": "USD", "to_currency": "BRL"}),
+    "quanto vale 1 btc?": ("crypto", "get_crypto_price", {"coin": "bitcoin", "currency": "brl"}),
+    "Como está o tempo em São Paulo?": ("weather", "get_weather", {"city": "São Paulo"}),
+    "clima em Recife hoje": ("weather", "get_weather", {"city": "Recife"}),
+}
+
+NOT_ROUTED = [
+    "abra o chrome e pesquise receitas",
+    "quanto é a vida?",
+    "temperatura de hoje",
+    "quanto é 1.23,4 + 1",
+    "quanto é 10% de 1,234,5",
+    "como vai o tempo no Rio de Janeiro amanhã",
+    "clima em Curitiba hoje à noite",
+    "qual a cotação do dólar e do euro e qual vale mais a pena comprar?",
+]
+
+
+class NoModel:
+    """Ollama stand-in that fails the test if the model is called."""
+
+    async def chat(self, *args, **kwargs):
+        raise AssertionError("O modelo não deveria ser chamado")
+
+    async def chat_stream(self, *args, **kwargs):
+        raise AssertionError("O modelo não deveria ser chamado")
+        yield
+
+
+def test_routing():
+    print("🧭 TESTE DE ROTEAMENTO")
+    print("-" * 40)
+
+    for query, expected in ROUTED.items():
+        plan = fast_path.route(query)
+        print(f"  {query!r} -> {plan and plan.intent}")
+        assert plan is not None, f"{query!r} não foi roteado"
+        assert (plan.intent, plan.tool_name, plan.tool_args) == expected
+
+    for query in NOT_ROUTED:
+        assert fast_path.route(query) is None, f"{query!r} não deveria ser roteado"
+
+    print("✅ ROTEAMENTO OK!\n")
+
+
+def test_direct_answer():
+    print("⚡ TESTE DE RESPOSTA DIRETA")
+    print("-" * 40)
+
+    async def run():
+        agent = Agent(ollama=NoModel())
+        events = [event async for event in agent.process_message("quanto é 15% de 380")]
+        return agent, events
+
+    agent, events = asyncio.run(run())
+    types = [event["type"] for event in events]
+    print(f"  Eventos: {types}")
+    assert types == ["tool_call", "tool_result", "trace", "response"]
+    assert "57" in events[-1]["content"]
+
+    # The exchange is recorded like any other turn
+    assert [m["role"] for m in agent.history.messages] == ["user", "assistant"]
+    assert agent.history.messages[-1]["content"] == events[-1]["content"]
+
+    print("✅ RESPOSTA DIRETA OK!\n")
+
+
+if __name__ == "__main__":
+    test_routing()
+    test_direct_answer()
+    print("🎉 TODOS OS TESTES PASSARAM!")
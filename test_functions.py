@@ -22,8 +22,12 @@ async def test_jarvis():
             await ws.send(json.dumps({'type': 'message', 'content': prompt}))
             
             try:
-                response = await asyncio.wait_for(ws.recv(), timeout=90)
-                data = json.loads(response)
+                # Skip streamed tokens/tool events until the final response
+                while True:
+                    response = await asyncio.wait_for(ws.recv(), timeout=90)
+                    data = json.loads(response)
+                    if data.get('type') in ('response', 'error'):
+                        break
                 content = data.get('content', str(data))
                 print(f"Resposta:\n{content[:600]}")
                 if len(content) > 600:
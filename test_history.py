@@ -0,0 +1,57 @@
+"""
+Test suite for the token-budgeted conversation history
+- Recent turns stay inside the budget
+- Old turns are folded into a running summary
+"""
+
+import sys
+sys.path.insert(0, '.')
+
+import asyncio
+
+from core.history import ConversationHistory
+
+
+class FakeOllama:
+    """Returns a fixed summary instead of calling the model."""
+    
+    def __init__(self):
+        self.calls = 0
+    
+    async def chat(self, messages, **kwargs):
+        self.calls += 1
+        return {"message": {"role": "assistant", "content": "- Usuário prefere o Brave"}}
+
+
+def test_budget_and_summary():
+    print("📚 TESTE DE HISTÓRICO")
+    print("-" * 40)
+    
+    async def run():
+        ollama = FakeOllama()
+        history = ConversationHistory(ollama, budget=300)
+        
+        for turn in range(20):
+            history.append({"role": "user", "content": f"mensagem {turn} " + "x" * 150})
+            history.append({"role": "assistant", "content": "resposta " + "y" * 150})
+            history.maybe_summarize()
+            await asyncio.sleep(0)  # Let the background summary run
+            
+            prompt = history.for_prompt()
+            prompt_tokens = sum(len(m["content"]) // 4 + 5 for m in prompt)
+            assert prompt_tokens <= 300 + 50, f"Prompt estourou o orçamento: {prompt_tokens}"
+        
+        print(f"  Mensagens guardadas: {len(history.messages)} | resumos gerados: {ollama.calls}")
+        print(f"  Primeira mensagem do prompt: {history.for_prompt()[0]['content'][:50]}")
+        assert ollama.calls > 0, "Turnos antigos nunca foram resumidos!"
+        assert history.summary == "- Usuário prefere o Brave"
+        assert len(history.messages) < 40, "Histórico cresceu sem limite!"
+        assert history.for_prompt()[-1]["content"].startswith("resposta")
+    
+    asyncio.run(run())
+    print("✅ HISTÓRICO OK!\n")
+
+
+if __name__ == "__main__":
+    test_budget_and_summary()
+    print("🎉 TODOS OS TESTES PASSARAM!")
@@ -0,0 +1,138 @@
+"""
+Test suite for tool loop detection
+- Exact repeats of read-only tools reuse the first result; side effects forget it
+- Repeated iterations (A→A, A→B→A→B) are detected; repeated side effects alone are not
+- A model stuck calling the same tool is hinted, then made to answer without tools
+"""
+
+import sys
+sys.path.insert(0, '.')
+
+from benchmarks import stubs
+stubs.install(psutil=False)
+
+import asyncio
+import config
+from benchmarks.mock_ollama import MockOllama, Reply, call
+from core.agent import Agent
+from core.loop_guard import LoopGuard, HINT, STOP, LOOP_HINT, LOOP_STOP, counters
+from core.ollama_client import OllamaClient
+from core.tools import registry
+
+
+def test_memo():
+    print("🧠 TESTE DA MEMÓRIA DE CHAMADAS")
+    print("-" * 40)
+
+    guard = LoopGuard()
+    result = {"success": True, "result": 42}
+    guard.record("calculate", {"expression": "6*7"}, result)
+    assert guard.lookup("calculate", {"expression": "6*7"}) is result
+    assert guard.lookup("calculate", {"expression": "6*8"}) is None
+
+    # Failures are not kept, and a side effect forgets everything
+    guard.record("calculate", {"expression": "1/0"}, {"success": False, "error": "divisão por zero"})
+    assert guard.lookup("calculate", {"expression": "1/0"}) is None
+    assert not registry.get("press_key").independent
+    guard.record("press_key", {"key": "enter"}, {"success": True})
+    assert guard.lookup("calculate", {"expression": "6*7"}) is None
+
+    # A tool that failed (e.g. OCR without Tesseract) is asked again
+    ocr_missing = {"success": False, "error": "Tesseract OCR não encontrado."}
+    guard.record("read_screen_text", {}, ocr_missing)
+    assert guard.lookup("read_screen_text", {}) is None
+    print(f"  Acertos: {guard.memo_hits}")
+    assert guard.memo_hits == 1
+
+    print("✅ MEMÓRIA DE CHAMADAS OK!\n")
+
+
+def step(guard: LoopGuard, tool_name: str, tool_args: dict, result=None):
+    """One iteration running a single call."""
+    guard.record(tool_name, tool_args, result or {"success": True})
+    return guard.observe()
+
+
+def test_cycles():
+    print("🔄 TESTE DE DETECÇÃO DE CICLOS")
+    print("-" * 40)
+
+    look = ("get_active_window", {})
+    click = ("mouse_click", {"x": 10, "y": 20})
+
+    guard = LoopGuard()
+    verdicts = [step(guard, *look) for _ in range(3)]
+    print(f"  A→A→A: {verdicts}")
+    assert verdicts == [None, HINT, STOP]
+
+    guard = LoopGuard()
+    verdicts = [step(guard, *calls) for calls in (look, click, look, click, look)]
+    print(f"  A→B→A→B→A: {verdicts}")
+    assert verdicts == [None, None, None, HINT, STOP]
+
+    # Pressing the same key again is usually on purpose
+    guard = LoopGuard()
+    assert [step(guard, "press_key", {"key": "down"}) for _ in range(4)] == [None] * 4
+
+    # Scrolling and reading new text each time is progress, not a loop
+    guard = LoopGuard()
+    verdicts = []
+    for page in range(3):
+        verdicts.append(step(guard, "mouse_scroll", {"amount": -5}))
+        verdicts.append(step(guard, "read_screen_text", {}, {"success": True, "text": f"página {page}"}))
+    assert verdicts == [None] * 6
+
+    # Argument order doesn't make a call different
+    guard = LoopGuard()
+    step(guard, "web_search", {"query": "clima", "max_results": 3})
+    assert step(guard, "web_search", {"max_results": 3, "query": "clima"}) == HINT
+
+    print("✅ DETECÇÃO DE CICLOS OK!\n")
+
+
+def test_stuck_model():
+    print("🛑 TESTE DO MODELO EM LOOP")
+    print("-" * 40)
+
+    def stuck(body: dict) -> Reply:
+        # Calls the same tool for as long as tools are offered
+        if body.get("tools"):
+            return Reply(tool_calls=[call("calculate", expression="6*7")])
+        return Reply("Deu 42.")
+
+    async def run(mock: MockOllama) -> list[dict]:
+        agent = Agent(ollama=OllamaClient())
+        try:
+            return [event async for event in agent.process_message("me ajuda com uma conta de multiplicar")]
+        finally:
+            await agent.close()
+
+    base_url, chat_only = config.OLLAMA_BASE_URL, config.CHAT_ONLY_MODE
+    config.CHAT_ONLY_MODE = False  # Offer tools from the first call
+    saved, hits = counters["iterations_saved"], counters["memo_hits"]
+    try:
+        with MockOllama(responder=stuck) as mock:
+            config.OLLAMA_BASE_URL = mock.base_url
+            events = asyncio.run(run(mock))
+    finally:
+        config.OLLAMA_BASE_URL, config.CHAT_ONLY_MODE = base_url, chat_only
+
+    calls = [event for event in events if event["type"] == "tool_call"]
+    print(f"  Chamadas ao modelo: {len(mock.requests)}, à ferramenta: {len(calls)}, "
+          f"repetidas: {counters['memo_hits'] - hits}")
+    assert events[-1] == {"type": "response", "content": "Deu 42."}
+    assert len(mock.requests) == 4 and len(calls) == 3
+    assert counters["memo_hits"] - hits == 2  # Only the first call ran
+    assert any(m["content"] == LOOP_HINT for m in mock.requests[2]["messages"])
+    assert mock.requests[3]["messages"][-1]["content"] == LOOP_STOP
+    assert not mock.requests[3].get("tools")
+    assert counters["iterations_saved"] - saved == config.MAX_TOOL_ITERATIONS - 4
+
+    print("✅ MODELO EM LOOP OK!\n")
+
+
+if __name__ == "__main__":
+    test_memo()
+    test_cycles()
+    test_stuck_model()
+    print("🎉 TODOS OS TESTES PASSARAM!")
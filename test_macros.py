@@ -0,0 +1,147 @@
+"""
+Test suite for learned task macros
+- Message spans that became tool arguments turn into slots; a slot is free once it varied
+- Read-only and destructive tools, and messages made only of slots, are not learned
+- A repeated request is replayed without the LLM; a failed step hands over to the LLM
+"""
+
+import sys
+sys.path.insert(0, '.')
+
+from benchmarks import stubs
+stubs.install(psutil=False)
+
+import asyncio
+import tempfile
+from pathlib import Path
+
+import config
+from benchmarks.mock_ollama import MockOllama, Reply, call
+from core.agent import Agent
+from core.macros import MacroStore, macros
+from core.ollama_client import OllamaClient
+from core.tools import registry
+
+
+def typed(text: str) -> list:
+    """The calls the model makes for "digita X e aperta enter"."""
+    return [(
+        "type_into_application", {"text": text, "use_clipboard": False},
+        {"success": True, "action": f"Digitado: '{text}'", "length": len(text)}
+    ), ("press_key", {"key": "enter"}, {"success": True, "action": "Tecla 'enter' pressionada 1x"})]
+
+
+def test_learning():
+    print("📝 TESTE DO APRENDIZADO DE MACROS")
+    print("-" * 40)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = MacroStore(Path(tmp) / "macros.json")
+        assert store.record("digita bom dia e aperta enter", typed("bom dia"), "Pronto! Digitei bom dia ✅")
+        assert store.match("digita bom dia e aperta enter") is None, "one run is not enough"
+
+        assert store.record("Digita bom dia e aperta Enter!", typed("bom dia"), "Feito, digitei bom dia ✅")
+        plan = store.match("digita bom dia e aperta enter")
+        assert plan.steps[0] == ("type_into_application", {"text": "bom dia", "use_clipboard": False})
+        # The slot was only seen with "bom dia"
+        assert store.match("digita boa noite e aperta enter") is None
+
+        store.record("digita boa noite e aperta enter", typed("boa noite"), "Feito, digitei boa noite ✅")
+        plan = store.match("Digita Até amanhã e aperta enter")
+        print(f"  Passos: {plan.steps}")
+        assert plan.steps == [("type_into_application", {"text": "Até amanhã", "use_clipboard": False}),
+                              ("press_key", {"key": "enter"})]
+        results = [result for _, _, result in typed("Até amanhã")]
+        assert store.replayed(plan, results) == "Feito, digitei Até amanhã ✅"
+
+        # Survives a restart
+        assert MacroStore(store.path).match("digita tchau e aperta enter") is not None
+
+        # Read-only tools answer with their result; a message of slots only matches anything
+        weather = [("get_weather", {"city": "Recife"}, {"success": True, "current": {"temperature": "30°C"}})]
+        assert not store.record("clima em Recife", weather, "Faz 30°C em Recife")
+        assert not store.record("enter", [typed("x")[1]], "Apertei enter")
+
+        # Deleting or closing the wrong target from a loose match can't be undone
+        delete = [("delete_file", {"path": "notas.txt"}, {"success": True, "message": "Arquivo excluído"})]
+        assert registry.get("delete_file").destructive
+        assert not store.record("apaga o arquivo notas.txt", delete, "Apaguei notas.txt 🗑️")
+        close = [("close_program", {"name": "chrome"}, {"success": True})]
+        assert not store.record("fecha o chrome", close, "Fechei o chrome")
+        # Arbitrary code is flagged the same way
+        assert all(registry.get(name).destructive for name in ("run_command", "run_powershell", "python_repl"))
+        print(f"  Estatísticas: {store.stats()}")
+
+    print("✅ APRENDIZADO DE MACROS OK!\n")
+
+
+def test_replay():
+    print("🎬 TESTE DA REPETIÇÃO SEM LLM")
+    print("-" * 40)
+
+    def llm_run(text: str) -> list:
+        return [
+            Reply(tool_calls=[call("type_into_application", text=text, use_clipboard=False), call("press_key", key="enter")]),
+            Reply(f"Pronto! Digitei {text} e apertei enter ✅"),
+        ]
+
+    script = llm_run("bom dia") + llm_run("bom dia") + llm_run("boa noite") + [Reply("Não consegui apertar enter 😕")]
+
+    async def session(mock: MockOllama) -> list[tuple[int, list[dict]]]:
+        """(LLM calls, events) of each request, the last one with press_key failing."""
+        agent = Agent(ollama=OllamaClient())
+        outcome = []
+        try:
+            for text in ("bom dia", "bom dia", "bom dia", "boa noite", "Oi gente"):
+                before = len(mock.requests)
+                events = [event async for event in agent.process_message(f"digita {text} e aperta enter")]
+                outcome.append((len(mock.requests) - before, events))
+
+            # Loaded by now (not the manifest placeholder)
+            press_key = registry.get("press_key")
+            handler = press_key.handler
+            press_key.handler = lambda key, presses=1: {"success": False, "error": "teclado travado"}
+            try:
+                before = len(mock.requests)
+                events = [event async for event in agent.process_message("digita tchau e aperta enter")]
+                outcome.append((len(mock.requests) - before, events))
+            finally:
+                press_key.handler = handler
+        finally:
+            await agent.close()
+        return outcome
+
+    base_url, chat_only, path = config.OLLAMA_BASE_URL, config.CHAT_ONLY_MODE, macros.path
+    config.CHAT_ONLY_MODE = False
+    with tempfile.TemporaryDirectory() as tmp:
+        macros.path = Path(tmp) / "macros.json"
+        macros.load()
+        try:
+            with MockOllama(script=script) as mock:
+                config.OLLAMA_BASE_URL = mock.base_url
+                outcome = asyncio.run(session(mock))
+        finally:
+            config.OLLAMA_BASE_URL, config.CHAT_ONLY_MODE, macros.path = base_url, chat_only, path
+            macros.load()
+
+    llm_calls = [calls for calls, _ in outcome]
+    print(f"  Chamadas ao LLM por pedido: {llm_calls}")
+    assert llm_calls == [2, 2, 0, 2, 0, 1]
+
+    events = outcome[4][1]
+    assert [e["tool_args"] for e in events if e["type"] == "tool_call"][0]["text"] == "Oi gente"
+    assert events[-1] == {"type": "response", "content": "Pronto! Digitei Oi gente e apertei enter ✅"}
+
+    events = outcome[5][1]
+    assert events[-1]["content"] == "Não consegui apertar enter 😕"
+    note = mock.requests[-1]["messages"][-1]["content"]
+    assert "press_key" in note and "FALHOU" in note
+    print(f"  Nota ao LLM: {note.splitlines()[-1][:80]}")
+
+    print("✅ REPETIÇÃO SEM LLM OK!\n")
+
+
+if __name__ == "__main__":
+    test_learning()
+    test_replay()
+    print("🎉 TODOS OS TESTES PASSARAM!")
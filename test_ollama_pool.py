@@ -0,0 +1,135 @@
+"""
+Test suite for the shared Ollama client
+- One pooled client per server, reused across calls and recreated after close
+- Tools receive it by injection, never from the model's arguments
+- analyze_screen reuses the pooled connection
+- A reply that stalls mid-stream fails with the read timeout
+"""
+
+import sys
+sys.path.insert(0, '.')
+
+from benchmarks import stubs
+stubs.install(psutil=False)
+
+import asyncio
+from benchmarks.mock_ollama import MockOllama, Reply
+from core.ollama_client import OllamaClient, OllamaClientRegistry, clients
+from core.tools import ToolRegistry, registry
+from tools import vision  # registers analyze_screen
+import config
+
+
+def test_registry():
+    print("🔌 TESTE DO REGISTRO DE CLIENTES")
+    print("-" * 40)
+
+    async def run():
+        pool = OllamaClientRegistry()
+        first = pool.get("http://127.0.0.1:1")
+        assert pool.get("http://127.0.0.1:1") is first
+        assert pool.get("http://127.0.0.1:2") is not first
+        await pool.close()
+        assert first.client.is_closed
+        assert pool.get("http://127.0.0.1:1") is not first
+        await pool.close()
+
+    asyncio.run(run())
+    print("✅ REGISTRO DE CLIENTES OK!\n")
+
+
+def test_injection():
+    print("💉 TESTE DE INJEÇÃO DE DEPENDÊNCIAS")
+    print("-" * 40)
+
+    tools = ToolRegistry()
+    shared = object()
+    tools.provide("ollama", lambda: shared)
+
+    async def probe(text: str, ollama=None):
+        return {"success": True, "text": text, "same_client": ollama is shared}
+
+    schema = {"type": "object", "properties": {"text": {"type": "string"}}}
+    tools.register("probe", "Probe", schema, probe, inject=("ollama",))
+
+    # The model can't smuggle its own value in
+    result = asyncio.run(tools.execute("probe", {"text": "oi", "ollama": "http://evil"}))
+    assert result == {"success": True, "text": "oi", "same_client": True}
+
+    try:
+        exposed = {"type": "object", "properties": {"ollama": {"type": "string"}}}
+        tools.register("leaky", "Leaky", exposed, probe, inject=("ollama",))
+        assert False, "injected parameters must not be in the schema"
+    except ValueError:
+        pass
+
+    print("✅ INJEÇÃO OK!\n")
+
+
+def test_vision_reuses_pool():
+    print("👁️ TESTE DA VISÃO COM O CLIENTE COMPARTILHADO")
+    print("-" * 40)
+
+    base_url = config.OLLAMA_BASE_URL
+
+    async def run(mock):
+        config.OLLAMA_BASE_URL = mock.base_url
+        try:
+            return [await registry.execute("analyze_screen", {"question": "O que tem na tela?"})
+                    for _ in range(3)]
+        finally:
+            await clients.close()
+
+    try:
+        with MockOllama(script=[Reply("Uma janela do VS Code.")] * 3) as mock:
+            answers = asyncio.run(run(mock))
+    finally:
+        config.OLLAMA_BASE_URL = base_url
+
+    print(f"  Respostas: {answers[0]!r} x{len(answers)}, conexões: {len(mock.connections)}")
+    assert answers == ["Uma janela do VS Code."] * 3
+    assert all(r["model"] == config.OLLAMA_VISION_MODEL for r in mock.requests)
+    assert mock.requests[0]["messages"][-1]["images"]
+    assert len(mock.connections) == 1
+
+    print("✅ VISÃO COM CLIENTE COMPARTILHADO OK!\n")
+
+
+def test_stall_timeout():
+    print("⏳ TESTE DO TIMEOUT ENTRE CHUNKS")
+    print("-" * 40)
+
+    base_url, read_timeout = config.OLLAMA_BASE_URL, config.OLLAMA_READ_TIMEOUT
+    config.OLLAMA_READ_TIMEOUT = 0.2
+
+    async def run(mock):
+        config.OLLAMA_BASE_URL = mock.base_url
+        client = OllamaClient()
+        try:
+            return [chunk async for chunk in client.chat_stream([{"role": "user", "content": "oi"}])]
+        finally:
+            await client.close()
+
+    try:
+        # Slow first token is fine (first-byte budget), a stall mid-reply is not
+        script = [Reply("abcdefgh", chunk_size=4, first_token_delay=0.4), Reply("abcdefgh", chunk_size=4, token_delay=0.6)]
+        with MockOllama(script=script) as mock:
+            ok = asyncio.run(run(mock))
+            stalled = asyncio.run(run(mock))
+    finally:
+        config.OLLAMA_BASE_URL, config.OLLAMA_READ_TIMEOUT = base_url, read_timeout
+
+    assert "error" not in ok[-1] and ok[-1]["done"]
+    print(f"  Erro: {stalled[-1]['error']}")
+    assert "error" in stalled[-1]
+    assert stalled[0]["message"]["content"] == "abcd"
+
+    print("✅ TIMEOUT ENTRE CHUNKS OK!\n")
+
+
+if __name__ == "__main__":
+    test_registry()
+    test_injection()
+    test_vision_reuses_pool()
+    test_stall_timeout()
+    print("🎉 TODOS OS TESTES PASSARAM!")
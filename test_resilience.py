@@ -0,0 +1,144 @@
+"""
+Test suite for the resilient Ollama transport
+- Circuit breaker opens, rejects, probes and closes
+- Connection failures are retried with backoff (before any chunk streamed)
+- With Ollama down, requests get a clear error in seconds and then fail fast
+"""
+
+import sys
+sys.path.insert(0, '.')
+
+from benchmarks import stubs
+stubs.install(psutil=False)
+
+import asyncio
+import json
+import socket
+import time
+import httpx
+from core.agent import Agent
+from core.ollama_client import OllamaClient
+from core.resilience import CircuitBreaker, backoff, CLOSED, OPEN, HALF_OPEN
+import config
+
+
+def flaky_transport(failures: int, body: bytes) -> tuple[httpx.MockTransport, list]:
+    """Transport refusing the first `failures` connections, then answering `body`."""
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        if len(calls) <= failures:
+            raise httpx.ConnectError("Connection refused", request=request)
+        return httpx.Response(200, content=body)
+    return httpx.MockTransport(handler), calls
+
+
+def dead_url() -> str:
+    """URL of a local port nothing listens on."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    return f"http://127.0.0.1:{port}"
+
+
+def test_breaker():
+    print("🔌 TESTE DO CIRCUIT BREAKER")
+    print("-" * 40)
+
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure("boom")
+    assert breaker.state == CLOSED and breaker.allow()
+    breaker.record_failure("boom")
+    assert breaker.state == OPEN and not breaker.allow()
+    assert 0 < breaker.retry_after <= 0.05
+
+    time.sleep(0.06)
+    assert breaker.allow() and breaker.state == HALF_OPEN
+    assert not breaker.allow()  # Only one probe at a time
+    breaker.record_failure("still down")
+    assert breaker.state == OPEN and breaker.times_opened == 2
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED and breaker.allow()
+    print(f"  {breaker.stats()}")
+
+    assert all(0 <= backoff(n, base=0.25, cap=2.0) <= min(2.0, 0.25 * 2 ** n) for n in range(8))
+
+    print("✅ CIRCUIT BREAKER OK!\n")
+
+
+def test_retries():
+    print("🔁 TESTE DE RETENTATIVAS")
+    print("-" * 40)
+
+    reply = {"message": {"role": "assistant", "content": "Voltei!"}, "done": True}
+
+    async def run():
+        client = OllamaClient("http://ollama.test")
+        await client.close()
+        transport, calls = flaky_transport(2, json.dumps(reply).encode())
+        client.client = httpx.AsyncClient(transport=transport)
+        response = await client.chat([{"role": "user", "content": "oi"}])
+
+        chunks = b"".join(json.dumps(c).encode() + b"\n" for c in (
+            {"message": {"content": "Vol"}, "done": False},
+            {"message": {"content": "tei!"}, "done": True},
+        ))
+        stream_transport, stream_calls = flaky_transport(1, chunks)
+        await client.close()
+        client.client = httpx.AsyncClient(transport=stream_transport)
+        streamed = [c async for c in client.chat_stream([{"role": "user", "content": "oi"}])]
+        stats = client.transport_stats()
+        await client.close()
+        return response, calls, streamed, stream_calls, stats
+
+    response, calls, streamed, stream_calls, stats = asyncio.run(run())
+    print(f"  chat: {len(calls)} tentativas, stream: {len(stream_calls)} tentativas, {stats}")
+    assert response["message"]["content"] == "Voltei!" and len(calls) == 3
+    assert "".join(c["message"]["content"] for c in streamed) == "Voltei!" and len(stream_calls) == 2
+    assert stats["retries"] == 3 and stats["circuit"]["state"] == CLOSED
+
+    print("✅ RETENTATIVAS OK!\n")
+
+
+def test_ollama_down():
+    print("🚨 TESTE COM OLLAMA FORA DO AR")
+    print("-" * 40)
+
+    base_url = config.OLLAMA_BASE_URL
+    config.OLLAMA_BASE_URL = dead_url()
+
+    async def run():
+        agent = Agent(ollama=OllamaClient())
+        try:
+            timings = []
+            for _ in range(2):
+                start = time.perf_counter()
+                answer = await agent.get_response("me conta uma curiosidade")
+                timings.append((time.perf_counter() - start, answer))
+            return timings
+        finally:
+            await agent.close()
+
+    try:
+        (first, first_answer), (second, second_answer) = asyncio.run(run())
+    finally:
+        config.OLLAMA_BASE_URL = base_url
+
+    print(f"  1ª: {first:.2f}s → {first_answer[:50]}...")
+    print(f"  2ª: {second * 1000:.1f}ms → {second_answer[:50]}...")
+    assert first < 5 and "Ollama" in first_answer
+    # Retries spent the failure budget: the circuit is open and the next request fails at once
+    assert second < 0.1 and "fora do ar" in second_answer
+
+    print("✅ OLLAMA FORA DO AR OK!\n")
+
+
+if __name__ == "__main__":
+    test_breaker()
+    test_retries()
+    test_ollama_down()
+    print("🎉 TODOS OS TESTES PASSARAM!")
@@ -0,0 +1,115 @@
+"""
+Test suite for tool result shaping
+- Small results pass through untouched
+- Big results fit their budget, keep counts and head/tail, and get a handle
+- fetch_more pages through the full result
+- Pages shrink to the request's remaining budget without skipping data
+"""
+
+import sys
+sys.path.insert(0, '.')
+
+import json
+from core.history import estimate_tokens
+from core.results import ResultStore, current_store, current_page_budget
+from tools.results import fetch_more
+
+
+BIG = {"success": True, "items": [{"name": f"arquivo{i}.txt", "size": i} for i in range(1000)]}
+
+
+def test_small_result():
+    print("📄 TESTE DE RESULTADO PEQUENO")
+    print("-" * 40)
+
+    store = ResultStore()
+    content, handle = store.shape({"success": True, "result": 42}, budget=100)
+    assert handle is None
+    assert json.loads(content) == {"success": True, "result": 42}
+
+    print("✅ RESULTADO PEQUENO OK!\n")
+
+
+def test_big_result():
+    print("📦 TESTE DE RESULTADO GRANDE")
+    print("-" * 40)
+
+    store = ResultStore()
+    content, handle = store.shape(BIG, budget=300)
+    shaped = json.loads(content)
+    print(f"  {estimate_tokens(json.dumps(BIG))} tokens -> {estimate_tokens(content)} tokens")
+
+    assert handle is not None
+    assert estimate_tokens(content) <= 300
+    assert shaped["_truncado"]["handle"] == handle
+    assert shaped["items"][0]["name"] == "arquivo0.txt"
+    assert shaped["items"][-1]["name"] == "arquivo999.txt"
+    assert any("de 1000 itens omitidos" in str(item) for item in shaped["items"])
+
+    # Long strings are cut too
+    content, handle = store.shape({"success": True, "content": "x" * 50000}, budget=300)
+    assert handle is not None and estimate_tokens(content) <= 300
+
+    print("✅ RESULTADO GRANDE OK!\n")
+
+
+def test_fetch_more():
+    print("📖 TESTE DE FETCH_MORE")
+    print("-" * 40)
+
+    store = ResultStore()
+    _, handle = store.shape(BIG, budget=300)
+
+    token = current_store.set(store)
+    try:
+        text, offset, pages = "", 0, 0
+        while offset is not None:
+            page = fetch_more(handle, offset)
+            assert page["success"]
+            text += page["content"]
+            offset = page["next_offset"]
+            pages += 1
+        missing = fetch_more("naoexiste")
+    finally:
+        current_store.reset(token)
+
+    print(f"  {pages} páginas")
+    assert json.loads(text) == BIG
+    assert missing["success"] is False
+
+    print("✅ FETCH_MORE OK!\n")
+
+
+def test_page_budget():
+    print("📏 TESTE DE PÁGINAS NO ORÇAMENTO")
+    print("-" * 40)
+
+    store = ResultStore()
+    _, handle = store.shape(BIG, budget=300)
+
+    token, budget_token = current_store.set(store), current_page_budget.set(150)
+    try:
+        text, offset, sizes = "", 0, []
+        while offset is not None:
+            page = fetch_more(handle, offset)
+            assert page["offset"] == len(text), "no gap before the page"
+            sizes.append(estimate_tokens(json.dumps(page, ensure_ascii=False)))
+            text += page["content"]
+            offset = page["next_offset"]
+    finally:
+        current_page_budget.reset(budget_token)
+        current_store.reset(token)
+
+    print(f"  {len(sizes)} páginas, maior: {max(sizes)} tokens")
+    assert max(sizes) <= 150
+    assert json.loads(text) == BIG
+
+    print("✅ PÁGINAS NO ORÇAMENTO OK!\n")
+
+
+if __name__ == "__main__":
+    test_small_result()
+    test_big_result()
+    test_fetch_more()
+    test_page_budget()
+    print("🎉 TODOS OS TESTES PASSARAM!")
@@ -0,0 +1,126 @@
+"""
+Test suite for multi-model routing
+- Heuristic turn classification (chat, simple_tool, multi_step)
+- Conversation goes to the small model, multi-step work to the large one
+- A missing tool call escalates one rung up and retracts the streamed text
+"""
+
+import sys
+sys.path.insert(0, '.')
+
+from benchmarks import stubs
+stubs.install(psutil=False)
+
+import asyncio
+from benchmarks.mock_ollama import MockOllama, Reply, call
+from core.agent import Agent
+from core.ollama_client import OllamaClient
+from core.router import router, classify_heuristic, CHAT, SIMPLE_TOOL, MULTI_STEP
+import config
+
+
+CASES = [
+    ("oi, tudo bem?", CHAT),
+    ("me conta uma piada", CHAT),
+    ("o que você acha do flamengo esse ano?", CHAT),
+    ("me explica o que é recursão", CHAT),
+    ("abre o chrome", SIMPLE_TOOL),
+    ("como está o clima em curitiba", SIMPLE_TOOL),
+    ("tira um print da tela", SIMPLE_TOOL),
+    ("lista os arquivos da pasta downloads", SIMPLE_TOOL),
+    ("abre o bloco de notas e depois salva um poema na área de trabalho", MULTI_STEP),
+    ("pesquisa o preço da ração e anota num arquivo", MULTI_STEP),
+]
+
+
+def test_classification():
+    print("🧭 TESTE DE CLASSIFICAÇÃO DE TURNOS")
+    print("-" * 40)
+
+    for text, expected in CASES:
+        got = classify_heuristic(text)
+        print(f"  {got:<12} ← {text}")
+        assert got == expected, f"{text!r}: {got} != {expected}"
+
+    # Short follow-ups inherit the previous turn's class
+    assert classify_heuristic("e em Porto Alegre?", previous=SIMPLE_TOOL) == SIMPLE_TOOL
+    assert classify_heuristic("e em Porto Alegre?", previous=None) == CHAT
+
+    print("✅ CLASSIFICAÇÃO OK!\n")
+
+
+def run_turn(script: list[Reply], text: str):
+    base_url = config.OLLAMA_BASE_URL
+
+    async def run(mock):
+        config.OLLAMA_BASE_URL = mock.base_url
+        agent = Agent(ollama=OllamaClient())
+        try:
+            return [event async for event in agent.process_message(text)]
+        finally:
+            await agent.close()
+
+    try:
+        with MockOllama(script=script) as mock:
+            events = asyncio.run(run(mock))
+    finally:
+        config.OLLAMA_BASE_URL = base_url
+    return mock, events
+
+
+def test_routing():
+    print("🪜 TESTE DA ESCADA DE MODELOS")
+    print("-" * 40)
+
+    small, large = config.MODEL_LADDER[0], config.MODEL_LADDER[-1]
+
+    mock, events = run_turn([Reply("Haha, essa é boa!")], "me conta uma piada")
+    assert [r["model"] for r in mock.requests] == [small]
+    assert events[-1]["content"] == "Haha, essa é boa!"
+
+    script = [Reply("Abrindo...", [call("calculate", expression="1+1")]), Reply("Pronto!")]
+    mock, events = run_turn(script, "abre o bloco de notas e depois salva um poema na área de trabalho")
+    assert [r["model"] for r in mock.requests] == [large, large]
+
+    print(f"  Conversa → {small}, várias etapas → {large}")
+    print("✅ ESCADA DE MODELOS OK!\n")
+
+
+def test_escalation():
+    print("⬆️ TESTE DE ESCALONAMENTO")
+    print("-" * 40)
+
+    small, large = config.MODEL_LADDER[0], config.MODEL_LADDER[-1]
+    before = router.stats()["models"].get(small, {}).get("escalations", 0)
+
+    # The small model answers in prose instead of calling a tool
+    script = [
+        Reply("Claro, o Chrome é um navegador muito bom!"),
+        Reply("Abrindo o Chrome", [call("calculate", expression="2+2")]),
+        Reply("Pronto!"),
+    ]
+    mock, events = run_turn(script, "abre o chrome")
+    models = [r["model"] for r in mock.requests]
+    types = [e["type"] for e in events]
+    print(f"  Modelos: {models}")
+    assert models == [small, large, large]
+    assert types.index("retract") < types.index("tool_call")
+    assert events[-1]["content"] == "Pronto!"
+
+    # A tool name the registry doesn't know also escalates
+    script = [Reply("", [call("abrir_navegador", nome="chrome")]), Reply("Tudo certo por aqui.")]
+    mock, events = run_turn(script, "me conta uma piada")
+    assert [r["model"] for r in mock.requests] == [small, large]
+
+    stats = router.stats()["models"]
+    assert stats[small]["escalations"] == before + 2
+    assert stats[large]["calls"] >= 3
+
+    print("✅ ESCALONAMENTO OK!\n")
+
+
+if __name__ == "__main__":
+    test_classification()
+    test_routing()
+    test_escalation()
+    print("🎉 TODOS OS TESTES PASSARAM!")
@@ -0,0 +1,119 @@
+"""
+Test suite for the request scheduler
+- Interactive requests get a slot even with background work queued
+- Sessions take turns instead of running in arrival order
+- A full queue rejects with a retry-after
+- Queue positions are reported while waiting; cancelled requests leave the queue
+"""
+
+import sys
+sys.path.insert(0, '.')
+
+import asyncio
+import config
+from core.scheduler import RequestScheduler, QueueFullError, INTERACTIVE, BACKGROUND
+
+
+async def job(scheduler: RequestScheduler, started: list, name: str, session: str,
+              priority: str = INTERACTIVE, hold: float = 0.05, positions: list = None):
+    """Hold a slot for `hold` seconds, recording when it was granted."""
+    async def report(position):
+        positions.append(position)
+
+    async with scheduler.slot(session, priority, on_position=report if positions is not None else None):
+        started.append(name)
+        await asyncio.sleep(hold)
+
+
+def test_priorities():
+    print("🚦 TESTE DE PRIORIDADES")
+    print("-" * 40)
+
+    async def run():
+        scheduler = RequestScheduler(slots=2)
+        started = []
+        background = [asyncio.create_task(job(scheduler, started, f"bg{i}", f"worker{i}", BACKGROUND, hold=0.3))
+                      for i in range(2)]
+        await asyncio.sleep(0.05)
+        # The second background request waits: one slot stays free for users
+        assert started == ["bg0"] and scheduler.queued == 1
+
+        await job(scheduler, started, "hora", "user")
+        assert started == ["bg0", "hora"]
+        await asyncio.gather(*background)
+        return started
+
+    started = asyncio.run(run())
+    print(f"  Ordem: {started}")
+    assert started == ["bg0", "hora", "bg1"]
+
+    print("✅ PRIORIDADES OK!\n")
+
+
+def test_fairness():
+    print("⚖️ TESTE DE JUSTIÇA ENTRE SESSÕES")
+    print("-" * 40)
+
+    async def run():
+        scheduler = RequestScheduler(slots=1)
+        started = []
+        tasks = [asyncio.create_task(job(scheduler, started, f"a{i}", "a")) for i in range(3)]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(job(scheduler, started, "b0", "b")))
+        await asyncio.gather(*tasks)
+        return started
+
+    started = asyncio.run(run())
+    print(f"  Ordem: {started}")
+    assert started == ["a0", "b0", "a1", "a2"]
+
+    print("✅ JUSTIÇA OK!\n")
+
+
+def test_queue_limit_and_positions():
+    print("📋 TESTE DE LIMITE DA FILA E POSIÇÕES")
+    print("-" * 40)
+
+    async def run():
+        scheduler = RequestScheduler(slots=1, max_queue=2)
+        started, positions = [], []
+        first = asyncio.create_task(job(scheduler, started, "s0", "s0", hold=0.2))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(job(scheduler, started, "s1", "s1", hold=0.1))
+        third = asyncio.create_task(job(scheduler, started, "s2", "s2", positions=positions))
+        await asyncio.sleep(0.05)
+
+        try:
+            await job(scheduler, started, "s3", "s3")
+            assert False, "the queue is full"
+        except QueueFullError as e:
+            retry_after = e.retry_after
+
+        assert scheduler.queued == 2, "rejected requests don't take a place"
+
+        # A cancelled request gives its place up
+        scheduler.max_queue = 3
+        cancelled = asyncio.create_task(job(scheduler, started, "gone", "gone"))
+        await asyncio.sleep(0)
+        assert scheduler.queued == 3
+        cancelled.cancel()
+        await asyncio.sleep(0)
+        assert scheduler.queued == 2
+        await asyncio.gather(first, second, third, cancelled, return_exceptions=True)
+        return started, positions, retry_after, scheduler.stats()
+
+    started, positions, retry_after, stats = asyncio.run(run())
+    print(f"  Ordem: {started}, posições: {positions}, retry_after: {retry_after}s")
+    assert started == ["s0", "s1", "s2"]
+    assert positions == [2, 1, 0]
+    assert retry_after >= config.SCHEDULER_DEFAULT_SERVICE_TIME
+    assert stats["rejected"] == 1 and stats["queued"] == 0 and stats["running"] == 0
+
+    print("✅ LIMITE DA FILA E POSIÇÕES OK!\n")
+
+
+if __name__ == "__main__":
+    test_priorities()
+    test_fairness()
+    test_queue_limit_and_positions()
+    print("🎉 TODOS OS TESTES PASSARAM!")
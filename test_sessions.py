@@ -0,0 +1,61 @@
+"""
+Test suite for the session manager
+- Isolated agents per session
+- LRU eviction, idle TTL and session cap
+"""
+
+import sys
+sys.path.insert(0, '.')
+
+import asyncio
+import time
+
+from core.sessions import SessionManager, SessionLimitError
+
+
+def test_isolation_and_lru():
+    print("👥 TESTE DE SESSÕES")
+    print("-" * 40)
+    
+    manager = SessionManager(max_sessions=2, idle_ttl=60)
+    a = manager.get("celular")
+    b = manager.get("pc")
+    a.agent.history.append({"role": "user", "content": "oi"})
+    
+    assert manager.get("celular") is a, "Sessão não foi reaproveitada!"
+    assert b.agent.history.messages == [], "Histórico vazou entre sessões!"
+    
+    # "pc" is now the least recently used session
+    manager.get("tablet")
+    print(f"  Sessões ativas: {list(manager._sessions)}")
+    assert "pc" not in manager._sessions
+    
+    print("✅ ISOLAMENTO E LRU OK!\n")
+
+
+def test_limits():
+    print("🚦 TESTE DE LIMITES")
+    print("-" * 40)
+    
+    async def run():
+        manager = SessionManager(max_sessions=1, idle_ttl=0.1)
+        busy = manager.get("ocupada")
+        async with busy.lock:
+            try:
+                manager.get("nova")
+                return False
+            except SessionLimitError as e:
+                print(f"  Recusada: {e}")
+        time.sleep(0.15)
+        print(f"  Expiradas: {manager.prune()}")
+        return len(manager._sessions) == 0
+    
+    assert asyncio.run(run()), "Limite ou TTL não respeitado!"
+    
+    print("✅ LIMITES OK!\n")
+
+
+if __name__ == "__main__":
+    test_isolation_and_lru()
+    test_limits()
+    print("🎉 TODOS OS TESTES PASSARAM!")
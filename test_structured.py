@@ -0,0 +1,92 @@
+"""
+Test suite for structured-output tool calling
+- The schema pins each tool's name to its own parameter schema
+- The reply streams incrementally, escapes included
+- Truncated output is completed, and cut-off tool calls are not run
+"""
+
+import sys
+sys.path.insert(0, '.')
+
+import core.agent  # Registers every tool
+from core.tools import registry
+from core.structured import build_schema, StructuredReplyParser
+
+
+FULL = '{"reply": "Vou \\"calcular\\" \\u00e9 j\\u00e1 🧮", "tool_calls": [{"name": "calculate", "arguments": {"expression": "2**10"}}]}'
+
+
+def test_schema():
+    print("📐 TESTE DE SCHEMA")
+    print("-" * 40)
+
+    tools = registry.get_ollama_format(["calculate", "web_search"])
+    schema = build_schema(tools)
+    branches = schema["properties"]["tool_calls"]["items"]["anyOf"]
+    names = [branch["properties"]["name"]["enum"][0] for branch in branches]
+    print(f"  Ramos: {names}")
+    assert sorted(names) == ["calculate", "web_search"]
+    calculate = branches[names.index("calculate")]
+    assert calculate["properties"]["arguments"] == registry.get("calculate").parameters
+    assert list(schema["properties"]) == ["reply", "tool_calls"]
+
+    print("✅ SCHEMA OK!\n")
+
+
+def test_incremental_reply():
+    print("🌊 TESTE DE STREAMING")
+    print("-" * 40)
+
+    # Feed in 3-char deltas, splitting escape sequences across chunks
+    parser = StructuredReplyParser()
+    streamed = "".join(parser.feed(FULL[i:i + 3]) for i in range(0, len(FULL), 3))
+    reply, calls, outcome = parser.finish()
+    print(f"  Resposta: {streamed!r}")
+    assert streamed == reply == 'Vou "calcular" é já 🧮'
+    assert outcome == "ok"
+    assert calls == [{"function": {"name": "calculate", "arguments": {"expression": "2**10"}}}]
+
+    # An emoji escaped as a surrogate pair split across deltas still comes out whole
+    parser = StructuredReplyParser()
+    deltas = ['{"reply": "Oi ', '\\ud83d', '\\ude80 pronto', '", "tool_calls": []}']
+    pieces = [parser.feed(delta) for delta in deltas]
+    print(f"  Pedaços: {pieces}")
+    assert "".join(pieces) == "Oi 🚀 pronto"
+    for piece in pieces:
+        piece.encode("utf-8")  # Raises on a lone surrogate, as websocket.send_json would
+    parser = StructuredReplyParser()
+    text = '{"reply": "\\uD83D\\uDE80!", "tool_calls": []}'
+    assert "".join(parser.feed(char) for char in text) == "🚀!"
+
+    print("✅ STREAMING OK!\n")
+
+
+def test_recovery():
+    print("🩹 TESTE DE RECUPERAÇÃO")
+    print("-" * 40)
+
+    # Cut off after a complete call: the call is kept
+    parser = StructuredReplyParser()
+    parser.feed('{"reply": "ok", "tool_calls": [{"name": "calculate", "arguments": {"expression": "1+1"}}')
+    reply, calls, outcome = parser.finish()
+    assert (reply, outcome, len(calls)) == ("ok", "recovered", 1)
+
+    # Cut off inside a call: its arguments may be incomplete, so it is dropped
+    parser = StructuredReplyParser()
+    parser.feed('{"reply": "ok", "tool_calls": [{"name": "type_text", "arguments": {"text": "Olá mun')
+    reply, calls, outcome = parser.finish()
+    assert (reply, outcome, calls) == ("ok", "recovered", [])
+
+    # Not JSON at all: the text becomes the answer
+    parser = StructuredReplyParser()
+    parser.feed("Olá! Tudo bem?")
+    assert parser.finish() == ("Olá! Tudo bem?", [], "failed")
+
+    print("✅ RECUPERAÇÃO OK!\n")
+
+
+if __name__ == "__main__":
+    test_schema()
+    test_incremental_reply()
+    test_recovery()
+    print("🎉 TODOS OS TESTES PASSARAM!")
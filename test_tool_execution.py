@@ -0,0 +1,80 @@
+"""
+Test suite for tool execution
+- Sync handlers run off the event loop
+- Independent tool calls are batched and run concurrently
+"""
+
+import sys
+sys.path.insert(0, '.')
+
+import asyncio
+import time
+
+from core.agent import Agent
+from core.tools import registry, tool
+
+
+@tool("_test_sleep_io", "Teste: dorme 0.3s", {"type": "object", "properties": {}}, independent=True)
+def _test_sleep_io() -> dict:
+    time.sleep(0.3)
+    return {"success": True}
+
+
+@tool("_test_action", "Teste: ação com efeito colateral", {"type": "object", "properties": {}})
+def _test_action() -> dict:
+    return {"success": True}
+
+
+def test_event_loop_not_blocked():
+    print("⏱️ TESTE DE EVENT LOOP")
+    print("-" * 40)
+    
+    async def ticker():
+        ticks = 0
+        for _ in range(5):
+            await asyncio.sleep(0.05)
+            ticks += 1
+        return ticks
+    
+    async def run():
+        return await asyncio.gather(registry.execute("_test_sleep_io", {}), ticker())
+    
+    result, ticks = asyncio.run(run())
+    print(f"  Resultado: {result} | ticks durante a execução: {ticks}")
+    assert result["success"]
+    assert ticks == 5, "Event loop ficou bloqueado pela ferramenta síncrona!"
+    
+    print("✅ EVENT LOOP OK!\n")
+
+
+def test_parallel_batches():
+    print("🔀 TESTE DE CHAMADAS PARALELAS")
+    print("-" * 40)
+    
+    calls = [
+        ("_test_sleep_io", {}),
+        ("_test_sleep_io", {}),
+        ("_test_action", {}),
+        ("_test_sleep_io", {}),
+    ]
+    batches = Agent._plan_batches(calls)
+    print(f"  Lotes: {[[name for name, _ in batch] for batch in batches]}")
+    assert [len(batch) for batch in batches] == [2, 1, 1]
+    
+    async def run():
+        agent = Agent()
+        start = time.perf_counter()
+        await asyncio.gather(*(agent._execute_tool(name, args, "") for name, args in batches[0]))
+        return time.perf_counter() - start
+    
+    elapsed = asyncio.run(run())
+    print(f"  Dois sleeps de 0.3s em paralelo: {elapsed:.2f}s")
+    assert elapsed < 0.5, "Chamadas independentes não rodaram em paralelo!"
+    
+    print("✅ PARALELISMO OK!\n")
+
+
+if __name__ == "__main__":
+    test_event_loop_not_blocked()
+    test_parallel_batches()
+    print("🎉 TODOS OS TESTES PASSARAM!")
@@ -0,0 +1,114 @@
+"""
+Test suite for lazy tool loading
+- tools/manifest.json matches the tool modules (rebuild: python -m core.tool_manifest)
+- Starting the agent imports no tool module; the first call imports it
+- A tool whose module can't be imported fails alone, with a clear error
+- A tool name can only be registered by one module
+"""
+
+import sys
+sys.path.insert(0, '.')
+
+from benchmarks import stubs
+stubs.install(psutil=False)
+
+import asyncio
+import importlib
+import json
+import subprocess
+from core import tool_manifest
+from core.tools import ToolRegistry, registry
+
+
+def test_manifest_up_to_date():
+    print("📜 TESTE DO MANIFESTO DE FERRAMENTAS")
+    print("-" * 40)
+
+    manifest = json.loads(tool_manifest.MANIFEST_PATH.read_text(encoding="utf-8"))
+    stale = [m for m in tool_manifest.TOOL_MODULES if manifest["modules"].get(m) != tool_manifest.source_hash(m)]
+    assert not stale, f"manifesto desatualizado para {stale}: rode python -m core.tool_manifest"
+
+    for module in tool_manifest.TOOL_MODULES:
+        importlib.import_module(module)
+    for entry in manifest["tools"]:
+        tool = registry.get(entry["name"])
+        assert tool is not None and tool.module == entry["module"], entry["name"]
+        assert tool.parameters == entry["parameters"] and tool.description == entry["description"]
+    print(f"  {len(manifest['tools'])} ferramentas de {len(manifest['modules'])} módulos")
+
+    print("✅ MANIFESTO OK!\n")
+
+
+PROBE = """
+import asyncio, json, sys
+from core.agent import Agent
+from core.tools import registry
+before = sorted(m for m in sys.modules if m.startswith("tools."))
+listed = sum(1 for tool in registry.get_all() if tool.handler is None)
+result = asyncio.run(registry.execute("calculate", {"expression": "6*7"}))
+print(json.dumps({"before": before, "listed": listed, "result": result, "imports": registry.imports}))
+"""
+
+
+def test_lazy_startup():
+    print("💤 TESTE DO CARREGAMENTO SOB DEMANDA")
+    print("-" * 40)
+
+    # Fresh interpreter: nothing imported by other tests
+    output = subprocess.run([sys.executable, "-c", PROBE], capture_output=True, text=True, check=True)
+    probe = json.loads(output.stdout.strip().splitlines()[-1])
+    print(f"  Listadas sem importar: {probe['listed']}, importações: {probe['imports']}")
+    assert probe["before"] == []
+    assert probe["listed"] == len(json.loads(tool_manifest.MANIFEST_PATH.read_text(encoding="utf-8"))["tools"])
+    assert probe["result"]["result"] == 42
+    assert list(probe["imports"]) == ["tools.calculator"]
+    assert probe["imports"]["tools.calculator"]["trigger"] == "calculate"
+
+    print("✅ CARREGAMENTO SOB DEMANDA OK!\n")
+
+
+def test_missing_dependency():
+    print("🧩 TESTE DE DEPENDÊNCIA AUSENTE")
+    print("-" * 40)
+
+    tools = ToolRegistry()
+    schema = {"type": "object", "properties": {}}
+    tools.register("needs_missing", "Precisa de um módulo ausente", schema, None, module="tools_that_do_not_exist")
+    result = asyncio.run(tools.execute("needs_missing", {}))
+    print(f"  Resultado: {result}")
+    assert result["success"] is False and "indisponível" in result["error"]
+    assert "error" in tools.imports["tools_that_do_not_exist"]
+
+    print("✅ DEPENDÊNCIA AUSENTE OK!\n")
+
+
+def test_duplicate_names():
+    print("👯 TESTE DE NOMES DUPLICADOS")
+    print("-" * 40)
+
+    tools = ToolRegistry()
+    schema = {"type": "object", "properties": {}}
+    tools.register("info", "Placeholder", schema, None, module="tools.a")
+
+    def info():
+        return {"success": True}
+
+    info.__module__ = "tools.a"
+    tools.register("info", "Real", schema, info)  # Same module: replaces the placeholder
+    assert tools.get("info").handler is info
+
+    try:
+        tools.register("info", "Other", schema, lambda: None, module="tools.b")
+        assert False, "a name registered by another module must be refused"
+    except ValueError as e:
+        print(f"  Recusado: {e}")
+
+    print("✅ NOMES DUPLICADOS OK!\n")
+
+
+if __name__ == "__main__":
+    test_manifest_up_to_date()
+    test_lazy_startup()
+    test_missing_dependency()
+    test_duplicate_names()
+    print("🎉 TODOS OS TESTES PASSARAM!")
@@ -0,0 +1,58 @@
+"""
+Test suite for tool selection
+- BM25 ranking finds the right tool for common requests
+- Selection always includes the core set and is much smaller than the registry
+"""
+
+import sys
+sys.path.insert(0, '.')
+
+import config
+import core.agent  # Registers every tool
+from core.tools import registry
+from core.tool_selector import selector
+
+
+EXPECTED = {
+    "Como está o tempo em São Paulo?": "get_weather",
+    "Qual o preço do Bitcoin?": "get_crypto_price",
+    "cotação do dólar hoje": "get_exchange_rate",
+    "Liste os arquivos da pasta Downloads": "list_directory",
+    "feche o notepad": "close_program",
+    "instale o VLC": "manage_apps",
+    "leia o PDF do contrato": "read_pdf",
+    "notícias de hoje": "deep_news_search",
+}
+
+
+def test_ranking():
+    print("🔎 TESTE DE RANKING")
+    print("-" * 40)
+    
+    for query, expected in EXPECTED.items():
+        top = [name for name, _ in selector.rank(query)[:3]]
+        print(f"  {query!r} -> {top}")
+        assert expected in top, f"'{expected}' fora do top 3 para {query!r}"
+    
+    print("✅ RANKING OK!\n")
+
+
+def test_selection_size():
+    print("📦 TESTE DE SELEÇÃO")
+    print("-" * 40)
+    
+    selected = selector.select("abra o chrome e pesquise receitas de bolo")
+    print(f"  {len(selected)} de {len(registry.get_all())} ferramentas: {selected}")
+    assert set(config.TOOL_CORE_SET) <= set(selected)
+    assert len(selected) <= len(config.TOOL_CORE_SET) + config.TOOL_TOP_K
+    
+    # Tools already used in the request stay available
+    assert "get_pixel_color" in selector.select("oi", plan_tools=["get_pixel_color"])
+    
+    print("✅ SELEÇÃO OK!\n")
+
+
+if __name__ == "__main__":
+    test_ranking()
+    test_selection_size()
+    print("🎉 TODOS OS TESTES PASSARAM!")
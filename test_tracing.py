@@ -0,0 +1,117 @@
+"""
+Test suite for request tracing and metrics
+- Spans nest into a tree and feed the aggregated histograms
+- /metrics output follows the Prometheus text format
+- A traced agent request reports its LLM calls and tool spans
+"""
+
+import sys
+sys.path.insert(0, '.')
+
+from benchmarks import stubs
+stubs.install(psutil=False)
+
+import asyncio
+from benchmarks.mock_ollama import MockOllama, Reply, call
+from core import tracing
+from core.agent import Agent
+from core.ollama_client import OllamaClient
+import config
+
+
+def test_span_tree():
+    print("🌳 TESTE DA ÁRVORE DE SPANS")
+    print("-" * 40)
+
+    with tracing.span("request", "request") as root:
+        with tracing.span("iteration 1", "iteration"):
+            with tracing.span("llm", "llm", model="m", eval_count=10, eval_duration=int(0.5e9)):
+                pass
+            with tracing.span("calculate", "tool", cached=False, success=True, result_bytes=42):
+                assert tracing.current().name == "calculate"
+        root.set(llm_calls=len(list(root.descendants("llm"))))
+
+    assert tracing.current() is None
+    tree = root.to_dict()
+    print(f"  Filhos: {[c['name'] for c in tree['children'][0]['children']]}")
+    assert tree["attrs"]["llm_calls"] == 1
+    assert [c["kind"] for c in tree["children"][0]["children"]] == ["llm", "tool"]
+    assert tree["start_ms"] == 0 and tree["duration_ms"] >= tree["children"][0]["duration_ms"]
+
+    print("✅ ÁRVORE DE SPANS OK!\n")
+
+
+def test_prometheus_format():
+    print("📈 TESTE DO FORMATO PROMETHEUS")
+    print("-" * 40)
+
+    metrics = tracing.Metrics()
+    metrics.tool_duration.observe(0.02, tool="calculate")
+    metrics.tool_duration.observe(3.0, tool="calculate")
+    metrics.tool_calls.inc(tool="calculate", status="ok")
+    gauge = tracing.Gauge("jarvis_test", 'Label "escaping"')
+    gauge.set(2, name='a"b')
+    text = metrics.render(extra=(gauge,))
+
+    assert "# TYPE jarvis_tool_duration_seconds histogram" in text
+    assert 'jarvis_tool_duration_seconds_bucket{tool="calculate",le="0.025"} 1' in text
+    assert 'jarvis_tool_duration_seconds_bucket{tool="calculate",le="+Inf"} 2' in text
+    assert 'jarvis_tool_duration_seconds_count{tool="calculate"} 2' in text
+    assert 'jarvis_tool_calls_total{status="ok",tool="calculate"} 1' in text
+    assert 'jarvis_test{name="a\\"b"} 2' in text
+    print(f"  {len(text.splitlines())} linhas")
+
+    print("✅ FORMATO PROMETHEUS OK!\n")
+
+
+def test_agent_trace():
+    print("🔎 TESTE DO TRACE DE UMA REQUISIÇÃO")
+    print("-" * 40)
+
+    base_url = config.OLLAMA_BASE_URL
+    script = [
+        Reply("Calculando...", [call("calculate", expression="6*7")], prompt_eval_count=50),
+        Reply("Deu 42."),
+    ]
+
+    async def run():
+        agent = Agent(ollama=OllamaClient())
+        try:
+            return [event async for event in agent.process_message("me ajuda com uma conta de multiplicar")]
+        finally:
+            await agent.close()
+
+    try:
+        with MockOllama(script=script) as mock:
+            config.OLLAMA_BASE_URL = mock.base_url
+            events = asyncio.run(run())
+    finally:
+        config.OLLAMA_BASE_URL = base_url
+
+    assert [e["type"] for e in events[-2:]] == ["trace", "response"]
+    trace = events[-2]["content"]
+    assert trace is tracing.recent_traces[-1]
+    assert trace["kind"] == "request" and trace["attrs"]["llm_calls"] == 2
+
+    assert trace["children"][0]["kind"] == "fast_path"
+    assert trace["children"][0]["attrs"]["answered"] is False
+    iterations = trace["children"][1:]
+    assert [s["kind"] for s in iterations] == ["iteration", "iteration"]
+    llm, tool = iterations[0]["children"]
+    assert llm["kind"] == "llm" and llm["attrs"]["prompt_eval_count"] == 50
+    assert tool["name"] == "calculate" and tool["attrs"]["success"]
+    assert tool["attrs"]["args_bytes"] > 0 and tool["attrs"]["result_bytes"] > 0
+    print(f"  Duração: {trace['duration_ms']} ms, {len(iterations)} iterações")
+
+    text = tracing.metrics.render()
+    assert 'jarvis_tool_calls_total{status="ok",tool="calculate"}' in text
+    assert "jarvis_request_duration_seconds_count" in text
+
+    print("✅ TRACE DA REQUISIÇÃO OK!\n")
+
+
+if __name__ == "__main__":
+    test_span_tree()
+    test_prometheus_format()
+    test_agent_trace()
+    print("🎉 TODOS OS TESTES PASSARAM!")
@@ -22,7 +22,7 @@ async def test_vlm():
     print(description)
     print("-" * 50)
     
-    if "Erro" in description and len(description) < 100:
+    if isinstance(description, dict):
         print("❌ TESTE FALHOU")
     else:
         print("✅ TESTE PASSOU (Resposta recebida)")
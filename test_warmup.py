@@ -0,0 +1,124 @@
+"""
+Test suite for model warm-up
+- Active-hours windows, including ones that wrap past midnight
+- Configured models are loaded with the keep-alive policy and the num_ctx chat requests use
+- Models Ollama doesn't have are skipped, and left out of the routing ladder
+- Model load time is reported per request (cold starts show up in the trace)
+"""
+
+import sys
+sys.path.insert(0, '.')
+
+from benchmarks import stubs
+stubs.install(psutil=False)
+
+import asyncio
+from datetime import datetime
+from benchmarks.mock_ollama import MockOllama, Reply
+from core import tracing
+from core.agent import Agent
+from core.context_size import sizer
+from core.ollama_client import OllamaClient
+from core.router import router
+from core.warmup import ModelWarmer, in_active_hours
+import config
+
+
+def at(hour: int) -> datetime:
+    return datetime(2026, 1, 1, hour, 30)
+
+
+def test_active_hours():
+    print("🕗 TESTE DO HORÁRIO ATIVO")
+    print("-" * 40)
+
+    assert in_active_hours((8, 23), at(8)) and in_active_hours((8, 23), at(22))
+    assert not in_active_hours((8, 23), at(23)) and not in_active_hours((8, 23), at(3))
+    # Night shift, wrapping past midnight
+    assert in_active_hours((22, 6), at(23)) and in_active_hours((22, 6), at(2))
+    assert not in_active_hours((22, 6), at(12))
+    # No window configured: always active
+    assert in_active_hours((), at(4))
+
+    print("✅ HORÁRIO ATIVO OK!\n")
+
+
+def test_warm_models():
+    print("🔥 TESTE DO PRÉ-CARREGAMENTO")
+    print("-" * 40)
+
+    base_url = config.OLLAMA_BASE_URL
+
+    async def run(mock):
+        config.OLLAMA_BASE_URL = mock.base_url
+        client = OllamaClient()
+        warmer = ModelWarmer(models=["gemma3:12b", "moondream", "gemma3:4b"], interval=60)
+        try:
+            return await warmer.warm(client), warmer.stats()
+        finally:
+            await client.close()
+
+    ladder = config.MODEL_LADDER
+    config.MODEL_LADDER = ["gemma3:4b", "gemma3:12b"]
+    try:
+        # gemma3:4b was never pulled; "moondream" is listed with its tag
+        with MockOllama(models=("gemma3:12b", "moondream:latest")) as mock:
+            records, stats = asyncio.run(run(mock))
+            routed = router.ladder
+    finally:
+        config.OLLAMA_BASE_URL, config.MODEL_LADDER = base_url, ladder
+        router._installed = None
+
+    print(f"  Carregados: {[load['model'] for load in mock.loads]}")
+    assert [load["model"] for load in mock.loads] == ["gemma3:12b", "moondream"]
+    assert all(load["keep_alive"] == config.OLLAMA_KEEP_ALIVE for load in mock.loads)
+    # Same context as the chat requests, or Ollama reloads on the first one
+    assert all(load["options"]["num_ctx"] == sizer.current(load["model"]) for load in mock.loads)
+    assert all(record.error is None for record in records)
+    assert set(stats["models"]) == {"gemma3:12b", "moondream"}
+    print(f"  Ausentes: {stats['missing']}, escada: {routed}")
+    assert stats["missing"] == ["gemma3:4b"]
+    assert routed == ["gemma3:12b"]
+
+    print("✅ PRÉ-CARREGAMENTO OK!\n")
+
+
+def test_load_duration_per_request():
+    print("🧊 TESTE DO TEMPO DE CARREGAMENTO POR REQUISIÇÃO")
+    print("-" * 40)
+
+    base_url = config.OLLAMA_BASE_URL
+
+    async def run(mock):
+        config.OLLAMA_BASE_URL = mock.base_url
+        agent = Agent(ollama=OllamaClient())
+        try:
+            traces = []
+            for text in ("primeira mensagem do dia", "segunda mensagem"):
+                events = [event async for event in agent.process_message(text)]
+                traces.append(next(e["content"] for e in events if e["type"] == "trace"))
+            return traces
+        finally:
+            await agent.close()
+
+    try:
+        # Cold start on the first request, resident model on the second
+        with MockOllama(script=[Reply("Bom dia!", load_duration=2.5), Reply("Oi de novo!")]) as mock:
+            cold, warm = asyncio.run(run(mock))
+    finally:
+        config.OLLAMA_BASE_URL = base_url
+
+    print(f"  Fria: {cold['attrs']['load_duration'] / 1e9}s, quente: {warm['attrs']['load_duration']}")
+    assert cold["attrs"]["load_duration"] == int(2.5e9)
+    assert warm["attrs"]["load_duration"] == 0
+    assert mock.requests[0]["keep_alive"] == config.OLLAMA_KEEP_ALIVE
+    assert "jarvis_request_model_load_seconds_bucket" in tracing.metrics.render()
+
+    print("✅ TEMPO DE CARREGAMENTO OK!\n")
+
+
+if __name__ == "__main__":
+    test_active_hours()
+    test_warm_models()
+    test_load_duration_per_request()
+    print("🎉 TODOS OS TESTES PASSARAM!")
@@ -4,7 +4,7 @@ No API keys required for these services.
 """
 
 import httpx
-from core.tools import tool
+from core.tools import tool, CachePolicy
 
 
 @tool(
@@ -23,7 +23,10 @@ from core.tools import tool
             }
         },
         "required": ["city"]
-    }
+    },
+    independent=True,
+    idempotent=True,
+    cache=CachePolicy(ttl=600)
 )
 def get_weather(city: str, lang: str = "pt") -> dict:
     """Get weather forecast using wttr.in (free, no API key)."""
@@ -102,7 +105,10 @@ def get_weather(city: str, lang: str = "pt") -> dict:
             }
         },
         "required": ["coin"]
-    }
+    },
+    independent=True,
+    idempotent=True,
+    cache=CachePolicy(ttl=60)
 )
 def get_crypto_price(coin: str, currency: str = "brl") -> dict:
     """Get cryptocurrency price using CoinGecko API (free, no API key)."""
@@ -211,7 +217,10 @@ def get_crypto_price(coin: str, currency: str = "brl") -> dict:
                 "description": "Quantidade a converter. Padrão: 1"
             }
         }
-    }
+    },
+    independent=True,
+    idempotent=True,
+    cache=CachePolicy(ttl=300)
 )
 def get_exchange_rate(from_currency: str = "USD", to_currency: str = "BRL", amount: float = 1) -> dict:
     """Get currency exchange rates using exchangerate.host (free, no API key)."""
@@ -335,7 +344,10 @@ def _fallback_exchange_rate(from_currency: str, to_currency: str, amount: float)
                 "enum": ["general", "business", "technology", "sports", "entertainment", "health", "science"]
             }
         }
-    }
+    },
+    independent=True,
+    idempotent=True,
+    cache=CachePolicy(ttl=600)
 )
 def get_news_headlines(country: str = "br", category: str = "general") -> dict:
     """Get news headlines using free RSS feeds from Google News with robust XML parsing."""
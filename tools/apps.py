@@ -6,6 +6,7 @@ Uses Windows Package Manager (winget) to manage applications.
 import subprocess
 import shutil
 from core.tools import tool
+from core import cancellation
 
 def _check_winget():
     """Check if winget is available."""
@@ -32,7 +33,8 @@ def _check_winget():
             }
         },
         "required": ["action"]
-    }
+    },
+    destructive=True
 )
 def manage_apps(action: str, query: str = None, package_id: str = None) -> dict:
     """Manage Windows applications using winget."""
@@ -49,7 +51,7 @@ def manage_apps(action: str, query: str = None, package_id: str = None) -> dict:
             
             # winget search <query>
             cmd = ["winget", "search", query]
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+            result = cancellation.run(cmd, capture_output=True, text=True, timeout=30)
             
             if result.returncode != 0 and "No package found" not in result.stdout:
                  return {"success": False, "error": result.stderr or result.stdout}
@@ -66,7 +68,7 @@ def manage_apps(action: str, query: str = None, package_id: str = None) -> dict:
             if query:
                 cmd.append(query)
                 
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+            result = cancellation.run(cmd, capture_output=True, text=True, timeout=30)
             return {
                 "success": True,
                 "action": "list",
@@ -88,7 +90,7 @@ def manage_apps(action: str, query: str = None, package_id: str = None) -> dict:
             ]
             
             # This can take time, so we increase timeout
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
+            result = cancellation.run(cmd, capture_output=True, text=True, timeout=300)
             
             if result.returncode == 0:
                 return {"success": True, "action": "install", "message": f"Pacote {package_id} instalado com sucesso!"}
@@ -100,7 +102,7 @@ def manage_apps(action: str, query: str = None, package_id: str = None) -> dict:
                 return {"success": False, "error": "Erro: ID ausente. O AGENTE DEVE USAR 'search' PRIMEIRO para encontrar o 'package_id'. Não pergunte ao usuário, PESQUISE."}
                 
             cmd = ["winget", "uninstall", "--id", package_id, "-e"]
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=120)
+            result = cancellation.run(cmd, capture_output=True, text=True, timeout=120)
             
             if result.returncode == 0:
                 return {"success": True, "action": "uninstall", "message": f"Pacote {package_id} desinstalado."}
@@ -116,7 +118,7 @@ def manage_apps(action: str, query: str = None, package_id: str = None) -> dict:
             
             cmd.extend(["--accept-source-agreements", "--accept-package-agreements"])
             
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
+            result = cancellation.run(cmd, capture_output=True, text=True, timeout=300)
             if result.returncode == 0:
                 return {"success": True, "action": "upgrade", "output": result.stdout[-1000:]}
             else:
@@ -17,7 +17,9 @@ from core.tools import tool
             }
         },
         "required": ["expression"]
-    }
+    },
+    executor="cpu",
+    independent=True
 )
 def calculate(expression: str) -> dict:
     """Evaluate a mathematical expression safely."""
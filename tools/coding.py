@@ -20,7 +20,9 @@ from core.tools import tool
             }
         },
         "required": ["code"]
-    }
+    },
+    executor="cpu",
+    destructive=True
 )
 def python_repl(code: str) -> dict:
     """Execute Python code and return the result."""
@@ -84,7 +86,9 @@ def python_repl(code: str) -> dict:
             }
         },
         "required": ["expression"]
-    }
+    },
+    executor="cpu",
+    independent=True
 )
 def evaluate_expression(expression: str) -> dict:
     """Safely evaluate a mathematical expression."""
@@ -7,6 +7,7 @@ import subprocess
 import os
 import re
 from core.tools import tool
+from core import cancellation
 
 
 # ============ SECURITY GUARDRAILS ============
@@ -76,7 +77,8 @@ def _is_command_safe(command: str) -> tuple[bool, str]:
             }
         },
         "required": ["command"]
-    }
+    },
+    destructive=True
 )
 def run_command(command: str, cwd: str = None, timeout: int = 60) -> dict:
     """Execute a shell command with safety checks."""
@@ -92,7 +94,7 @@ def run_command(command: str, cwd: str = None, timeout: int = 60) -> dict:
         }
     
     try:
-        result = subprocess.run(
+        result = cancellation.run(
             command,
             shell=True,
             capture_output=True,
@@ -133,12 +135,13 @@ def run_command(command: str, cwd: str = None, timeout: int = 60) -> dict:
             }
         },
         "required": ["script"]
-    }
+    },
+    destructive=True
 )
 def run_powershell(script: str, cwd: str = None) -> dict:
     """Execute a PowerShell script."""
     try:
-        result = subprocess.run(
+        result = cancellation.run(
             ["powershell", "-NoProfile", "-Command", script],
             capture_output=True,
             text=True,
@@ -171,7 +174,8 @@ def run_powershell(script: str, cwd: str = None) -> dict:
             }
         },
         "required": ["name"]
-    }
+    },
+    independent=True
 )
 def get_environment_variable(name: str) -> dict:
     """Get an environment variable value."""
@@ -200,7 +204,8 @@ def get_environment_variable(name: str) -> dict:
     parameters={
         "type": "object",
         "properties": {}
-    }
+    },
+    independent=True
 )
 def get_current_directory() -> dict:
     """Get the current working directory."""
@@ -226,7 +231,8 @@ def get_current_directory() -> dict:
             }
         },
         "required": ["url"]
-    }
+    },
+    executor="gui"
 )
 def open_url(url: str) -> dict:
     """Open a URL in the default browser."""
@@ -239,55 +245,3 @@ def open_url(url: str) -> dict:
         }
     except Exception as e:
         return {"success": False, "error": str(e)}
-
-
-@tool(
-    name="get_system_info",
-    description="Retorna informações detalhadas do sistema (CPU, RAM, Disco, OS).",
-    parameters={
-        "type": "object",
-        "properties": {}
-    }
-)
-def get_system_info() -> dict:
-    """Get system information."""
-    import psutil
-    import platform
-    from datetime import datetime
-    
-    try:
-        # Memory
-        mem = psutil.virtual_memory()
-        
-        # Disk
-        disk = psutil.disk_usage('/')
-        
-        # CPU
-        cpu_freq = psutil.cpu_freq()
-        
-        return {
-            "success": True,
-            "system": {
-                "os": f"{platform.system()} {platform.release()}",
-                "hostname": platform.node(),
-                "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            },
-            "cpu": {
-                "percent": psutil.cpu_percent(interval=1),
-                "count": psutil.cpu_count(),
-                "freq": f"{cpu_freq.current:.0f}MHz" if cpu_freq else "N/A"
-            },
-            "memory": {
-                "total": f"{mem.total / (1024**3):.1f} GB",
-                "available": f"{mem.available / (1024**3):.1f} GB",
-                "used": f"{mem.used / (1024**3):.1f} GB",
-                "percent": f"{mem.percent}%"
-            },
-            "disk": {
-                "total": f"{disk.total / (1024**3):.1f} GB",
-                "free": f"{disk.free / (1024**3):.1f} GB",
-                "percent": f"{disk.percent}%"
-            }
-        }
-    except Exception as e:
-        return {"success": False, "error": str(e)}
@@ -2,7 +2,16 @@
 Document tools - PDF reading and document processing
 """
 
-from core.tools import tool
+import os
+from core.tools import tool, CachePolicy
+
+
+def _file_version(arguments: dict):
+    """Modification time of the file in `path`, so edited files are read again."""
+    try:
+        return os.path.getmtime(arguments.get("path", ""))
+    except OSError:
+        return None
 
 
 @tool(
@@ -21,13 +30,16 @@ from core.tools import tool
             }
         },
         "required": ["path"]
-    }
+    },
+    executor="cpu",
+    independent=True,
+    idempotent=True,
+    cache=CachePolicy(ttl=3600, key_fields=("path", "max_pages"), vary=_file_version)
 )
 def read_pdf(path: str, max_pages: int = 10) -> dict:
     """Read text content from a PDF file."""
     try:
         from pypdf import PdfReader
-        import os
         
         if not os.path.exists(path):
             return {"success": False, "error": f"Arquivo não encontrado: {path}"}
@@ -76,7 +88,8 @@ def read_pdf(path: str, max_pages: int = 10) -> dict:
             }
         },
         "required": ["path"]
-    }
+    },
+    independent=True
 )
 def read_text_file(path: str, encoding: str = "utf-8") -> dict:
     """Read content from a text file."""
@@ -25,7 +25,8 @@ from core.tools import tool
             }
         },
         "required": ["path"]
-    }
+    },
+    independent=True
 )
 def read_file(path: str, encoding: str = "utf-8") -> dict:
     """Read content from a text file."""
@@ -72,7 +73,8 @@ def read_file(path: str, encoding: str = "utf-8") -> dict:
             }
         },
         "required": ["path", "content"]
-    }
+    },
+    destructive=True
 )
 def write_file(path: str, content: str, append: bool = False, encoding: str = "utf-8") -> dict:
     """Write content to a file."""
@@ -113,7 +115,8 @@ def write_file(path: str, content: str, append: bool = False, encoding: str = "u
             }
         },
         "required": ["path"]
-    }
+    },
+    independent=True
 )
 def list_directory(path: str, show_hidden: bool = False) -> dict:
     """List contents of a directory."""
@@ -201,7 +204,8 @@ def create_directory(path: str) -> dict:
             }
         },
         "required": ["path"]
-    }
+    },
+    destructive=True
 )
 def delete_file(path: str) -> dict:
     """Delete a file or directory."""
@@ -243,7 +247,8 @@ def delete_file(path: str) -> dict:
             }
         },
         "required": ["source", "destination"]
-    }
+    },
+    destructive=True
 )
 def move_file(source: str, destination: str) -> dict:
     """Move or rename a file or directory."""
@@ -284,7 +289,8 @@ def move_file(source: str, destination: str) -> dict:
             }
         },
         "required": ["source", "destination"]
-    }
+    },
+    destructive=True
 )
 def copy_file(source: str, destination: str) -> dict:
     """Copy a file or directory."""
@@ -324,7 +330,8 @@ def copy_file(source: str, destination: str) -> dict:
             }
         },
         "required": ["path"]
-    }
+    },
+    independent=True
 )
 def get_file_info(path: str) -> dict:
     """Get detailed file information."""
@@ -70,7 +70,8 @@ def remember_fact(key: str, value: str) -> dict:
                 "description": "Categoria a buscar. Se vazio, retorna toda a memória."
             }
         }
-    }
+    },
+    independent=True
 )
 def recall_memory(key: str = None) -> dict:
     """Retrieve information from memory."""
@@ -103,7 +104,8 @@ def recall_memory(key: str = None) -> dict:
             }
         },
         "required": ["key"]
-    }
+    },
+    destructive=True
 )
 def forget_fact(key: str) -> dict:
     """Remove a fact from memory."""
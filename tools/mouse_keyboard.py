@@ -36,7 +36,8 @@ pyautogui.PAUSE = 0.1  # Small delay between actions
             }
         },
         "required": ["x", "y"]
-    }
+    },
+    executor="gui"
 )
 def mouse_click(x: int, y: int, button: str = "left", clicks: int = 1) -> dict:
     """Click at a specific screen position with human-like movement."""
@@ -82,7 +83,8 @@ def mouse_click(x: int, y: int, button: str = "left", clicks: int = 1) -> dict:
             }
         },
         "required": ["x", "y"]
-    }
+    },
+    executor="gui"
 )
 def mouse_move(x: int, y: int, duration: float = 0) -> dict:
     """Move mouse with human-like easing."""
@@ -126,7 +128,8 @@ def mouse_move(x: int, y: int, duration: float = 0) -> dict:
             }
         },
         "required": ["amount"]
-    }
+    },
+    executor="gui"
 )
 def mouse_scroll(amount: int, x: int = None, y: int = None) -> dict:
     """Scroll the mouse wheel."""
@@ -157,7 +160,8 @@ def mouse_scroll(amount: int, x: int = None, y: int = None) -> dict:
             }
         },
         "required": ["text"]
-    }
+    },
+    executor="gui"
 )
 def type_into_application(text: str, use_clipboard: bool = True) -> dict:
     """Type text using keyboard or clipboard (for special characters)."""
@@ -218,33 +222,8 @@ def type_into_application(text: str, use_clipboard: bool = True) -> dict:
             }
         },
         "required": ["program", "text"]
-    }
-)
-@tool(
-    name="open_and_type",
-    description="Abre um programa, espera carregar, foca a janela e digita texto. Ideal para navegadores e pesquisas.",
-    parameters={
-        "type": "object",
-        "properties": {
-            "program": {
-                "type": "string",
-                "description": "Nome do programa a abrir (notepad, chrome, word, etc.)"
-            },
-            "text": {
-                "type": "string",
-                "description": "Texto a ser digitado após abrir o programa"
-            },
-            "wait_seconds": {
-                "type": "number",
-                "description": "Segundos para esperar o programa abrir. Padrão: 2"
-            },
-            "press_enter": {
-                "type": "boolean",
-                "description": "Se True, pressiona Enter após digitar. Útil para pesquisas."
-            }
-        },
-        "required": ["program", "text"]
-    }
+    },
+    executor="gui"
 )
 def open_and_type(program: str, text: str, wait_seconds: float = 2, press_enter: bool = False) -> dict:
     """Abre (ou foca se já aberto) um programa e digita texto. Usa PID real para foco."""
@@ -405,7 +384,8 @@ def open_and_type(program: str, text: str, wait_seconds: float = 2, press_enter:
             }
         },
         "required": ["key"]
-    }
+    },
+    executor="gui"
 )
 def press_key(key: str, presses: int = 1) -> dict:
     """Press a specific key."""
@@ -432,7 +412,8 @@ def press_key(key: str, presses: int = 1) -> dict:
             }
         },
         "required": ["keys"]
-    }
+    },
+    executor="gui"
 )
 def hotkey(keys: list[str]) -> dict:
     """Press a key combination (hotkey)."""
@@ -475,7 +456,8 @@ def hotkey(keys: list[str]) -> dict:
             }
         },
         "required": ["start_x", "start_y", "end_x", "end_y"]
-    }
+    },
+    executor="gui"
 )
 def mouse_drag(start_x: int, start_y: int, end_x: int, end_y: int, duration: float = 0.5) -> dict:
     """Drag the mouse from one position to another."""
@@ -496,7 +478,8 @@ def mouse_drag(start_x: int, start_y: int, end_x: int, end_y: int, duration: flo
     parameters={
         "type": "object",
         "properties": {}
-    }
+    },
+    executor="gui"
 )
 def get_mouse_position() -> dict:
     """Get current mouse cursor position."""
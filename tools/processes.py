@@ -6,7 +6,9 @@ Uses psutil and subprocess for process control
 import psutil
 import subprocess
 import os
+from typing import Optional
 from core.tools import tool
+from core.system_monitor import sampler
 from tools.program_search import find_executable, search_program, get_start_menu_apps
 
 
@@ -27,7 +29,8 @@ from tools.program_search import find_executable, search_program, get_start_menu
             }
         },
         "required": ["program"]
-    }
+    },
+    executor="gui"
 )
 def open_program(program: str, arguments: list[str] = None) -> dict:
     """Open a program or application."""
@@ -235,7 +238,8 @@ def open_program(program: str, arguments: list[str] = None) -> dict:
             }
         },
         "required": ["query"]
-    }
+    },
+    independent=True
 )
 def search_installed_programs(query: str) -> dict:
     """Search for installed programs by name."""
@@ -292,7 +296,8 @@ def search_installed_programs(query: str) -> dict:
             }
         },
         "required": ["name"]
-    }
+    },
+    destructive=True
 )
 def close_program(name: str, force: bool = False) -> dict:
     """Close a program by name."""
@@ -346,133 +351,161 @@ def close_program(name: str, force: bool = False) -> dict:
                 "description": "Número máximo de processos a retornar (padrão: 20)"
             }
         }
-    }
+    },
+    independent=True
 )
 def list_processes(filter: str = None, limit: int = 20) -> dict:
     """List running processes."""
     try:
-        processes = []
-        for proc in psutil.process_iter(['pid', 'name', 'cpu_percent', 'memory_percent']):
-            try:
-                info = proc.info
-                if filter and filter.lower() not in info['name'].lower():
-                    continue
-                processes.append({
-                    "pid": info['pid'],
-                    "name": info['name'],
-                    "cpu": round(info['cpu_percent'] or 0, 1),
-                    "memory": round(info['memory_percent'] or 0, 1)
-                })
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                continue
+        # Read the background sampler's snapshot instead of scanning every process
+        snapshot = sampler.snapshot()
+        processes = snapshot.processes
+        if filter:
+            processes = [p for p in processes if filter.lower() in p['name'].lower()]
         
-        # Sort by memory usage and limit
-        processes.sort(key=lambda x: x['memory'], reverse=True)
+        # Snapshot is already sorted by memory usage
         processes = processes[:limit]
         
         return {
             "success": True,
             "count": len(processes),
-            "processes": processes
+            "processes": processes,
+            "snapshot_age_seconds": round(snapshot.age, 1)
         }
     except Exception as e:
         return {"success": False, "error": str(e)}
 
 
+# Hardware detected by _hardware_info, once every query worked
+_hardware: Optional[dict] = None
+
+
+def _hardware_info() -> dict:
+    """
+    CPU model, GPUs and OS version. Detecting them takes registry reads and
+    nvidia-smi/PowerShell subprocesses, and they don't change while running,
+    so a complete detection is kept for the rest of the process. One where
+    a query failed (e.g. WMI erroring at startup) is tried again next call.
+    """
+    global _hardware
+    if _hardware is not None:
+        return _hardware
+    info, complete = _detect_hardware()
+    if complete:
+        _hardware = info
+    return info
+
+
+def _detect_hardware() -> tuple[dict, bool]:
+    """Hardware info, and whether every query that was needed worked."""
+    import platform
+    
+    complete = True
+    
+    # Get CPU model name (registry has the best name)
+    cpu_model = "Desconhecido"
+    try:
+        import winreg
+        key = winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, r"HARDWARE\DESCRIPTION\System\CentralProcessor\0")
+        cpu_model = winreg.QueryValueEx(key, "ProcessorNameString")[0]
+        winreg.CloseKey(key)
+    except:
+        # Fallback to platform
+        try:
+            cpu_model = platform.processor()
+        except:
+            pass
+    if not cpu_model or cpu_model == "Desconhecido":
+        complete = False
+    
+    # Get GPU info - prioritize nvidia-smi for accurate VRAM on NVIDIA GPUs
+    gpu_info = []
+    nvidia_gpus = {}
+    
+    # Try nvidia-smi first (accurate VRAM for NVIDIA)
+    try:
+        result = subprocess.run(
+            ["nvidia-smi", "--query-gpu=name,memory.total", "--format=csv,noheader,nounits"],
+            capture_output=True,
+            text=True,
+            timeout=5
+        )
+        if result.returncode == 0 and result.stdout.strip():
+            for line in result.stdout.strip().split('\n'):
+                parts = line.split(', ')
+                if len(parts) >= 2:
+                    name = parts[0].strip()
+                    vram_mb = int(parts[1].strip())
+                    vram_gb = round(vram_mb / 1024, 1)
+                    nvidia_gpus[name] = vram_gb
+                    gpu_info.append({
+                        "name": name,
+                        "vram_gb": vram_gb
+                    })
+    except FileNotFoundError:
+        pass  # No NVIDIA driver
+    except:
+        complete = False
+    
+    # Fallback to Win32_VideoController for non-NVIDIA or if nvidia-smi failed
+    if not gpu_info:
+        try:
+            result = subprocess.run(
+                ["powershell", "-Command", "Get-CimInstance -ClassName Win32_VideoController | Select-Object Name, AdapterRAM | ConvertTo-Json"],
+                capture_output=True,
+                text=True,
+                timeout=5
+            )
+            if result.returncode != 0:
+                complete = False
+            elif result.stdout.strip():
+                import json
+                gpu_data = json.loads(result.stdout)
+                if isinstance(gpu_data, dict):
+                    gpu_data = [gpu_data]
+                for gpu in gpu_data:
+                    name = gpu.get("Name", "Desconhecido")
+                    # Skip virtual adapters
+                    if "virtual" in name.lower() or "parsec" in name.lower():
+                        continue
+                    vram_gb = round(gpu.get("AdapterRAM", 0) / (1024**3), 1) if gpu.get("AdapterRAM") else "N/A"
+                    gpu_info.append({
+                        "name": name,
+                        "vram_gb": vram_gb
+                    })
+        except:
+            complete = False
+    
+    # Get OS info
+    os_info = f"{platform.system()} {platform.release()}"
+    try:
+        os_version = platform.version()
+        os_info += f" (Build {os_version})"
+    except:
+        pass
+    
+    return {"os": os_info, "cpu_model": cpu_model, "gpu": gpu_info}, complete
+
+
 @tool(
     name="get_system_info",
     description="Retorna informações completas do sistema: CPU, GPU, memória, disco, sistema operacional.",
     parameters={
         "type": "object",
         "properties": {}
-    }
+    },
+    independent=True
 )
 def get_system_info() -> dict:
     """Get complete system hardware and resource information."""
     try:
-        import platform
-        import subprocess
-        
-        # Basic usage stats
-        cpu_percent = psutil.cpu_percent(interval=0.5)
-        memory = psutil.virtual_memory()
+        # Basic usage stats from the background sampler
+        snapshot = sampler.snapshot()
         disk = psutil.disk_usage('C:\\')
-        
-        # Get CPU model name (registry has the best name)
-        cpu_model = "Desconhecido"
-        try:
-            import winreg
-            key = winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, r"HARDWARE\DESCRIPTION\System\CentralProcessor\0")
-            cpu_model = winreg.QueryValueEx(key, "ProcessorNameString")[0]
-            winreg.CloseKey(key)
-        except:
-            # Fallback to platform
-            try:
-                cpu_model = platform.processor()
-            except:
-                pass
-        
-        # Get GPU info - prioritize nvidia-smi for accurate VRAM on NVIDIA GPUs
-        gpu_info = []
-        nvidia_gpus = {}
-        
-        # Try nvidia-smi first (accurate VRAM for NVIDIA)
-        try:
-            result = subprocess.run(
-                ["nvidia-smi", "--query-gpu=name,memory.total", "--format=csv,noheader,nounits"],
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
-            if result.returncode == 0 and result.stdout.strip():
-                for line in result.stdout.strip().split('\n'):
-                    parts = line.split(', ')
-                    if len(parts) >= 2:
-                        name = parts[0].strip()
-                        vram_mb = int(parts[1].strip())
-                        vram_gb = round(vram_mb / 1024, 1)
-                        nvidia_gpus[name] = vram_gb
-                        gpu_info.append({
-                            "name": name,
-                            "vram_gb": vram_gb
-                        })
-        except:
-            pass
-        
-        # Fallback to Win32_VideoController for non-NVIDIA or if nvidia-smi failed
-        if not gpu_info:
-            try:
-                result = subprocess.run(
-                    ["powershell", "-Command", "Get-CimInstance -ClassName Win32_VideoController | Select-Object Name, AdapterRAM | ConvertTo-Json"],
-                    capture_output=True,
-                    text=True,
-                    timeout=5
-                )
-                if result.returncode == 0 and result.stdout.strip():
-                    import json
-                    gpu_data = json.loads(result.stdout)
-                    if isinstance(gpu_data, dict):
-                        gpu_data = [gpu_data]
-                    for gpu in gpu_data:
-                        name = gpu.get("Name", "Desconhecido")
-                        # Skip virtual adapters
-                        if "virtual" in name.lower() or "parsec" in name.lower():
-                            continue
-                        vram_gb = round(gpu.get("AdapterRAM", 0) / (1024**3), 1) if gpu.get("AdapterRAM") else "N/A"
-                        gpu_info.append({
-                            "name": name,
-                            "vram_gb": vram_gb
-                        })
-            except:
-                pass
-        
-        # Get OS info
-        os_info = f"{platform.system()} {platform.release()}"
-        try:
-            os_version = platform.version()
-            os_info += f" (Build {os_version})"
-        except:
-            pass
+        hardware = _hardware_info()
+        cpu_model = hardware["cpu_model"]
+        gpu_info = [dict(gpu) for gpu in hardware["gpu"]]
+        os_info = hardware["os"]
         
         return {
             "success": True,
@@ -481,21 +514,22 @@ def get_system_info() -> dict:
                 "model": cpu_model.strip() if cpu_model else "Desconhecido",
                 "cores_physical": psutil.cpu_count(logical=False),
                 "cores_logical": psutil.cpu_count(logical=True),
-                "usage_percent": cpu_percent
+                "usage_percent": snapshot.cpu_percent
             },
             "gpu": gpu_info if gpu_info else [{"name": "Não detectado", "vram_gb": "N/A"}],
             "memory": {
-                "total_gb": round(memory.total / (1024**3), 1),
-                "used_gb": round(memory.used / (1024**3), 1),
-                "available_gb": round(memory.available / (1024**3), 1),
-                "usage_percent": memory.percent
+                "total_gb": round(snapshot.memory_total / (1024**3), 1),
+                "used_gb": round(snapshot.memory_used / (1024**3), 1),
+                "available_gb": round(snapshot.memory_available / (1024**3), 1),
+                "usage_percent": snapshot.memory_percent
             },
             "disk": {
                 "total_gb": round(disk.total / (1024**3), 1),
                 "used_gb": round(disk.used / (1024**3), 1),
                 "free_gb": round(disk.free / (1024**3), 1),
                 "usage_percent": round(disk.percent, 1)
-            }
+            },
+            "snapshot_age_seconds": round(snapshot.age, 1)
         }
     except Exception as e:
         return {"success": False, "error": str(e)}
@@ -507,7 +541,9 @@ def get_system_info() -> dict:
     parameters={
         "type": "object",
         "properties": {}
-    }
+    },
+    executor="gui",
+    independent=True
 )
 def get_active_window() -> dict:
     """Get information about the currently active window."""
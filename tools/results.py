@@ -0,0 +1,39 @@
+"""
+Result tools - Page through tool results that were too big for the prompt
+"""
+
+from core.tools import tool
+from core.history import estimate_tokens
+from core.results import current_store, current_page_budget
+
+
+@tool(
+    name="fetch_more",
+    description="Lê em partes o resultado completo de uma ferramenta que veio resumido (campo '_truncado'). Use o handle informado e continue pelo 'next_offset' até ter o que precisa.",
+    parameters={
+        "type": "object",
+        "properties": {
+            "handle": {
+                "type": "string",
+                "description": "Handle do resultado resumido (ex: 'a1b2c3d4')"
+            },
+            "offset": {
+                "type": "integer",
+                "description": "Posição (em caracteres) de onde continuar a leitura (padrão: 0)"
+            }
+        },
+        "required": ["handle"]
+    },
+    independent=True,
+    idempotent=True
+)
+def fetch_more(handle: str, offset: int = 0) -> dict:
+    """Read the next chunk of a stored tool result (sized to what is left of the request's budget)."""
+    store = current_store.get()
+    budget = current_page_budget.get()
+    if budget is not None:
+        budget -= estimate_tokens('"success": true, ')  # Added to the page below
+    page = store.read(handle, offset, max_tokens=budget) if store else None
+    if page is None:
+        return {"success": False, "error": f"Handle desconhecido ou expirado: {handle}"}
+    return {"success": True, **page}
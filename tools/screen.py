@@ -36,7 +36,8 @@ SCREENSHOTS_DIR.mkdir(exist_ok=True)
                 "description": "Região opcional para capturar (x, y, largura, altura). Se não especificado, captura a tela inteira."
             }
         }
-    }
+    },
+    executor="gui"
 )
 def screenshot(filename: str = None, region: dict = None) -> dict:
     """Capture a screenshot of the screen and save to file."""
@@ -82,7 +83,8 @@ def screenshot(filename: str = None, region: dict = None) -> dict:
     parameters={
         "type": "object",
         "properties": {}
-    }
+    },
+    executor="gui"
 )
 def get_screen_size() -> dict:
     """Get screen dimensions."""
@@ -114,7 +116,8 @@ def get_screen_size() -> dict:
             }
         },
         "required": ["image_path"]
-    }
+    },
+    executor="gui"
 )
 def locate_on_screen(image_path: str, confidence: float = 0.9) -> dict:
     """Locate an image on the screen."""
@@ -156,7 +159,8 @@ def locate_on_screen(image_path: str, confidence: float = 0.9) -> dict:
             }
         },
         "required": ["x", "y"]
-    }
+    },
+    executor="gui"
 )
 def get_pixel_color(x: int, y: int) -> dict:
     """Get the color of a pixel at a specific position."""
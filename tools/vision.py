@@ -1,10 +1,12 @@
-from core.tools import tool
+from core.tools import tool, registry, EXECUTOR_GUI
 import pyautogui
 import io
 import base64
 import os
 import pytesseract
-from core.ollama_client import OllamaClient
+from typing import Optional, Union
+from core.ollama_client import OllamaClient, clients
+import config
 
 
 @tool(
@@ -19,10 +21,12 @@ from core.ollama_client import OllamaClient
                 "description": "Região opcional [left, top, width, height]. Se omitido, lê a tela inteira."
             }
         }
-    }
+    },
+    executor="gui",
+    independent=True
 )
-def read_screen_text(region: list[int] = None) -> str:
-    """Reads visible text from the screen using OCR."""
+def read_screen_text(region: list[int] = None) -> Union[str, dict]:
+    """Reads visible text from the screen using OCR (failures as {"success": False, "error": ...})."""
     try:
         # Check for Tesseract in common paths
         tesseract_paths = [
@@ -38,7 +42,7 @@ def read_screen_text(region: list[int] = None) -> str:
                 break
         
         if not tesseract_cmd:
-            return "Erro: Tesseract OCR não encontrado. Instale-o para usar este recurso."
+            return {"success": False, "error": "Tesseract OCR não encontrado. Instale-o para usar este recurso."}
             
         pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
         
@@ -53,7 +57,15 @@ def read_screen_text(region: list[int] = None) -> str:
             
         return text.strip()
     except Exception as e:
-        return f"Erro ao ler tela: {str(e)}"
+        return {"success": False, "error": f"Erro ao ler tela: {str(e)}"}
+
+
+def _capture_screen_base64() -> str:
+    """Take a screenshot and return it as a base64 encoded PNG."""
+    screenshot = pyautogui.screenshot()
+    buffered = io.BytesIO()
+    screenshot.save(buffered, format="PNG")
+    return base64.b64encode(buffered.getvalue()).decode("utf-8")
 
 
 @tool(
@@ -68,22 +80,19 @@ def read_screen_text(region: list[int] = None) -> str:
             }
         },
         "required": ["question"]
-    }
+    },
+    independent=True,
+    inject=("ollama",)
 )
-async def analyze_screen(question: str) -> str:
-    """Analyzes the screen using a local Vision Language Model (Moondream)."""
+async def analyze_screen(question: str, ollama: Optional[OllamaClient] = None) -> Union[str, dict]:
+    """Analyzes the screen using a local Vision Language Model (failures as {"success": False, "error": ...})."""
     try:
         
-        # Take screenshot
-        screenshot = pyautogui.screenshot()
-        
-        # Convert to base64
-        buffered = io.BytesIO()
-        screenshot.save(buffered, format="PNG")
-        img_str = base64.b64encode(buffered.getvalue()).decode("utf-8")
+        # Take screenshot and convert to base64 off the event loop
+        img_str = await registry.run_sync(EXECUTOR_GUI, _capture_screen_base64)
         
-        # Query Ollama (Moondream)
-        client = OllamaClient()
+        # Query Ollama (Moondream) over the shared, pooled client
+        client = ollama or clients.get()
         
         # Create a prompt specifically for the VLM
         messages = [
@@ -91,19 +100,20 @@ async def analyze_screen(question: str) -> str:
         ]
         
         # Use the modified chat method with image support
-        # We assume 'moondream' is installed as per plan
+        # We assume the vision model (moondream) is installed as per plan
         response = await client.chat(
             messages=messages,
             images=[img_str],
-            model="moondream" 
+            model=config.OLLAMA_VISION_MODEL,
+            request_class="vision"
         )
         
         if "message" in response:
             return response["message"]["content"]
         elif "error" in response:
-            return f"Erro na IA Visual: {response['error']}"
+            return {"success": False, "error": f"Erro na IA Visual: {response['error']}"}
         else:
-            return "Erro desconhecido ao analisar a imagem."
+            return {"success": False, "error": "Erro desconhecido ao analisar a imagem."}
             
     except Exception as e:
-        return f"Erro ao analisar tela: {str(e)}"
+        return {"success": False, "error": f"Erro ao analisar tela: {str(e)}"}
@@ -4,7 +4,7 @@ Web tools - Search, browse, and fetch web content
 
 import httpx
 import re
-from core.tools import tool
+from core.tools import tool, CachePolicy
 
 
 # ============ CONTENT POLICY FILTER ============
@@ -48,10 +48,13 @@ def _is_query_blocked(query: str) -> tuple[bool, str]:
             }
         },
         "required": ["query"]
-    }
+    },
+    independent=True,
+    idempotent=True,
+    cache=CachePolicy(ttl=300)
 )
 def web_search(query: str, max_results: int = 5, time_limit: str = None) -> dict:
-    """Search the web using DuckDuckGo with retry, caching and time filter."""
+    """Search the web using DuckDuckGo with retry and time filter."""
     import time
     
     # Content policy check
@@ -59,23 +62,6 @@ def web_search(query: str, max_results: int = 5, time_limit: str = None) -> dict
     if is_blocked:
         return {"success": False, "blocked": True, "message": message}
     
-    # Global cache for the session (simple in-memory)
-    
-    # Global cache for the session (simple in-memory)
-    if not hasattr(web_search, "cache"):
-        web_search.cache = {}
-    
-    # Cache key includes time_limit
-    cache_key = f"{query}_{time_limit}"
-    
-    # Check cache (TTL 5 minutes)
-    current_time = time.time()
-    if cache_key in web_search.cache:
-        timestamp, data = web_search.cache[cache_key]
-        if current_time - timestamp < 300:  # 300 seconds TTL
-            data["cached"] = True
-            return data
-            
     max_retries = 3
     last_error = None
     
@@ -146,8 +132,6 @@ def web_search(query: str, max_results: int = 5, time_limit: str = None) -> dict
                     "count": len(results),
                     "results": results
                 }
-                # Store in cache
-                web_search.cache[cache_key] = (time.time(), response_data)
                 return response_data
             else:
                 response_data = {
@@ -157,7 +141,6 @@ def web_search(query: str, max_results: int = 5, time_limit: str = None) -> dict
                     "count": 0,
                     "message": "Nenhum resultado encontrado"
                 }
-                web_search.cache[cache_key] = (time.time(), response_data)
                 return response_data
 
         except Exception as e:
@@ -183,7 +166,10 @@ def web_search(query: str, max_results: int = 5, time_limit: str = None) -> dict
             }
         },
         "required": ["url"]
-    }
+    },
+    independent=True,
+    idempotent=True,
+    cache=CachePolicy(ttl=600)
 )
 def fetch_webpage(url: str, max_length: int = 5000) -> dict:
     """Fetch and clean text content from a webpage using BeautifulSoup."""
@@ -231,7 +217,10 @@ def fetch_webpage(url: str, max_length: int = 5000) -> dict:
             }
         },
         "required": ["query"]
-    }
+    },
+    independent=True,
+    idempotent=True,
+    cache=CachePolicy(ttl=300)
 )
 def deep_news_search(query: str) -> dict:
     """Search and READ the top 5 results to answer with perfection."""
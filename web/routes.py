@@ -3,11 +3,15 @@ Web routes for JARVIS
 HTTP and WebSocket endpoints
 """
 
+import asyncio
 import json
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, PlainTextResponse
 from pathlib import Path
-from core.agent import agent
+from core.sessions import session_manager, SessionLimitError
+from core.scheduler import scheduler, QueueFullError, PRIORITIES, INTERACTIVE
+from core.tools import registry
+from core import tracing
 
 router = APIRouter()
 
@@ -25,18 +29,102 @@ async def index():
 @router.get("/health")
 async def health_check():
     """Health check endpoint."""
-    status = await agent.check_status()
+    status = await session_manager.check_status()
     return {
         "status": "ok",
         "agent": status
     }
 
 
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics: request, LLM and tool histograms plus live gauges."""
+    sessions = session_manager.stats()
+    cache = registry.cache.stats()
+    active = tracing.Gauge("jarvis_sessions", "Open sessions (state=active|busy)")
+    active.set(sessions["active"], state="active")
+    active.set(sessions["busy"], state="busy")
+    cache_requests = tracing.Counter("jarvis_tool_cache_requests_total", "Tool cache lookups (result=hit|miss)")
+    cache_requests.inc(cache["hits"], result="hit")
+    cache_requests.inc(cache["misses"], result="miss")
+    cache_entries = tracing.Gauge("jarvis_tool_cache_entries", "Results held in the tool cache")
+    cache_entries.set(cache["entries"])
+    circuit = tracing.Gauge("jarvis_ollama_circuit_open", "1 while the Ollama circuit breaker rejects requests")
+    circuit.set(int(session_manager.ollama.breaker.state != "closed"))
+    queue = tracing.Gauge("jarvis_requests", "Scheduled requests (state=running|queued)")
+    queue.set(scheduler.running, state="running")
+    queue.set(scheduler.queued, state="queued")
+    rejected = tracing.Counter("jarvis_requests_rejected_total", "Requests refused with the queue full")
+    rejected.inc(scheduler.rejected)
+    return tracing.metrics.render(extra=(active, cache_requests, cache_entries, circuit, queue, rejected))
+
+
+@router.get("/traces")
+async def traces():
+    """Span trees of the most recent requests (newest first)."""
+    return {"traces": list(reversed(tracing.recent_traces))}
+
+
 @router.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
-    """WebSocket endpoint for real-time chat."""
+    """
+    WebSocket endpoint for real-time chat.
+    
+    Each connection gets its own session. Clients may pass ?session=<id>
+    to resume the same conversation after a reconnect.
+    
+    Messages are processed in background tasks so the socket keeps being
+    read: a {"type": "cancel"} message or a disconnect stops the requests
+    in flight right away.
+    """
     await websocket.accept()
     
+    try:
+        session = session_manager.get(websocket.query_params.get("session"))
+    except SessionLimitError as e:
+        await websocket.send_json({"type": "error", "content": str(e)})
+        await websocket.close()
+        return
+    agent = session.agent
+    
+    await websocket.send_json({"type": "session", "content": session.id})
+    
+    # Requests of this connection still running (or waiting for the session lock)
+    tasks: set[asyncio.Task] = set()
+    
+    async def send_position(position: int):
+        await websocket.send_json({"type": "queued", "position": position})
+    
+    async def process(user_text: str, priority: str):
+        try:
+            # Wait for a turn on the shared backend, reporting the queue position
+            async with scheduler.slot(session.id, priority, on_position=send_position):
+                async with session.lock:
+                    session.touch()
+                    # Forward tokens, tool events and the final response as separate frames
+                    async for event in agent.process_message(user_text):
+                        await websocket.send_json(event)
+                    session.touch()
+        except QueueFullError as e:
+            await websocket.send_json({
+                "type": "error",
+                "content": str(e),
+                "retry_after": e.retry_after
+            })
+        except Exception as e:
+            await websocket.send_json({
+                "type": "error",
+                "content": str(e)
+            })
+    
+    async def cancel_all() -> int:
+        """Cancel this connection's requests and wait for their cleanup."""
+        pending = list(tasks)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        return len(pending)
+    
     try:
         while True:
             # Receive message
@@ -48,21 +136,25 @@ async def websocket_endpoint(websocket: WebSocket):
             if msg_type == "message":
                 # Process user message
                 user_text = message.get("content", "")
+                priority = message.get("priority", INTERACTIVE)
+                if priority not in PRIORITIES:
+                    priority = INTERACTIVE
                 if user_text:
-                    try:
-                        response = await agent.process_message(user_text)
-                        await websocket.send_json({
-                            "type": "response",
-                            "content": response
-                        })
-                    except Exception as e:
-                        await websocket.send_json({
-                            "type": "error",
-                            "content": str(e)
-                        })
+                    task = asyncio.create_task(process(user_text, priority))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+            
+            elif msg_type == "cancel":
+                # Stop the requests in flight (LLM stream, tools and their processes)
+                if await cancel_all():
+                    await websocket.send_json({
+                        "type": "cancelled",
+                        "content": "Pedido cancelado."
+                    })
             
             elif msg_type == "clear":
-                # Clear conversation history
+                # Clear conversation history (abandoning any request in flight)
+                await cancel_all()
                 agent.clear_history()
                 await websocket.send_json({
                     "type": "response",
@@ -81,3 +173,6 @@ async def websocket_endpoint(websocket: WebSocket):
         pass
     except Exception as e:
         print(f"WebSocket error: {e}")
+    finally:
+        # Nobody is listening anymore - don't spend LLM or CPU time on it
+        await cancel_all()
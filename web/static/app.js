@@ -11,6 +11,18 @@ class JarvisClient {
         this.maxReconnectAttempts = 10;
         this.reconnectDelay = 2000;
 
+        // Assistant bubble currently receiving streamed tokens
+        this.stream = null;
+
+        // Span tree of the current request, shown under its response
+        this.pendingTrace = null;
+
+        // Messages sent and not answered yet (the stop button shows while > 0)
+        this.pending = 0;
+
+        // Server-side conversation id, reused on reconnect (one per tab)
+        this.sessionId = sessionStorage.getItem('jarvis-session');
+
         // DOM Elements
         this.elements = {
             status: document.getElementById('status'),
@@ -19,6 +31,7 @@ class JarvisClient {
             chatContainer: document.getElementById('chat-container'),
             messageInput: document.getElementById('message-input'),
             sendBtn: document.getElementById('btn-send'),
+            stopBtn: document.getElementById('btn-stop'),
             clearBtn: document.getElementById('btn-clear'),
             settingsBtn: document.getElementById('btn-settings'),
             modal: document.getElementById('status-modal'),
@@ -37,7 +50,8 @@ class JarvisClient {
 
     connect() {
         const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
-        const wsUrl = `${protocol}//${window.location.host}/ws`;
+        const query = this.sessionId ? `?session=${encodeURIComponent(this.sessionId)}` : '';
+        const wsUrl = `${protocol}//${window.location.host}/ws${query}`;
 
         this.ws = new WebSocket(wsUrl);
 
@@ -55,6 +69,7 @@ class JarvisClient {
 
         this.ws.onclose = () => {
             this.isConnected = false;
+            this.setPending(0);
             this.updateStatus('Desconectado', 'error');
             this.scheduleReconnect();
         };
@@ -82,6 +97,9 @@ class JarvisClient {
         // Send message
         this.elements.sendBtn.addEventListener('click', () => this.sendMessage());
 
+        // Stop the request in flight
+        this.elements.stopBtn.addEventListener('click', () => this.cancelRequest());
+
         // Enter to send (Shift+Enter for new line)
         this.elements.messageInput.addEventListener('keydown', (e) => {
             if (e.key === 'Enter' && !e.shiftKey) {
@@ -140,6 +158,7 @@ class JarvisClient {
 
         // Show typing indicator
         this.showTypingIndicator();
+        this.setPending(this.pending + 1);
 
         // Send to server
         this.ws.send(JSON.stringify({
@@ -148,19 +167,70 @@ class JarvisClient {
         }));
     }
 
+    cancelRequest() {
+        if (!this.isConnected || !this.pending) return;
+        this.ws.send(JSON.stringify({ type: 'cancel' }));
+    }
+
+    setPending(count) {
+        this.pending = Math.max(0, count);
+        this.elements.stopBtn.classList.toggle('hidden', this.pending === 0);
+    }
+
     handleMessage(data) {
         switch (data.type) {
+            case 'session':
+                this.sessionId = data.content;
+                sessionStorage.setItem('jarvis-session', data.content);
+                break;
+            case 'token':
+                this.appendToken(data.content);
+                break;
+            case 'tool_call':
+                this.showToolActivity(data.tool_name);
+                break;
+            case 'tool_result':
+                break;
+            case 'retract':
+                // The step is being retried on a larger model
+                if (this.stream) {
+                    this.stream.text = '';
+                    this.renderStream();
+                }
+                break;
+            case 'trace':
+                this.pendingTrace = data.content;
+                break;
             case 'response':
+                this.setPending(this.pending - 1);
                 this.hideTypingIndicator();
-                this.addMessage(data.content, 'assistant');
+                if (this.stream) {
+                    this.finishStream(data.content);
+                } else {
+                    this.addMessage(data.content, 'assistant');
+                }
+                this.attachTrace();
                 break;
             case 'error':
+                this.setPending(this.pending - 1);
                 this.hideTypingIndicator();
+                this.finishStream();
                 this.addMessage(`❌ Erro: ${data.content}`, 'assistant');
                 break;
+            case 'cancelled':
+                // Every request in flight was stopped
+                this.setPending(0);
+                this.pendingTrace = null;
+                this.hideTypingIndicator();
+                this.finishStream();
+                this.addMessage(`⏹️ ${data.content}`, 'assistant');
+                break;
             case 'status':
                 this.displayStatus(data.content);
                 break;
+            case 'queued':
+                this.showQueuePosition(data.position);
+                break;
             case 'typing':
                 // Could show tool execution info here
                 break;
@@ -175,21 +245,133 @@ class JarvisClient {
         content.className = 'message-content';
         content.innerHTML = this.formatMessage(text);
 
+        message.appendChild(content);
+        message.appendChild(this.createTimeElement());
+        this.elements.messages.appendChild(message);
+
+        // Scroll to bottom
+        this.scrollToBottom();
+    }
+
+    createTimeElement() {
         const time = document.createElement('div');
         time.className = 'message-time';
         time.textContent = new Date().toLocaleTimeString('pt-BR', {
             hour: '2-digit',
             minute: '2-digit'
         });
+        return time;
+    }
+
+    startStream() {
+        this.hideTypingIndicator();
+
+        const message = document.createElement('div');
+        message.className = 'message assistant streaming';
+
+        const content = document.createElement('div');
+        content.className = 'message-content';
+
+        const activity = document.createElement('div');
+        activity.className = 'tool-activity';
 
         message.appendChild(content);
-        message.appendChild(time);
+        message.appendChild(activity);
         this.elements.messages.appendChild(message);
 
-        // Scroll to bottom
+        // `narration` holds text from earlier iterations (before tool calls),
+        // `text` the tokens of the current model iteration
+        this.stream = { message, content, activity, narration: '', text: '' };
+    }
+
+    renderStream() {
+        const { content, narration, text } = this.stream;
+        content.innerHTML = this.formatMessage(narration + text);
+        this.scrollToBottom();
+    }
+
+    appendToken(token) {
+        if (!this.stream) this.startStream();
+        this.stream.text += token;
+        this.renderStream();
+    }
+
+    showToolActivity(toolName) {
+        if (!this.stream) this.startStream();
+
+        // Text streamed before a tool call is narration ("Vou abrir o Chrome...")
+        if (this.stream.text.trim()) {
+            this.stream.narration += this.stream.text.trim() + '\n\n';
+        }
+        this.stream.text = '';
+        this.renderStream();
+
+        const item = document.createElement('span');
+        item.className = 'tool-chip';
+        item.textContent = `🔧 ${toolName}`;
+        this.stream.activity.appendChild(item);
+        this.scrollToBottom();
+    }
+
+    finishStream(finalText) {
+        if (!this.stream) return;
+
+        // The server's final text is authoritative (leaked JSON is cleaned there)
+        if (finalText !== undefined) {
+            this.stream.text = finalText;
+            this.renderStream();
+        }
+        this.stream.message.classList.remove('streaming');
+        this.stream.message.appendChild(this.createTimeElement());
+        this.stream = null;
+    }
+
+    attachTrace() {
+        const trace = this.pendingTrace;
+        this.pendingTrace = null;
+        const message = this.elements.messages.querySelector('.message.assistant:last-child');
+        if (!trace || !message) return;
+
+        const llmCalls = trace.attrs.llm_calls || 0;
+        const details = document.createElement('details');
+        details.className = 'trace';
+        const summary = document.createElement('summary');
+        summary.textContent = `⏱️ ${this.formatMs(trace.duration_ms)} · ${llmCalls} chamada(s) ao modelo`;
+        if (trace.attrs.load_duration) {
+            summary.textContent += ` · 🧊 carregamento ${this.formatMs(trace.attrs.load_duration / 1e6)}`;
+        }
+        details.appendChild(summary);
+        details.appendChild(this.renderSpan(trace));
+        message.appendChild(details);
         this.scrollToBottom();
     }
 
+    renderSpan(span) {
+        const list = document.createElement('ul');
+        for (const child of span.children) {
+            const item = document.createElement('li');
+            const attrs = child.attrs || {};
+            let label = `${child.name} · ${this.formatMs(child.duration_ms)}`;
+            if (child.kind === 'llm' && attrs.tokens_per_second) {
+                label += ` · ${attrs.eval_count} tokens · ${attrs.tokens_per_second} tok/s`;
+            }
+            if (child.kind === 'tool') {
+                label += attrs.cached ? ' · cache' : '';
+                label += ` · ${attrs.args_bytes} B → ${attrs.result_bytes} B`;
+                if (attrs.success === false) label += ' · ❌';
+            }
+            item.textContent = label;
+            item.className = `span-${child.kind}`;
+            if (child.children.length) item.appendChild(this.renderSpan(child));
+            list.appendChild(item);
+        }
+        return list;
+    }
+
+    formatMs(ms) {
+        return ms >= 1000 ? `${(ms / 1000).toFixed(2)} s` : `${Math.round(ms)} ms`;
+    }
+
     formatMessage(text) {
         // Check for screenshot file references and convert to images
         // Pattern: screenshot saved at/em filename.png or filepath with screenshots folder
@@ -235,6 +417,24 @@ class JarvisClient {
         this.scrollToBottom();
     }
 
+    showQueuePosition(position) {
+        // Position 0: the request left the queue and is being processed
+        this.showTypingIndicator();
+        const message = document.querySelector('.typing-indicator').closest('.message');
+        let label = message.querySelector('.queue-position');
+        if (!position) {
+            if (label) label.remove();
+            return;
+        }
+        if (!label) {
+            label = document.createElement('div');
+            label.className = 'queue-position';
+            message.appendChild(label);
+        }
+        label.textContent = `⏳ Na fila: posição ${position}`;
+        this.scrollToBottom();
+    }
+
     hideTypingIndicator() {
         const indicator = document.querySelector('.typing-indicator');
         if (indicator) {
@@ -247,6 +447,8 @@ class JarvisClient {
     }
 
     clearConversation() {
+        this.stream = null;
+        this.setPending(0);
         this.elements.messages.innerHTML = '';
         this.elements.welcome.classList.remove('hidden');
 